@@ -8,12 +8,14 @@
 __version__ = "0.1a8"
 
 from .api import GailBot
-from .core.engines import (
-    Engine,
-    Watson,
-    WatsonAMInterface,
-    WatsonLMInterface
-)
+from .core.engines import Engine
 from .plugins import Plugin, Methods
 from .services import GBPluginMethods, UttDict, UttObj
 
+def __getattr__(name):
+    # the watson engine is imported on first use
+    if name in ("Watson", "WatsonAMInterface", "WatsonLMInterface"):
+        from .core import engines
+        return getattr(engines, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
@@ -4,7 +4,7 @@
 # @Last Modified by:   Muhammad Umair
 # @Last Modified time: 2023-01-18 23:00:46
 
-from typing import List, Dict, Union, Tuple, Callable
+from typing import List, Dict, Union, Tuple, Callable, Any
 
 from gailbot.services import ServiceController, SettingDict 
 from gailbot.workspace import WorkspaceManager
@@ -32,6 +32,7 @@ class GailBot:
         self.gb: ServiceController = ServiceController(
             self.ws_manager, load_exist_setting = True)
         logger.info("gailbot service controller initialized")
+        self.gb.preload_engines()
         
     def init_workspace(self):
         """
@@ -72,6 +73,30 @@ class GailBot:
   
     def clear_source_memory(self)->bool:
         return self.gb.clear_source_memory()
+
+    def get_transcription_cache_info(self) -> Union[bool, Dict[str, Any]]:
+        """
+        Returns the size, hit rate and entries of the transcription cache
+
+        Returns:
+            Union[bool, Dict[str, Any]]: the cache information, false if the
+            cache is disabled
+        """
+        return self.gb.get_transcription_cache_info()
+
+    def purge_transcription_cache(self, older_than_sec: float = None) -> Union[bool, int]:
+        """
+        Removes cached transcription results
+
+        Args:
+            older_than_sec: float: only remove the results that were not used
+                in this many seconds, remove all if not given
+
+        Returns:
+            Union[bool, int]: the number of removed results, false if the
+            cache is disabled
+        """
+        return self.gb.purge_transcription_cache(older_than_sec)
     
     
     def add_sources(
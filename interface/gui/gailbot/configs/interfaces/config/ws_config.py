@@ -41,6 +41,7 @@ class GailBotData():
         self.setting_src: str = os.path.join(ws_root, self.root, path_dict["setting_src"])
         self.plugin_src:  str = os.path.join(ws_root, self.root, path_dict["plugin_src"])
         self.engine_src:  str = os.path.join(ws_root, self.root, path_dict["engine_setting"])
+        self.transcription_cache: str = os.path.join(ws_root, self.root, path_dict["transcription_cache"])
         self.root:        str = os.path.join(ws_root, self.root)
 
 @dataclass
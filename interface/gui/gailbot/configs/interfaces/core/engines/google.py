@@ -12,6 +12,10 @@ class GoogleConfig(DataclassFromDict):
     workspace: str = field_from_dict()
     maximum_size: int = field_from_dict()
     maximum_duration: int = field_from_dict()
+    silence_window: float = field_from_dict()
+    max_in_flight: int = field_from_dict()
+    max_retries: int = field_from_dict()
+    retry_backoff: float = field_from_dict()
 
 def load_google_config(path: str):
     """
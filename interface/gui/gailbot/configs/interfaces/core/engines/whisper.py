@@ -37,12 +37,20 @@ class WhisperDiarizationConfig(DataclassFromDict):
     config_filename : str = field_from_dict()
     model_filename : str = field_from_dict()
 
+@dataclass
+class WhisperRegistryConfig(DataclassFromDict):
+    max_resident_models : int = field_from_dict()
+    max_memory_mb : float = field_from_dict()
+    preload_on_startup : bool = field_from_dict()
+    max_replicas : int = field_from_dict()
+
 @dataclass
 class WhisperConfig(DataclassFromDict):
     engine_name : str = field_from_dict()
     model_name : str =  field_from_dict()
     transcribe_configs : WhisperTranscribeConfig = field_from_dict()
     diarization_configs : WhisperDiarizationConfig = field_from_dict()
+    registry_configs : WhisperRegistryConfig = field_from_dict()
 
 def load_whisper_config(path: str):
     """Loads data from the Watson engine configuration
@@ -24,11 +24,42 @@ class Thread(DataclassFromDict):
       transcriber_num_threads  : int = field_from_dict()
       payload_num_threads      : int = field_from_dict()
       analysis_num_threads     : int = field_from_dict()
+
+@dataclass 
+class PipelineConfig(DataclassFromDict): 
+      streaming                : bool = field_from_dict()
+      queue_size               : int = field_from_dict()
+
+@dataclass 
+class ExecutorConfig(DataclassFromDict): 
+      transcription_backend       : str = field_from_dict()
+      analysis_backend            : str = field_from_dict()
+      transcription_num_processes : int = field_from_dict()
+      analysis_num_processes      : int = field_from_dict()
+
+@dataclass 
+class TranscriptionCacheConfig(DataclassFromDict): 
+      enabled                     : bool = field_from_dict()
+      max_size_mb                 : float = field_from_dict()
+
+@dataclass 
+class ResultConfig(DataclassFromDict): 
+      memory_budget_mb            : float = field_from_dict()
+      read_cache_mb               : float = field_from_dict()
+
+@dataclass 
+class EngineValidationConfig(DataclassFromDict): 
+      ttl_s                       : float = field_from_dict()
 @dataclass
 class ServiceConfig(DataclassFromDict):
     engines : Engines = field_from_dict()
     directory_name : DirectoryName = field_from_dict()
     thread : Thread = field_from_dict()
+    pipeline : PipelineConfig = field_from_dict()
+    executor : ExecutorConfig = field_from_dict()
+    transcription_cache : TranscriptionCacheConfig = field_from_dict()
+    result : ResultConfig = field_from_dict()
+    engine_validation : EngineValidationConfig = field_from_dict()
 
 @dataclass 
 class ProfileData(DataclassFromDict):
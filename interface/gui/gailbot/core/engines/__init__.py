@@ -5,7 +5,25 @@
 # @Last Modified time: 2023-01-10 13:30:27
 
 
+import importlib
+
 from .engine import Engine
-from .watson import WatsonAMInterface, WatsonLMInterface, Watson
-from .whisperEngine import WhisperEngine
-from .google import Google
\ No newline at end of file
+
+# the engines are imported on first use, since importing them loads the
+# speech recognition libraries
+_LAZY_IMPORTS = {
+    "Watson" : "gailbot.core.engines.watson",
+    "WatsonAMInterface" : "gailbot.core.engines.watson",
+    "WatsonLMInterface" : "gailbot.core.engines.watson",
+    "WhisperEngine" : "gailbot.core.engines.whisperEngine",
+    "Google" : "gailbot.core.engines.google",
+}
+
+__all__ = ["Engine", *_LAZY_IMPORTS]
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
\ No newline at end of file
@@ -3,30 +3,48 @@
 # @Date:   2023-01-10 13:29:08
 # @Last Modified by:   Muhammad Umair
 # @Last Modified time: 2023-01-16 15:02:59
-from typing import Dict, List, Any
-from gailbot.core.engines import (
-    Engine,
-    Watson,
-    Google,
-    WhisperEngine
-)
-
-_ENGINES = {
-    "watson" : Watson,
-    "google" : Google,
-    "whisper" : WhisperEngine
-}
+import importlib
+from threading import Lock
+from typing import Dict, List, Any, Type
+from gailbot.core.engines.engine import Engine
 
 class EngineManager:
     """ 
     provides wrapper function to run available speech detect engines
     """
+    # the engine classes by dotted path, an engine is imported the first
+    # time it is used
+    _ENGINES : Dict[str, str] = {
+        "watson" : "gailbot.core.engines.watson.watson.Watson",
+        "google" : "gailbot.core.engines.google.google.Google",
+        "whisper" : "gailbot.core.engines.whisperEngine.whisperEngine.WhisperEngine"
+    }
+    _loaded : Dict[str, Type[Engine]] = dict()
+    _lock = Lock()
+
+    @classmethod
+    def engine_class(cls, name : str) -> Type[Engine]:
+        """ return the class of the engine, importing it if it is not loaded
+
+        Raises:
+            KeyError: raised when the engine is not available
+        """
+        with cls._lock:
+            if name not in cls._loaded:
+                module, _, attr = cls._ENGINES[name].rpartition(".")
+                cls._loaded[name] = getattr(importlib.import_module(module), attr)
+            return cls._loaded[name]
+
+    def is_loaded(self, name : str) -> bool:
+        """ return true if the engine has been imported """
+        return name in self._loaded
+
     def available_engines(self) -> List[str]:
         """
         Returns:
             List[str]: return a list of available engine
         """
-        return list(_ENGINES.keys())
+        return list(self._ENGINES.keys())
 
     def is_engine(self, name : str) -> bool:
         return name in self.available_engines()
@@ -36,5 +54,29 @@ class EngineManager:
             raise Exception(
                 f"Engine not supported: {name}"
             )
-        engine = _ENGINES[name](**kwargs)
-        return engine
\ No newline at end of file
+        engine = self.engine_class(name)(**kwargs)
+        return engine
+
+    def get_model_name(self, name : str) -> str:
+        """ return the name of the model the engine transcribes with, or an
+            empty string if the model is part of the engine setting
+        """
+        get_model_name = getattr(self.engine_class(name), "get_model_name", None)
+        return get_model_name() if get_model_name else ""
+
+    def preload(self, name : str) -> bool:
+        """ load the resources used by the engine ahead of the first
+            transcription, engines without a preload step are skipped
+
+        Args:
+            name (str): the name of the engine
+
+        Returns:
+            bool: return true if the engine is ready, false otherwise
+        """
+        if not self.is_engine(name):
+            return False
+        preload = getattr(self.engine_class(name), "preload", None)
+        if not preload:
+            return True
+        return preload()
@@ -7,10 +7,11 @@
 # stdlib import
 import os 
 import io
+import wave
 from copy import deepcopy
 from typing import Union
 from urllib import request
-from typing import Dict, List 
+from typing import Dict, List, Iterable, Iterator
 
 # internal import
 from gailbot.core.utils.general import (
@@ -23,7 +24,8 @@ from gailbot.core.utils.download import is_internet_connected
 from gailbot.core.utils.logger import makelogger
 from ...engines import exception as EXCEPTION
 from gailbot.configs import google_config_loader, workspace_config_loader
-from gailbot.core.utils.media import MediaHandler
+from gailbot.core.utils.media import MediaHandler, AudioChunk
+from .dispatcher import ChunkDispatcher, TRANSIENT_ERRORS
 
 #external import
 from google.cloud.speech_v1p1beta1.types import cloud_speech
@@ -56,6 +58,8 @@ class GoogleCore:
         client = GoogleCore.is_valid_google_api(google_api_key_config)
         self.workspace = workspace_config_loader().engine_ws.google
         assert client 
+        # one client is shared by all requests of the engine
+        self.client = client
         self.connected = True
         self.current_chunk_duration = GOOGLE_CONFIG.maximum_duration
         
@@ -123,6 +127,60 @@ class GoogleCore:
         logger.info("start transcribing audio using google cloud STT")
         if not is_internet_connected():
             raise EXCEPTION.TranscriptionError(EXCEPTION.ERROR.CONNECTION_ERROR)
+        audio_chunks = None
+        if get_extension(audio_path).lower() == "wav":
+            try:
+                audio_chunks = self._stream_wav_chunks(audio_path, payload_workspace)
+            except (wave.Error, EOFError) as e:
+                logger.warning(f"cannot read {audio_path} as a pcm wav file: {e}")
+        if audio_chunks is None:
+            audio_chunks = self._decoded_chunks(audio_path, payload_workspace)
+            
+        try:
+            return  self._transcribe_list_file(audio_chunks, payload_workspace)
+        except Exception as e:
+            logger.error(e, exc_info=e)
+            raise EXCEPTION.TranscriptionError(EXCEPTION.ERROR.GOOGLE_TRANSCRIPTION_FAILED)
+        
+    def _stream_wav_chunks(self, audio_path: str, payload_workspace: str) -> Iterator[AudioChunk]:
+        """
+        Converts the wav file to 16 bit and splits it into mono chunks that
+        google accepts, the chunk boundaries are computed from the header
+        and the chunks are written one at a time as they are transcribed
+
+        Raises:
+            wave.Error: raised when the converted file is not a pcm wav file
+        """
+        logger.info("detect wav file, converting to wav 16 bit header file")
+        wav_copy_ws = os.path.join(payload_workspace, f"{get_name(audio_path)}_wav_16bit")
+        if not is_directory(wav_copy_ws):
+            make_dir(wav_copy_ws)
+        output_for16 = os.path.join(wav_copy_ws, f"{get_name(audio_path)}_16bit.wav")
+        audio_path = MediaHandler.convert_to_16bit_wav(audio_path, output_for16)
+        info = MediaHandler.wav_info(audio_path)
+        logger.info(f"the audio file information is {info}")
+        
+        # only the first channel of a stereo file is transcribed
+        channel = 0 if info.channels > 1 else None
+        if info.duration < GOOGLE_CONFIG.maximum_duration and channel is None:
+            return iter([AudioChunk(audio_path, 0.0, info.duration)])
+        
+        chunk_duration = GOOGLE_CONFIG.maximum_duration
+        if info.duration >= GOOGLE_CONFIG.maximum_duration:
+            logger.info(f"audio length exceeds maximum limit")
+            chunk_size = info.frame_rate * info.sample_width * chunk_duration
+            if chunk_size >= GOOGLE_CONFIG.maximum_size:
+                chunk_duration = chunk_duration * (GOOGLE_CONFIG.maximum_size / chunk_size)
+        self.current_chunk_duration = chunk_duration
+        chunk_dir = os.path.join(payload_workspace, f"{get_name(audio_path)}_audio_chunks")
+        return MediaHandler.iter_wav_chunks(
+            audio_path, chunk_dir, chunk_duration, GOOGLE_CONFIG.silence_window, channel)
+    
+    def _decoded_chunks(self, audio_path: str, payload_workspace: str) -> List[AudioChunk]:
+        """
+        Decodes the audio file and splits it into chunks that google accepts,
+        used for the formats that cannot be read in blocks
+        """
         # get the info of audio source and preprocess the audio if needed 
         mediaHandler = MediaHandler()
         stream = mediaHandler.read_file(audio_path)
@@ -156,14 +214,9 @@ class GoogleCore:
             self.current_chunk_duration = chunk_duration
             # chunk the file 
             audio_list = MediaHandler.chunk_audio_to_outpath(audio_path, payload_workspace, chunk_duration)
-        else:
-            audio_list = [audio_path]
-            
-        try:
-            return  self._transcribe_list_file(audio_list, payload_workspace)
-        except Exception as e:
-            logger.error(e, exc_info=e)
-            raise EXCEPTION.TranscriptionError(EXCEPTION.ERROR.GOOGLE_TRANSCRIPTION_FAILED)
+            return [AudioChunk(path, idx * chunk_duration, chunk_duration)
+                    for idx, path in enumerate(audio_list)]
+        return [AudioChunk(audio_path, 0.0, audio_duration)]
         
     def _run_engine(self, audio_path: str, workspace) -> cloud_speech.RecognizeResponse:
         """ 
@@ -178,9 +231,6 @@ class GoogleCore:
         """
         logger.info(f"rung google engine on file {audio_path}")
         try:
-            # initialize client
-            client = speech.SpeechClient() 
-            
             # preprocessing the file 
             format = get_extension(audio_path).lower()
             encoding = self.ENCODING_TABLE[format]
@@ -199,8 +249,12 @@ class GoogleCore:
             # transcribe audio file 
             config = speech.RecognitionConfig(**kwargs)
             self.transcribing = True
-            response = client.recognize(config=config, audio=audio)
+            response = self.client.recognize(config=config, audio=audio)
         
+        except TRANSIENT_ERRORS as e:
+            # the dispatcher sends the request again
+            logger.warning(e)
+            raise
         except Exception as e:
             logger.error(e, exc_info=e)
             self.transcribe_error = True
@@ -266,27 +320,29 @@ class GoogleCore:
         self.transcribe_error = False
         self.output_success = False
     
-    def _transcribe_list_file(self, audios: List[str], workspace) -> List[Dict[str, str]]:
-        """transcribe a list of audios and return the utterance result
+    def _transcribe_list_file(self, audios: Iterable[AudioChunk], workspace) -> List[Dict[str, str]]:
+        """transcribe a list of audio chunks and return the utterance result,
+           the chunks are sent concurrently and the results are assembled in
+           the order of the chunks
 
         Args:
-            audios (List[str]): a list of path to audio source
+            audios (Iterable[AudioChunk]): the audio chunks in order
             workspace (str): the path to workspace
 
         Returns:
             List[Dict[str, str]]: a list that represent the utterance result
         """
+        dispatcher = ChunkDispatcher(
+            lambda audio: self._run_engine(audio.path, workspace),
+            max_in_flight=GOOGLE_CONFIG.max_in_flight,
+            max_retries=GOOGLE_CONFIG.max_retries,
+            backoff=GOOGLE_CONFIG.retry_backoff)
         utterances = []
-        offset = 0.0
-        logger.info(audios)
-        for audio in audios:
-            logger.info(f"transcribe {audio} in progress")
-            response = self._run_engine(audio, workspace)
+        for audio, response in dispatcher.run(audios):
             assert response
-            logger.info("geting the response in chunk")
-            new_utt = self._prepare_utterance(response, offset)
+            logger.info(f"geting the response of {audio.path}")
+            new_utt = self._prepare_utterance(response, audio.start)
             utterances.extend(new_utt)
-            offset += self.current_chunk_duration 
         return utterances
     
     @staticmethod
@@ -0,0 +1,104 @@
+import time
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Tuple, Type
+
+from google.api_core import exceptions as api_exceptions
+
+from gailbot.core.utils.logger import makelogger
+from gailbot.core.utils.media import AudioChunk
+
+logger = makelogger("google_dispatcher")
+
+# errors after which the same request may succeed
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.InternalServerError,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.TooManyRequests,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class ChunkDispatcher:
+    """
+    Sends audio chunks to a recognize function with a bounded number of
+    requests in flight, and returns the responses in the order of the chunks.
+    The chunks are taken from the iterable only when a request can be sent,
+    so chunks that are written lazily are not all written at once. A request
+    that fails with a transient error is sent again after an exponential
+    backoff with jitter.
+    """
+    def __init__(
+        self,
+        recognize: Callable[[AudioChunk], Any],
+        max_in_flight: int = 4,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        transient_errors: Tuple[Type[BaseException], ...] = TRANSIENT_ERRORS,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        """
+        Args:
+            recognize (Callable[[AudioChunk], Any]): sends one chunk and
+                returns the response
+            max_in_flight (int): the maximum number of requests sent at once
+            max_retries (int): the number of times a request is sent again
+                after a transient error
+            backoff (float): the delay in seconds before the first retry, the
+                delay doubles after every retry
+            max_backoff (float): the maximum delay before a retry
+            transient_errors (Tuple[Type[BaseException]]): the errors that
+                are retried
+            sleep (Callable[[float], None]): waits for the given seconds
+        """
+        self.recognize = recognize
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.transient_errors = transient_errors
+        self.sleep = sleep
+
+    def run(self, chunks: Iterable[AudioChunk]) -> Iterator[Tuple[AudioChunk, Any]]:
+        """
+        Sends the chunks and yields every chunk with its response in the
+        order of the chunks
+
+        Raises:
+            Exception: the error of the first chunk that cannot be recognized,
+            the requests that are not sent yet are cancelled
+        """
+        chunks = iter(chunks)
+        pending = deque()
+        with ThreadPoolExecutor(self.max_in_flight) as executor:
+            try:
+                for chunk in chunks:
+                    pending.append((chunk, executor.submit(self._recognize_with_retry, chunk)))
+                    if len(pending) == self.max_in_flight:
+                        chunk, future = pending.popleft()
+                        yield chunk, future.result()
+                while pending:
+                    chunk, future = pending.popleft()
+                    yield chunk, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _recognize_with_retry(self, chunk: AudioChunk) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return self.recognize(chunk)
+            except self.transient_errors as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                delay = random.uniform(delay / 2, delay)
+                attempt += 1
+                logger.warning(f"retry {attempt} of {chunk.path} in {delay:.1f}s after {e!r}")
+                self.sleep(delay)
@@ -9,14 +9,12 @@
 """
 import os 
 from typing import List, Any, Dict, Union
-from itertools import chain
 from copy import deepcopy
 # Third party imports
 from ibm_watson import SpeechToTextV1, ApiException
 from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
 from ibm_watson.websocket import RecognizeCallback, AudioSource
 from .recognize_callback import CustomWatsonCallbacks
-from .recognition_results import RecognitionResult
 from gailbot.core.utils.logger import makelogger
 from gailbot.core.engines import exception as EXCEPTION
 from gailbot.configs import watson_config_loader
@@ -26,9 +24,7 @@ from gailbot.core.utils.general import (
     get_name,
     is_file,
     get_size,
-    run_cmd, 
-    get_cmd_status,
-    CMD_STATUS
+    run_cmd_and_wait
 )
 
 WATSON_CONFIG = watson_config_loader()
@@ -164,7 +160,7 @@ class WatsonCore:
             audio_name = get_name(audio_path)
             utterances = self._prepare_utterance(
                 audio_name,
-                recognize_callbacks.get_results())   
+                recognize_callbacks)   
             return utterances   
         except Exception as e: 
             logger.error(e, exc_info=e)
@@ -226,64 +222,25 @@ class WatsonCore:
             logger.info(kwargs)
             stt.recognize_using_websocket(**kwargs)
             
-    def _prepare_utterance(self, audio_name: str,  closure: Dict[str, Any]) -> List:
+    def _prepare_utterance(self, audio_name: str, recognize_callbacks: CustomWatsonCallbacks) -> List:
         """ 
-         output the response data from google STT, convert the raw data to 
-        utterance data which is a list of dictionary in the format 
-        {speaker: , start: , end: , text: }
-        
+        return the utterances that are assembled from the response data of 
+        Watson while it was received, the utterance data is a list of 
+        dictionary in the format {speaker: , start: , end: , text: }
 
         Args:
-            closure (Dict[str, Any]): contains the result data from Watson
+            recognize_callbacks (CustomWatsonCallbacks): the callbacks that 
+                received the result data from Watson
 
         Returns:
             List:  a list of dictionary that contains the output data
         """
         logger.info(f"prepare utterance for audio {audio_name}")
-        utterances = list()
-        # Mapping based on (start time, end time)
-        data = dict()
-        # Aggregated data from recognition results
-        labels = list()
-        timestamps = list()
-        
         # from callback, check that the transcription is successful
-        assert not closure["callback_status"]["on_error"]
-    
-        # Creating RecognitionResults objects
-        for item in closure["results"]["data"]:
-            recognition_result = RecognitionResult(item)
-            if recognition_result.is_configured():
-                labels.extend(recognition_result.get_speaker_labels())
-                timestamps.extend(
-                    recognition_result.get_timestamps_from_alternatives(
-                        only_final=False))
-        timestamps = list(chain(*timestamps))
-       
-        # Creating the mappings
-        for label in labels:  # Label should be a dictionary
-            key = (label["start_time"], label["end_time"])
-            if not key in data:
-                data[key] = {"speaker": label["speaker"]}
-            else:
-                data[key]["speaker"] = label["speaker"]
-        for timestamp in timestamps:
-            key = (timestamp[1], timestamp[2])
-            if key not in data:
-                data[key] = {"utterance": timestamp[0]}
-            else:
-                data[key]["utterance"] = timestamp[0]
-      
-        # Creating utterances
-        for times, value in data.items():
-            utt = {
-                "speaker" : value["speaker"],
-                "start" : times[0],
-                "end" : times[1],
-                "text" : value["utterance"]
-            }
-            utterances.append(utt)
-        return utterances
+        assert not recognize_callbacks.get_results()["callback_status"]["on_error"]
+        assembler = recognize_callbacks.assembler
+        logger.info(f"assembled utterances from {assembler.num_messages} messages")
+        return assembler.utterances()
     
   
     @staticmethod
@@ -335,21 +292,11 @@ class WatsonCore:
         logger.info("Converting file")
         out_path = "{}/{}.opus".format(workspace, get_name(audio_path))
         logger.info(f"Converting path{out_path}")
-        pid = run_cmd(["ffmpeg", "-y", "-i", audio_path, "-strict", "-2", out_path])
-        
-        while True:
-            match get_cmd_status(pid):
-                case CMD_STATUS.STOPPED:
-                    raise ChildProcessError(EXCEPTION.ERROR.CHILD_PROCESS_NOT_FOUND)
-                case CMD_STATUS.FINISHED:
-                    break 
-                case CMD_STATUS.ERROR:
-                    raise ChildProcessError(EXCEPTION.ERROR.CHILD_PROCESS_ERROR)
-                case CMD_STATUS.NOTFOUND:
-                    raise ProcessLookupError(EXCEPTION.ERROR.CHILD_PROCESS_NOT_FOUND)
-        
-        if get_cmd_status(pid) == CMD_STATUS.FINISHED:
-            return out_path
-        else: 
-            return False
+        result = run_cmd_and_wait(["ffmpeg", "-y", "-i", audio_path, "-strict", "-2", out_path])
+        if result.returncode is None:
+            raise ProcessLookupError(EXCEPTION.ERROR.CHILD_PROCESS_NOT_FOUND)
+        if not result.succeeded:
+            logger.error(result.stderr[-1000:])
+            raise ChildProcessError(EXCEPTION.ERROR.CHILD_PROCESS_ERROR)
+        return out_path
     
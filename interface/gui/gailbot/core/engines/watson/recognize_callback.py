@@ -8,9 +8,9 @@ from typing import Callable, Any, List, Dict
 import sys
 # Local imports
 # Third party imports
-from copy import deepcopy
 from ibm_watson.websocket import RecognizeCallback
 from gailbot.core.utils.logger import makelogger
+from .result_assembler import WatsonResultAssembler
 
 logger = makelogger("callback")
 
@@ -35,14 +35,26 @@ class CustomWatsonCallbacks(RecognizeCallback):
                 callback during the lifecycle of the websocket connection.
         """
         self.closure = self._init_closure()
+        self.assembler = WatsonResultAssembler()
 
     def reset(self) -> None:
         logger.info("reset recognize callback")
         self.closure = self._init_closure()
+        self.assembler = WatsonResultAssembler()
 
     def get_results(self) -> Dict:
+        """
+        Return the callback status and the errors, the recognized data is
+        kept by the assembler
+        """
         logger.info("on get result")
-        return deepcopy(self.closure)
+        return self.closure
+
+    def get_partial_utterances(self) -> List[Dict]:
+        """
+        Return the utterances assembled from the data received so far
+        """
+        return self.assembler.partial_utterances()
 
     def on_transcription(self, transcript: List) -> None:
         """
@@ -120,7 +132,7 @@ class CustomWatsonCallbacks(RecognizeCallback):
         try:
             closure = self.closure
             closure["callback_status"]["on_data"] = True
-            closure["results"]["data"].append(data)
+            self.assembler.add(data)
         except Exception as e:
             logger.error(f"on data error {e}", exc_info=e)
 
@@ -150,7 +162,6 @@ class CustomWatsonCallbacks(RecognizeCallback):
                 "results": {
                     "error": None,
                     "transcript": list(),
-                    "hypothesis": list(),
-                    "data": list()
+                    "hypothesis": list()
                 }
             }
@@ -0,0 +1,150 @@
+'''
+    Assembles the utterances of a Watson transcription from the messages of
+    the websocket connection as they arrive, so that only the words and
+    speaker labels are kept instead of every message.
+'''
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Dict, List, Tuple
+
+from gailbot.core.utils.logger import makelogger
+
+logger = makelogger("watson_result_assembler")
+
+# (start time, end time, text or speaker)
+Record = Tuple[float, float, Any]
+
+
+class WatsonResultAssembler:
+    """
+    Converts every message returned by Watson into word and speaker label
+    records, and joins each word with the speaker label of the same start and
+    end time. Both kinds of records are sorted by time and joined with a
+    merge, the records that have no match yet wait for a later message. A
+    word or label that is sent again replaces the earlier one.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        # the times of the assembled utterances in sorted order, and the
+        # utterances in the same order
+        self._times: List[Tuple[float, float]] = list()
+        self._utterances: List[Dict[str, Any]] = list()
+        # the records that have no match yet
+        self._words: List[Record] = list()
+        self._labels: List[Record] = list()
+        self.num_messages = 0
+
+    def add(self, data: Dict) -> None:
+        """add one message returned by Watson
+
+        Args:
+            data (Dict): the unparsed message
+        """
+        words = [
+            (timestamp[1], timestamp[2], timestamp[0])
+            for result in data.get("results") or ()
+            for alternative in result.get("alternatives") or ()
+            for timestamp in alternative.get("timestamps") or ()
+        ]
+        labels = [
+            (label["from"], label["to"], label["speaker"])
+            for label in data.get("speaker_labels") or ()
+        ]
+        with self._lock:
+            self.num_messages += 1
+            if words or labels:
+                self._words.extend(words)
+                self._labels.extend(labels)
+                self._merge()
+
+    def partial_utterances(self) -> List[Dict[str, Any]]:
+        """return a copy of the utterances assembled so far, in the order of
+        their start time
+        """
+        with self._lock:
+            return [dict(utterance) for utterance in self._utterances]
+
+    def utterances(self) -> List[Dict[str, Any]]:
+        """return the assembled utterances in the order of their start time,
+        the utterances are not copied
+
+        Raises:
+            ValueError: if a word has no speaker label
+        """
+        with self._lock:
+            if self._labels:
+                logger.warning(f"{len(self._labels)} speaker labels have no word")
+            if self._words:
+                raise ValueError(f"{len(self._words)} words have no speaker label")
+            return self._utterances
+
+    def reset(self) -> None:
+        with self._lock:
+            self._times.clear()
+            self._utterances.clear()
+            self._words.clear()
+            self._labels.clear()
+            self.num_messages = 0
+
+    ############################### PRIVATE METHODS ##########################
+    def _merge(self) -> None:
+        """join the waiting words and labels, the records without a match are
+        applied to an assembled utterance of the same times, or keep waiting
+        """
+        words = self._latest(self._words)
+        labels = self._latest(self._labels)
+        self._words, self._labels = list(), list()
+        i = j = 0
+        while i < len(words) and j < len(labels):
+            word, label = words[i], labels[j]
+            if word[:2] == label[:2]:
+                self._place(word[0], word[1], word[2], label[2])
+                i += 1
+                j += 1
+            elif word[:2] < label[:2]:
+                self._revise(word, "text", self._words)
+                i += 1
+            else:
+                self._revise(label, "speaker", self._labels)
+                j += 1
+        for word in words[i:]:
+            self._revise(word, "text", self._words)
+        for label in labels[j:]:
+            self._revise(label, "speaker", self._labels)
+
+    @staticmethod
+    def _latest(records: List[Record]) -> List[Record]:
+        """sort the records by time and keep the last record of each time"""
+        records = sorted(records, key=lambda record: record[:2])
+        return [
+            record for k, record in enumerate(records)
+            if k + 1 == len(records) or records[k + 1][:2] != record[:2]
+        ]
+
+    def _find(self, start: float, end: float) -> Tuple[int, bool]:
+        """return the position of the times among the assembled utterances,
+        and whether an utterance with the times exists
+        """
+        times = (start, end)
+        # utterances mostly arrive in order, so check the end first
+        if not self._times or self._times[-1] < times:
+            return len(self._times), False
+        position = bisect_left(self._times, times)
+        return position, self._times[position] == times
+
+    def _place(self, start: float, end: float, text: str, speaker: Any) -> None:
+        position, exists = self._find(start, end)
+        if exists:
+            self._utterances[position].update(speaker=speaker, text=text)
+            return
+        self._times.insert(position, (start, end))
+        self._utterances.insert(
+            position, {"speaker": speaker, "start": start, "end": end, "text": text})
+
+    def _revise(self, record: Record, field: str, waiting: List[Record]) -> None:
+        position, exists = self._find(record[0], record[1])
+        if exists:
+            self._utterances[position][field] = record[2]
+        else:
+            waiting.append(record)
@@ -6,7 +6,6 @@
 
 
 import os
-from threading import Lock
 import json
 from typing import List, Dict, Any
 from dataclasses import asdict
@@ -17,7 +16,8 @@ from gailbot.core.engines.whisperEngine.whisperTimestamped.utils import (
     force_cudnn_initialization
 )
 
-from .diarization.diarize import PyannoteDiarizer
+from .diarization.diarize import get_diarizer
+from .modelRegistry import ModelRegistry, ModelHandle
 from .parsers import (
     parse_into_full_text,
     parse_into_word_dicts,
@@ -35,7 +35,34 @@ from gailbot.core.utils.logger import makelogger
 logger = makelogger("whisper")
 
 WHISPER_CONFIG = whisper_config_loader()
-LOAD_MODEL_LOCK = Lock()
+
+
+def _load_whisper_model(
+    model_name : str, device : str, dtype : str, download_root : str = None
+) -> whisper.Whisper:
+    """ load a whisper model, used by the model registry on a cache miss """
+    model = whisper.load_model(
+        name=model_name,
+        device=device,
+        download_root=download_root
+    )
+    if dtype == "float16":
+        model = model.half()
+    return model
+
+def _free_device_memory(handle : ModelHandle) -> None:
+    if handle.key.device.lower().startswith("cuda"):
+        torch.cuda.empty_cache()
+
+# NOTE: shared by every WhisperCore in the process so that each model is
+#       deserialized once instead of once per transcribed file
+MODEL_REGISTRY = ModelRegistry(
+    loader=_load_whisper_model,
+    max_models=WHISPER_CONFIG.registry_configs.max_resident_models,
+    max_memory_mb=WHISPER_CONFIG.registry_configs.max_memory_mb,
+    on_evict=_free_device_memory,
+    max_replicas=WHISPER_CONFIG.registry_configs.max_replicas
+)
 
 class WhisperCore:
     """
@@ -55,7 +82,6 @@ class WhisperCore:
         logger.info(f"Whisper workspace path: {self.workspace_dir}")
         self.cache_dir = os.path.join(self.workspace_dir,"cache")
         self.models_dir = os.path.join(self.cache_dir,"models")
-        self.loadModelLock = Lock()
         make_dir(self.workspace_dir,overwrite=False)
         make_dir(self.cache_dir,overwrite=False)
         make_dir(self.models_dir,overwrite=False)
@@ -64,6 +90,7 @@ class WhisperCore:
         self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
         if self.device.lower().startswith("cuda"):
             force_cudnn_initialization(self.device)
+        self.dtype = self._get_dtype(self.device)
         logger.info(f"Whisper core initialized with device: {self.device}")
 
 
@@ -86,21 +113,11 @@ class WhisperCore:
     ) -> List[Dict]:
         assert is_file(audio_path), f"ERROR: Invalid file path: {audio_path}"
         
-        # Load the model
+        # Get the shared model, which is only loaded on the first use
         logger.info(f"start to load whisper model")
-        
-        global LOAD_MODEL_LOCK
-        with LOAD_MODEL_LOCK:
-            whisper_model = whisper.load_model(
-                name=WHISPER_CONFIG.model_name,
-                device=self.device,
-                download_root=self.models_dir
-            )
-        logger.info(f"Whisper core using whisper model: {WHISPER_CONFIG.model_name}")
+        model_handle = self.get_model()
+        logger.info(f"Whisper core using whisper model: {model_handle}")
 
-        # Load the diarization pipeline
-        diarization_pipeline = PyannoteDiarizer(self.models_dir)
-        logger.info("get the diarazation pipleine")
         logger.info(f"received setting language: {language}, detect speaker {detect_speaker} audio_path {audio_path}")
          
         if language != None and not language in self.get_supported_languages():
@@ -116,12 +133,13 @@ class WhisperCore:
         audio = whisper.load_audio(audio_path)
         logger.info("audio loaded")
 
-        asr_result = whisper.transcribe(
-            whisper_model,
-            audio,
-            language=language,
-            **asdict(WHISPER_CONFIG.transcribe_configs)
-        )
+        with model_handle as whisper_model:
+            asr_result = whisper.transcribe(
+                whisper_model,
+                audio,
+                language=language,
+                **asdict(WHISPER_CONFIG.transcribe_configs)
+            )
 
         if WHISPER_CONFIG.transcribe_configs.verbose:
             logger.debug(parse_into_full_text(asr_result))
@@ -136,6 +154,8 @@ class WhisperCore:
             logger.info("Performing speaker diarization")
             
             try:
+                # Load the diarization pipeline, shared after the first use
+                diarization_pipeline = get_diarizer(self.models_dir)
                 dir_result = diarization_pipeline(audio_path)
                 # Create and return results
                 res = add_speaker_info_to_text(asr_result, dir_result)
@@ -149,6 +169,32 @@ class WhisperCore:
             logger.info("get the result from parse")
             return res  
 
+    def get_model(self) -> ModelHandle:
+        """
+        Return the handle to the configured whisper model from the process
+        wide model registry, loading the model if it is not resident yet.
+        """
+        return MODEL_REGISTRY.get(
+            WHISPER_CONFIG.model_name,
+            self.device,
+            self.dtype,
+            download_root=self.models_dir
+        )
+
+    @staticmethod
+    def preload() -> bool:
+        """
+        Load the configured whisper model into the model registry ahead of
+        the first transcription.
+        """
+        try:
+            core = WhisperCore()
+            core.get_model()
+            return True
+        except Exception as e:
+            logger.error(f"failed to preload whisper model: {e}", exc_info=e)
+            return False
+
     def get_supported_formats(self) -> List[str]:
         return list(self._SUPPORTED_FORMATS)
 
@@ -160,6 +206,15 @@ class WhisperCore:
 
 
     ################ PRIVATE METHODS
+    @staticmethod
+    def _get_dtype(device : str) -> str:
+        """ half precision weights are only used on gpu, and only when the
+            transcribe configuration does not turn fp16 off
+        """
+        if device.lower().startswith("cuda") and \
+            WHISPER_CONFIG.transcribe_configs.fp16 is not False:
+            return "float16"
+        return "float32"
 
 
 
@@ -3,4 +3,4 @@
 # @Date:   2023-02-07 16:12:46
 # @Last Modified by:   Muhammad Umair
 # @Last Modified time: 2023-02-07 17:42:41
-from .diarize import PyannoteDiarizer
\ No newline at end of file
+from .diarize import PyannoteDiarizer, get_diarizer
\ No newline at end of file
@@ -5,7 +5,8 @@
 # @Last Modified time: 2023-02-07 18:10:38
 
 import os
-from typing import Any
+from threading import Condition, Lock
+from typing import Any, Dict
 from huggingface_hub import hf_hub_download
 from pyannote.audio.core.pipeline import Pipeline
 from gailbot.core.utils.general import (
@@ -13,13 +14,14 @@ from gailbot.core.utils.general import (
     read_yaml,
     write_yaml,
 )
-from gailbot.core.utils.download import is_internet_connected
-from gailbot.configs import whisper_config_loader
+from gailbot.configs import whisper_config_loader, service_config_loader
 from gailbot.core.utils.logger import makelogger
 from gailbot.core.utils.general import is_file
 
 logger = makelogger("pyannote_diarization")
 WHISPER_CONFIG = whisper_config_loader()
+# one pipeline for every transcription thread that can diarize at once
+DEFAULT_POOL_SIZE = service_config_loader().thread.transcriber_num_threads
 
 class PyannoteDiarizer:
     """
@@ -29,53 +31,55 @@ class PyannoteDiarizer:
 
     def __init__(
         self,
-        cache_dir : str
+        cache_dir : str,
+        pool_size : int = DEFAULT_POOL_SIZE
     ):
-
+        """
+        Args:
+            cache_dir (str): path to the directory where models are cached
+            pool_size (int): the largest number of pipelines loaded at once,
+                a pipeline keeps intermediate state while it runs, so each
+                concurrent call needs its own pipeline
+        """
         self.cache_dir = os.path.join(cache_dir,"pyannote")
         make_dir(self.cache_dir,overwrite=False)
+        self.pipeline = None
+        self._config_path = None
+        self._pool_size = max(1, pool_size)
+        self._idle = []
+        self._num_loaded = 0
+        self._pool_cond = Condition()
 
-        if not is_internet_connected():
-            logger.warning("Internet connection not detected...")
-
-        # Download the model
-        model_path = hf_hub_download(
+        # Resolve the model, downloaded only if it is not cached yet
+        model_path = self._resolve_file(
             repo_id = WHISPER_CONFIG.diarization_configs.HF_diarization_model_repo_id,
-            filename = WHISPER_CONFIG.diarization_configs.model_filename,
-            token = WHISPER_CONFIG.diarization_configs.HF_auth_token,
-            cache_dir=self.cache_dir
+            filename = WHISPER_CONFIG.diarization_configs.model_filename
         )
         logger.info(f"Using diarization model from path: {model_path}")
 
-        config_path =  hf_hub_download(
+        config_path = self._resolve_file(
             repo_id = WHISPER_CONFIG.diarization_configs.HF_diarization_config_repo_id,
-            filename = WHISPER_CONFIG.diarization_configs.config_filename,
-            token = WHISPER_CONFIG.diarization_configs.HF_auth_token,
-            cache_dir=self.cache_dir,
-            repo_type="model" #TODO: check if the type is model
+            filename = WHISPER_CONFIG.diarization_configs.config_filename
         )
         logger.info(f"Using diarizaton configuration from path: {config_path}")
        
         # copy path for configuration  
         config_path_copy = config_path + "copy"
         
-        # Read the config and update the model path
-        config = read_yaml(config_path)
-        logger.info(f"the read configurarin is {config}")
-        
-        try:
-            config["pipeline"]["params"]["segmentation"] = model_path
-        except Exception as e:
-            logger.error(e, exc_info=e)
-    
         try:
             if not is_file(config_path_copy):
+                # Read the config and update the model path
+                config = read_yaml(config_path)
+                logger.info(f"the read configurarin is {config}")
+                config["pipeline"]["params"]["segmentation"] = model_path
                 write_yaml(config_path_copy, config, overwrite=True)
-            logger.info("configuration output")
             logger.info("ready to pretrained data")
+            self._config_path = config_path_copy
             self.pipeline = Pipeline.from_pretrained(
                 config_path_copy
             )
+            self._idle.append(self.pipeline)
+            self._num_loaded = 1
             logger.info("after running from_pretrained")
         except Exception as e:
             logger.error(f"output config error: {e}", exc_info=e)
@@ -95,5 +99,77 @@ class PyannoteDiarizer:
             Pipeline containing the diarization for the given audio file.
         """
         logger.info("get the diariazation")
-        return self.pipeline(audio_path)
+        if self.pipeline is None:
+            raise ValueError("diarization pipeline is not loaded")
+        pipeline = self._acquire()
+        try:
+            return pipeline(audio_path)
+        finally:
+            with self._pool_cond:
+                self._idle.append(pipeline)
+                self._pool_cond.notify()
 
+    def _acquire(self) -> Any:
+        """
+        Return an idle pipeline, another pipeline is loaded when every loaded
+        pipeline is in use and the pool is not full, otherwise wait for a
+        pipeline to become idle
+        """
+        with self._pool_cond:
+            while not self._idle:
+                if self._num_loaded < self._pool_size:
+                    self._num_loaded += 1
+                    break
+                self._pool_cond.wait()
+            else:
+                return self._idle.pop()
+        try:
+            logger.info("load another diarization pipeline")
+            return Pipeline.from_pretrained(self._config_path)
+        except Exception:
+            with self._pool_cond:
+                self._num_loaded -= 1
+                self._pool_cond.notify()
+            raise
+
+    def _resolve_file(self, repo_id : str, filename : str) -> str:
+        """
+        Return the local path of a file from the hugging face hub, the file
+        is read from the cache without a network request when it has been
+        downloaded before.
+        """
+        kwargs = dict(
+            repo_id = repo_id,
+            filename = filename,
+            token = WHISPER_CONFIG.diarization_configs.HF_auth_token,
+            cache_dir = self.cache_dir,
+            repo_type = "model"
+        )
+        try:
+            return hf_hub_download(local_files_only=True, **kwargs)
+        except Exception:
+            logger.info(f"{repo_id}/{filename} is not cached, downloading")
+            return hf_hub_download(**kwargs)
+
+
+_DIARIZERS : Dict[str, PyannoteDiarizer] = dict()
+_DIARIZERS_LOCK = Lock()
+
+def get_diarizer(cache_dir : str) -> PyannoteDiarizer:
+    """
+    Return the diarizer for the given cache directory, the diarizer is
+    created on the first call and reused by every later call.
+
+    Args:
+        cache_dir (str): path to the directory where models are cached
+
+    Returns:
+        PyannoteDiarizer: the shared diarizer
+    """
+    with _DIARIZERS_LOCK:
+        if cache_dir not in _DIARIZERS:
+            diarizer = PyannoteDiarizer(cache_dir)
+            if diarizer.pipeline is None:
+                return diarizer
+            _DIARIZERS[cache_dir] = diarizer
+        return _DIARIZERS[cache_dir]
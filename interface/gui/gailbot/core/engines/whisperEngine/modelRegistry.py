@@ -0,0 +1,361 @@
+import copy
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Condition, Lock, local
+from typing import Any, Callable, Dict, List
+
+from gailbot.core.utils.logger import makelogger
+
+logger = makelogger("model_registry")
+
+_MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ModelKey:
+    """ identifies one resident model """
+    model_name : str
+    device : str
+    dtype : str
+
+
+class ModelHandle:
+    """
+    A shared reference to a model that is resident in the registry.
+    The model is ready to use once the handle is returned. Entering the
+    handle as a context manager gives exclusive use of one replica of the
+    model, since the transcriber attaches hooks to the model for the whole
+    decoding and two decodings cannot share them.
+
+    Up to max_replicas copies of the model are made when several callers
+    use it at once, callers beyond that wait for a replica to be free. Each
+    replica uses as much memory as the model, so one replica keeps the
+    memory low but decodes one file at a time, and more replicas decode
+    files in parallel for more memory. A replica is only made once reserve
+    allows it, otherwise the caller waits for a replica to be free.
+    """
+    def __init__(
+        self,
+        key: ModelKey,
+        model: Any,
+        nbytes: int,
+        max_replicas: int = 1,
+        replicate: Callable[[Any], Any] = copy.deepcopy,
+        reserve: Callable[["ModelHandle"], bool] = None
+    ) -> None:
+        """
+        Args:
+            replicate (Callable): returns a new copy of the model
+            reserve (Callable, optional): called with the handle before a
+                replica is made, returns true once add_replica has counted
+                the replica, or false if there is no room for it
+        """
+        self.key = key
+        self.model = model
+        self.nbytes = nbytes
+        self.max_replicas = max(1, max_replicas)
+        self.replicate = replicate
+        self.reserve = reserve or (lambda handle: handle.add_replica())
+        self.last_used = time.time()
+        self._idle: List[Any] = [model]
+        self._num_replicas = 1
+        self._num_users = 0
+        self._cond = Condition()
+        # the replicas entered by each thread, released in reverse order
+        self._entered = local()
+
+    def __repr__(self) -> str:
+        return (f"model handle {self.key.model_name} on {self.key.device} "
+                f"({self.key.dtype}, {self.nbytes / _MB:.1f} MB)")
+
+    def __enter__(self) -> Any:
+        model = self._acquire()
+        if model is None:
+            try:
+                logger.info(f"making replica {self.num_replicas} of {self}")
+                model = self.replicate(self.model)
+            except Exception:
+                with self._cond:
+                    self._num_replicas -= 1
+                    self._num_users -= 1
+                    self._cond.notify()
+                raise
+        self._entered.__dict__.setdefault("models", []).append(model)
+        self.last_used = time.time()
+        return model
+
+    def __exit__(self, *exc) -> None:
+        model = self._entered.models.pop()
+        self.last_used = time.time()
+        with self._cond:
+            self._idle.append(model)
+            self._num_users -= 1
+            self._cond.notify()
+
+    def add_replica(self) -> bool:
+        """ count one more replica if there are fewer than max_replicas,
+            return true if it is counted
+        """
+        with self._cond:
+            if self._num_replicas >= self.max_replicas:
+                return False
+            self._num_replicas += 1
+            return True
+
+    def _acquire(self) -> Any:
+        """ take a free replica, or return None once a new replica is
+            counted and has to be made by the caller
+        """
+        while True:
+            with self._cond:
+                if self._idle:
+                    self._num_users += 1
+                    return self._idle.pop()
+                if self._num_replicas >= self.max_replicas:
+                    self._cond.wait()
+                    continue
+            # reserve is called without the lock of the handle, since the
+            # registry reads the handle while it holds its own lock
+            if self.reserve(self):
+                with self._cond:
+                    self._num_users += 1
+                return None
+            with self._cond:
+                while not self._idle:
+                    self._cond.wait()
+
+    @property
+    def in_use(self) -> bool:
+        """ return true if a caller is currently using the model """
+        with self._cond:
+            return self._num_users > 0
+
+    @property
+    def num_replicas(self) -> int:
+        """ the number of copies of the model that are loaded """
+        with self._cond:
+            return self._num_replicas
+
+    @property
+    def resident_nbytes(self) -> int:
+        """ the memory used by every replica of the model """
+        return self.nbytes * self.num_replicas
+
+
+def model_nbytes(model: Any) -> int:
+    """ estimate the memory used by the parameters and buffers of a torch
+        module, return 0 for objects that are not torch modules
+    """
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads each model once and hands out shared
+    handles to it. Resident models are kept in least recently used order
+    and evicted once the number of models or their total memory exceeds
+    the configured bounds. Models that are in use are never evicted.
+    """
+    def __init__(
+        self,
+        loader : Callable[..., Any],
+        max_models : int = 2,
+        max_memory_mb : float = None,
+        sizeof : Callable[[Any], int] = model_nbytes,
+        on_evict : Callable[[ModelHandle], None] = None,
+        max_replicas : int = 1
+    ) -> None:
+        """
+        Args:
+            loader (Callable): function called with the model name, device,
+                dtype and any additional loading keyword arguments that
+                returns a loaded model
+            max_models (int): the maximum number of resident models
+            max_memory_mb (float, optional): the maximum memory that resident
+                models may use, unbounded if None
+            sizeof (Callable): function that returns the size of a model
+                in bytes
+            on_evict (Callable, optional): called with each evicted handle
+            max_replicas (int): the maximum number of copies of each model
+                that are used at once, see ModelHandle
+        """
+        self.loader = loader
+        self.max_models = max(1, max_models)
+        self.max_bytes = max_memory_mb * _MB if max_memory_mb else None
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.max_replicas = max(1, max_replicas)
+        self._models : "OrderedDict[ModelKey, ModelHandle]" = OrderedDict()
+        self._load_locks : Dict[ModelKey, Lock] = dict()
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "load_time_sec": 0.0}
+
+    def get(
+        self,
+        model_name : str,
+        device : str,
+        dtype : str = "float32",
+        **load_kwargs
+    ) -> ModelHandle:
+        """ return the handle to the model identified by model_name, device
+            and dtype, the model is loaded if it is not resident yet
+
+        Args:
+            model_name (str): the name of the model
+            device (str): the device that the model is loaded on
+            dtype (str, optional): the data type of the model weights
+            load_kwargs: additional keyword arguments passed to the loader
+
+        Returns:
+            ModelHandle: a shared handle to the loaded model
+        """
+        key = ModelKey(model_name, device, dtype)
+        handle = self._lookup(key)
+        if handle:
+            return handle
+
+        # only one thread loads a given model, others wait for that load
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, Lock())
+        with load_lock:
+            handle = self._lookup(key, count=False)
+            if handle:
+                return handle
+            logger.info(f"loading model {key}")
+            start = time.time()
+            model = self.loader(model_name, device, dtype, **load_kwargs)
+            elapsed = time.time() - start
+            # replicas are loaded again rather than copied, since a copy of
+            # a model in use would also copy the hooks of its decoding
+            handle = ModelHandle(
+                key, model, self.sizeof(model), self.max_replicas,
+                replicate=lambda _: self.loader(model_name, device, dtype, **load_kwargs),
+                reserve=self._reserve_replica)
+            logger.info(f"loaded {handle} in {elapsed:.2f} seconds")
+            with self._lock:
+                self._models[key] = handle
+                self._stats["load_time_sec"] += elapsed
+                self._evict_if_needed(protect=key)
+            return handle
+
+    def preload(self, model_name : str, device : str, dtype : str = "float32", **load_kwargs) -> bool:
+        """ load the model ahead of time so that the first transcription
+            does not pay for the loading
+
+        Returns:
+            bool: return true if the model is resident
+        """
+        try:
+            self.get(model_name, device, dtype, **load_kwargs)
+            return True
+        except Exception as e:
+            logger.error(f"failed to preload model {model_name}: {e}", exc_info=e)
+            return False
+
+    def is_loaded(self, model_name : str, device : str, dtype : str = "float32") -> bool:
+        """ return true if the model is currently resident """
+        with self._lock:
+            return ModelKey(model_name, device, dtype) in self._models
+
+    def loaded_models(self) -> List[ModelKey]:
+        """ return the keys of resident models, least recently used first """
+        with self._lock:
+            return list(self._models.keys())
+
+    def evict(self, model_name : str, device : str, dtype : str = "float32") -> bool:
+        """ remove a model from the registry, return true if it was resident """
+        with self._lock:
+            handle = self._models.pop(ModelKey(model_name, device, dtype), None)
+        if handle:
+            self._release(handle)
+        return handle is not None
+
+    def clear(self) -> None:
+        """ remove all models from the registry """
+        with self._lock:
+            handles = list(self._models.values())
+            self._models.clear()
+        for handle in handles:
+            self._release(handle)
+
+    @property
+    def resident_bytes(self) -> int:
+        """ the total memory used by resident models """
+        with self._lock:
+            return sum(h.resident_nbytes for h in self._models.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """ return the hit, miss and eviction counts of the registry """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["resident_models"] = len(self._models)
+            stats["resident_mb"] = sum(h.resident_nbytes for h in self._models.values()) / _MB
+        return stats
+
+    ################ PRIVATE METHODS
+    def _lookup(self, key : ModelKey, count : bool = True) -> ModelHandle:
+        with self._lock:
+            handle = self._models.get(key)
+            if handle:
+                self._models.move_to_end(key)
+            if count:
+                self._stats["hits" if handle else "misses"] += 1
+            return handle
+
+    def _reserve_replica(self, handle : ModelHandle) -> bool:
+        """ count a new replica of the model if it fits in the memory bound,
+            idle models are evicted to make room for it
+        """
+        with self._lock:
+            if self.max_bytes is not None:
+                self._evict_if_needed(protect=handle.key, extra_bytes=handle.nbytes)
+                resident = sum(h.resident_nbytes for h in self._models.values())
+                if resident + handle.nbytes > self.max_bytes:
+                    logger.info(f"no memory for another replica of {handle}, waiting for a free one")
+                    return False
+            return handle.add_replica()
+
+    def _evict_if_needed(self, protect : ModelKey, extra_bytes : int = 0) -> None:
+        """ evict least recently used models until the registry is within
+            its bounds, must be called while holding the registry lock
+
+        Args:
+            protect (ModelKey): the model that is not evicted
+            extra_bytes (int): memory that is about to be used in addition
+                to the resident models
+        """
+        def over_budget() -> bool:
+            if len(self._models) > self.max_models:
+                return True
+            if self.max_bytes is None:
+                return False
+            resident = sum(h.resident_nbytes for h in self._models.values())
+            return resident + extra_bytes > self.max_bytes
+
+        while over_budget():
+            victim = next(
+                (k for k, h in self._models.items() if k != protect and not h.in_use),
+                None
+            )
+            if victim is None:
+                # a replica that does not fit is not made, so only a loaded
+                # model can exceed the bounds
+                if not extra_bytes:
+                    logger.warning("model registry exceeds its bounds but every model is in use")
+                return
+            handle = self._models.pop(victim)
+            self._stats["evictions"] += 1
+            logger.info(f"evicting {handle}")
+            self._release(handle)
+
+    def _release(self, handle : ModelHandle) -> None:
+        if self.on_evict:
+            try:
+                self.on_evict(handle)
+            except Exception as e:
+                logger.error(e, exc_info=e)
@@ -10,6 +10,7 @@ import json
 from typing import Dict, List, Any, Tuple
 from pyannote.core import Segment
 from gailbot.core.utils.logger import makelogger
+from .speakerAssigner import SpeakerAssigner
 _DEFAULT_SPEAKER = 0
 logger = makelogger("parsers")
 def parse_into_word_dicts(transcription : Dict) -> List[Dict]:
@@ -73,8 +74,11 @@ def add_speaker_info_to_text(asr_res : Dict, dir_res : Dict) -> Dict:
     logger.info("adding speaker tag into the result")
     spk_text = []
     timestamp_texts = parse_into_timestamped_text(asr_res)
-    for seg, text in timestamp_texts:
-        spk = dir_res.crop(seg).argmax()
+    speakers = SpeakerAssigner(dir_res).assign(
+        [seg.start for seg, _ in timestamp_texts],
+        [seg.end for seg, _ in timestamp_texts]
+    )
+    for (seg, text), spk in zip(timestamp_texts, speakers):
         spk_text.append({
             "start" : seg.start,
             "end" : seg.end,
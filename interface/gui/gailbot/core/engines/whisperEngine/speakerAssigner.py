@@ -0,0 +1,93 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from pyannote.core import Annotation
+
+from gailbot.core.utils.logger import makelogger
+
+logger = makelogger("speaker_assigner")
+
+# pyannote treats segments shorter than this as empty
+_PRECISION = 1e-6
+
+
+class SpeakerAssigner:
+    """
+    Assigns a speaker to each word using a speaker diarization result.
+    The diarization turns are sorted once into a per speaker interval index,
+    after which the overlap between every word and every speaker is computed
+    with vectorized prefix sums. The word gets the speaker with the largest
+    overlap, which matches Annotation.crop(word).argmax().
+    """
+    def __init__(self, diarization : Annotation) -> None:
+        """
+        Args:
+            diarization (Annotation): the speaker diarization result
+        """
+        turns : Dict[Any, List] = dict()
+        for segment, _, label in diarization.itertracks(yield_label=True):
+            turns.setdefault(label, []).append((segment.start, segment.end))
+        # ties are broken in the same order as Annotation.labels
+        self.labels = sorted(turns.keys(), key=str)
+        self._index = [self._merge(turns[label]) for label in self.labels]
+
+    def assign(self, starts : Sequence[float], ends : Sequence[float]) -> List[Any]:
+        """ given the start and end time of each word, return the speaker
+            label of each word, or None if no speaker talks during the word
+
+        Args:
+            starts (Sequence[float]): the start time of each word
+            ends (Sequence[float]): the end time of each word
+
+        Returns:
+            List[Any]: the speaker label of each word
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        if not self.labels or not len(starts):
+            return [None] * len(starts)
+
+        overlaps = np.stack(
+            [self._overlap(index, starts, ends) for index in self._index])
+        best = overlaps.argmax(axis=0)
+        found = (overlaps[best, np.arange(len(starts))] > _PRECISION) & \
+                (ends - starts > _PRECISION)
+        return [self.labels[b] if f else None for b, f in zip(best, found)]
+
+    ################ PRIVATE METHODS
+    @staticmethod
+    def _merge(intervals : List) -> Dict[str, np.ndarray]:
+        """ merge the overlapping turns of one speaker so that the turns are
+            disjoint and sorted, and precompute their cumulative duration
+        """
+        intervals = np.array(sorted(intervals), dtype=np.float64)
+        merged_starts, merged_ends = [intervals[0, 0]], [intervals[0, 1]]
+        for start, end in intervals[1:]:
+            if start <= merged_ends[-1]:
+                merged_ends[-1] = max(merged_ends[-1], end)
+            else:
+                merged_starts.append(start)
+                merged_ends.append(end)
+        merged_starts = np.array(merged_starts)
+        merged_ends = np.array(merged_ends)
+        cumulative = np.concatenate(([0.0], np.cumsum(merged_ends - merged_starts)))
+        return {"starts": merged_starts, "ends": merged_ends, "cumulative": cumulative}
+
+    @staticmethod
+    def _overlap(
+        index : Dict[str, np.ndarray], starts : np.ndarray, ends : np.ndarray
+    ) -> np.ndarray:
+        """ return the total overlap between each word and the turns of one
+            speaker, the turns that overlap a word are the contiguous range
+            [first, last), only the first and the last of them can be clipped
+        """
+        turn_starts, turn_ends = index["starts"], index["ends"]
+        first = np.searchsorted(turn_ends, starts, side="right")
+        last = np.searchsorted(turn_starts, ends, side="left")
+        has_turn = last > first
+        first_c = np.minimum(first, len(turn_starts) - 1)
+        last_c = np.maximum(last - 1, 0)
+        total = index["cumulative"][last] - index["cumulative"][np.minimum(first, last)]
+        total -= np.maximum(0.0, starts - turn_starts[first_c]) * has_turn
+        total -= np.maximum(0.0, turn_ends[last_c] - ends) * has_turn
+        return np.where(has_turn, total, 0.0)
@@ -69,6 +69,18 @@ class WhisperEngine(Engine):
 
     #### Additional methods
 
+    @staticmethod
+    def get_model_name() -> str:
+        """ return the name of the configured whisper model """
+        return WHISPER_CONFIG.model_name
+
+    @staticmethod
+    def preload() -> bool:
+        """ load the whisper model into the shared model registry so that
+            the first transcription does not wait for it
+        """
+        return WhisperCore.preload()
+
     def get_available_models(self) -> List[str]:
         """return the list of available model
         """
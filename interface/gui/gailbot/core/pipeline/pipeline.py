@@ -5,6 +5,8 @@
 # @Last Modified time: 2023-01-15 16:04:52
 from typing import List, Dict, Any
 from dataclasses import dataclass
+from threading import Lock, Event
+from concurrent.futures import Future, Executor
 
 from .component import Component, ComponentState, ComponentResult
 from gailbot.core.utils.threads import ThreadPool
@@ -26,17 +28,22 @@ class Pipeline:
         self,
         dependency_map : Dict[str, List[str]],
         components : Dict[str, Component],
-        num_threads: int 
+        num_threads: int,
+        executor: Executor = None
     ):
         """
         Dependency map describes the execution order.
+        Components run on a threadpool with num_threads threads, unless an
+        executor is given, in which case components and their results must
+        be picklable if the executor runs them in other processes.
         """
         self.dependency_map = dependency_map
         self.components = components
-        self.threadpool = ThreadPool(num_threads)
+        self.threadpool = executor if executor else ThreadPool(num_threads)
         self._generate_dependency_graph(
             dependency_map, components
         )
+        self._generate_schedule()
     
     def __repr__(self) -> str:
         """
@@ -60,6 +67,8 @@ class Pipeline:
         Execute the pipeline by running all components in order of the dependency
         graph. This wraps data as DataStream before passing it b/w components.
         Additionally, each component receives the output of its dependencies. 
+        A component is submitted to the threadpool as soon as all of its
+        dependencies finish, and is skipped if any of them failed.
 
         Args:
             base_input: 
@@ -76,82 +85,80 @@ class Pipeline:
         Note: 
             each component is contained in a Component class
         """
-        successors = self.get_dependency_graph()
-        logger.info(successors) 
-        logger.info(self.dependency_graph)
-        logger.info(self.components)
-        
+        logger.info(self.dependency_map)
+
+        # state of this run, kept local so that a pipeline can be run by
+        # several threads at the same time
         name_to_results : Dict[str, ComponentResult] = dict()   # map component name to result
-       
-        while True:
-            # executables is a list of Component who currently has no dependent node 
-            executables: List[Component] = [
-                c for c, d in self.dependency_graph.in_degree if d == 0
-            ]
-            
-            # exit the loop if no nodes left.
-            if len(executables) == 0:
-                break
-            
-            for executable in executables:
-                threadkey_to_exe: Dict[str, Component] = dict()       # map thread key to executable
-                exe_name: str = self.component_to_name[executable]
-                dependency_resolved = True
-                
-                # check the result output of exe_name's dependency component 
-                if len(successors[exe_name]) > 0:
+        remaining_deps = dict(self._num_dependencies)
+        lock = Lock()
+        finished = Event()
+
+        def complete(name : str, result : ComponentResult) -> None:
+            """ record the result of a component and dispatch every
+                dependent whose dependencies are now all finished
+            """
+            with lock:
+                name_to_results[name] = result
+                ready = []
+                for child in self._dependents[name]:
+                    remaining_deps[child] -= 1
+                    if remaining_deps[child] == 0:
+                        ready.append(child)
+                if len(name_to_results) == len(self._num_dependencies):
+                    finished.set()
+            for child in ready:
+                dispatch(child)
+
+        def on_done(name : str, future : Future) -> None:
+            try:
+                exe_res = future.result()
+            except Exception as e:
+                logger.error(f"component {name} raised an exception {e}", exc_info=e)
+                exe_res = None
+            if exe_res and exe_res.state == ComponentState.SUCCESS:
+                complete(name, exe_res)
+            else:
+                complete(name, Failure)
+
+        def dispatch(name : str) -> None:
+            # check the result output of the component's dependencies
+            if self._dependencies[name]:
+                with lock:
                     dep_outputs : Dict[str, ComponentResult] = {
-                        k : name_to_results[k] for k in successors[exe_name]
+                        k : name_to_results[k] for k in self._dependencies[name]
                     }
-                else:
-                    dep_outputs = {
-                        "base" : ComponentResult(
-                            state=ComponentState.SUCCESS,
-                            result=base_input,
-                            runtime=0
-                        )
-                    }
-                    
-                for res in dep_outputs.values():
-                    if res.state == ComponentState.FAILED:
-                        name_to_results[exe_name] = Failure
-                        if self.dependency_graph.has_node(executable):
-                            self.dependency_graph.remove_node(executable)
-                        dependency_resolved = False
- 
-                args = [dep_outputs]          
-                              
-                if dependency_resolved:                    
-                    key = self.threadpool.add_task(
-                        executable, 
-                        args = args, 
-                        kwargs = additional_component_kwargs) 
-                    logger.info(f" the component {executable} get the thread key {key}")
-                    threadkey_to_exe[key] = executable           
-
-            # wait until all tasks finishes before next iteration
-            # self.threadpool.wait_for_all_completion(error_fun=lambda:None)
-            
-            for key, exe in threadkey_to_exe.items():
-                # get the task result from the thread pool
-                logger.info(key)
-                logger.info(exe)
-                exe_res = self.threadpool.get_task_result(key)
-                self.dependency_graph.remove_node(exe)
-                name = self.component_to_name[exe]
-               
-                if exe_res and exe_res.state == ComponentState.SUCCESS:
-                    # add to result if success
-                    name_to_results[name] = exe_res
-                else:
-                    # add the failed result on failure
-                    name_to_results[name] = Failure
-        
-                 
-        # Regenerate graph
-        self._generate_dependency_graph(
-            self.dependency_map, self.components
-        )
+            else:
+                dep_outputs = {
+                    "base" : ComponentResult(
+                        state=ComponentState.SUCCESS,
+                        result=base_input,
+                        runtime=0
+                    )
+                }
+
+            if any(res.state == ComponentState.FAILED for res in dep_outputs.values()):
+                complete(name, Failure)
+                return
+
+            executable = self.name_to_component[name]
+            # dispatch also runs in the callback of a finished component,
+            # where an exception would be lost and the pipeline never finish
+            try:
+                future = self.threadpool.submit(
+                    executable, dep_outputs, **additional_component_kwargs)
+            except Exception as e:
+                logger.error(f"failed to dispatch the component {name} {e}", exc_info=e)
+                complete(name, Failure)
+                return
+            logger.info(f" the component {name} is dispatched")
+            future.add_done_callback(lambda f: on_done(name, f))
+
+        if not self._num_dependencies:
+            return dict()
+        for name in self._roots:
+            dispatch(name)
+        finished.wait()
 
         return {
             k : v.state for k, v in name_to_results.items()
@@ -229,6 +236,29 @@ class Pipeline:
     # PRIVATE METHODS
     ####
 
+    def _generate_schedule(self) -> None:
+        """
+        Precomputes the dependencies and dependents of each component, the
+        number of dependencies that have to finish before a component can run
+        and the components without any dependency.
+        """
+        self._dependencies : Dict[str, List[str]] = {
+            name : list(dict.fromkeys(deps))
+            for name, deps in self.dependency_map.items()
+        }
+        self._dependents : Dict[str, List[str]] = {
+            name : list() for name in self.dependency_map
+        }
+        for name, deps in self._dependencies.items():
+            for dep in deps:
+                self._dependents[dep].append(name)
+        self._num_dependencies : Dict[str, int] = {
+            name : len(deps) for name, deps in self._dependencies.items()
+        }
+        self._roots : List[str] = [
+            name for name, count in self._num_dependencies.items() if count == 0
+        ]
+
     def _does_cycle_exist(self, graph: nx.Graph) -> bool:
         """
         Determines if there are existing cycles in the given graph.
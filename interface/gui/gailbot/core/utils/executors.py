@@ -0,0 +1,131 @@
+import pickle
+import importlib
+import multiprocessing
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from .threads import TaskPool, ThreadPool, TaskCreateError
+from gailbot.core.utils.logger import makelogger
+
+logger = makelogger("executors")
+
+
+class Backend:
+    thread = "thread"
+    process = "process"
+
+
+@dataclass
+class TaskEnvelope:
+    """
+    A picklable description of a task that can be sent to a worker process.
+    The function is identified by its import path instead of being pickled,
+    so that functions from modules loaded at runtime can also be used.
+
+    Args:
+        target (str): the function in the form of "package.module:function"
+        args (Tuple): the positional arguments of the function
+        kwargs (Dict): the keyword arguments of the function
+    """
+    target : str
+    args : Tuple = ()
+    kwargs : Dict[str, Any] = field(default_factory=dict)
+
+    def __call__(self) -> Any:
+        return resolve(self.target)(*self.args, **self.kwargs)
+
+
+def resolve(target : str) -> Callable:
+    """ given a path in the form of "package.module:function", import the
+        module and return the function
+    """
+    module_name, _, function_name = target.partition(":")
+    obj = importlib.import_module(module_name)
+    for attr in function_name.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def run_envelope(envelope : TaskEnvelope) -> Any:
+    """ run the task described by the envelope, called in the worker """
+    return envelope()
+
+
+# state that lives as long as the worker process, used to keep loaded models
+# and imported plugin modules across tasks
+_WORKER_STATE : Dict[str, Any] = dict()
+
+def get_worker_state() -> Dict[str, Any]:
+    """ return the dictionary that stores the warm state of the current
+        worker process, in the main process the state is shared by all threads
+    """
+    return _WORKER_STATE
+
+def _init_worker(initializers : List[str]) -> None:
+    for initializer in initializers:
+        try:
+            resolve(initializer)()
+        except Exception as e:
+            logger.error(f"failed to run worker initializer {initializer}: {e}", exc_info=e)
+
+
+class ProcessPool(TaskPool, ProcessPoolExecutor):
+    """
+    Process pool with the same task interface as ThreadPool. Tasks and their
+    results are pickled, so TaskEnvelope should be used for functions that
+    cannot be pickled by reference. Workers are started with spawn, which
+    is safe to use with threads and with gpu libraries in the parent.
+    """
+    def __init__(self, max_workers : int, initializers : List[str] = []) -> None:
+        """
+        Args:
+            max_workers (int): the number of worker processes
+            initializers (List[str], optional): import paths of functions run
+                once in each worker when it starts, used to warm the worker
+        """
+        super().__init__(
+            max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(list(initializers),)
+        )
+        self._init_task_pool(max_workers)
+
+    def submit(self, fn : Callable, *args, **kwargs):
+        if isinstance(fn, TaskEnvelope):
+            assert not args and not kwargs, "arguments belong in the envelope"
+            fn, args = run_envelope, (fn,)
+        try:
+            pickle.dumps((fn, args, kwargs))
+        except Exception as e:
+            raise TaskCreateError(f"task cannot be sent to a worker process: {e}")
+        return super().submit(fn, *args, **kwargs)
+
+    def is_busy(self) -> bool:
+        return self.count_waiting_tasks() != 0
+
+    def count_waiting_tasks(self) -> int:
+        return sum(1 for future in self.task_pool.values()
+                   if not future.running() and not future.done())
+
+
+def make_executor(
+    backend : str, max_workers : int, initializers : List[str] = []
+) -> Executor:
+    """ create the executor for the given backend
+
+    Args:
+        backend (str): either "thread" or "process"
+        max_workers (int): the number of workers
+        initializers (List[str], optional): functions run in each worker
+            process when it starts, not used by the thread backend
+
+    Returns:
+        Executor: ThreadPool or ProcessPool
+    """
+    if backend == Backend.process:
+        return ProcessPool(max_workers, initializers)
+    if backend != Backend.thread:
+        raise ValueError(f"unknown executor backend: {backend}")
+    return ThreadPool(max_workers)
@@ -4,7 +4,9 @@
 # @Last Modified by:   Muhammad Umair
 # @Last Modified time: 2023-01-16 14:39:45
 from enum import Enum 
-from typing import List, Dict
+from dataclasses import dataclass
+from threading import BoundedSemaphore, Lock
+from typing import List, Dict, Union
 import psutil
 import os
 import glob
@@ -19,6 +21,12 @@ import yaml
 import toml
 import csv
 
+try:
+    import fcntl
+except ImportError:
+    # reflinks are only supported on linux
+    fcntl = None
+
 logger = makelogger("general")
 
 class CMD_STATUS(Enum):
@@ -238,7 +246,119 @@ def copy(src_path, tgt_path : str) -> str:
     except Exception as e:
         logger.error(e)
         return False
-    
+
+
+class STAGE_METHOD(Enum):
+    HARDLINK = 0
+    REFLINK = 1
+    COPY = 2
+
+@dataclass
+class StagedFile:
+    """ a file staged by stage_file, the staged file shares its data with
+        the source unless it was copied, bytes_written is the number of bytes
+        of file data written to stage it
+    """
+    path : str
+    source : str
+    method : STAGE_METHOD
+    bytes_written : int = 0
+
+    @property
+    def shared(self) -> bool:
+        return self.method != STAGE_METHOD.COPY
+
+# the ioctl request that clones the data of a file, see ioctl_ficlone(2)
+_FICLONE = 0x40049409
+_STAGE_CHUNK = 8 * 1024 * 1024
+
+def _reflink(src_path : str, tgt_path : str) -> bool:
+    """ clone the source to the target on file systems that support it """
+    if fcntl is None:
+        return False
+    try:
+        with open(src_path, "rb") as src, open(tgt_path, "wb") as tgt:
+            fcntl.ioctl(tgt.fileno(), _FICLONE, src.fileno())
+        shutil.copymode(src_path, tgt_path)
+        return True
+    except OSError:
+        Path(tgt_path).unlink(missing_ok=True)
+        return False
+
+def _chunked_copy(src_path : str, tgt_path : str) -> int:
+    """ copy the source to the target in chunks, return the bytes written """
+    written = 0
+    with open(src_path, "rb") as src, open(tgt_path, "wb") as tgt:
+        while chunk := src.read(_STAGE_CHUNK):
+            written += tgt.write(chunk)
+    shutil.copymode(src_path, tgt_path)
+    return written
+
+def stage_file(src_path : str, tgt_path : str,
+               hardlink : bool = True) -> Union[StagedFile, bool]:
+    """
+    make the source file available at the target path without copying its
+    data when possible, the target is a hard link to the source if both are
+    on the same file system, a reflink if the file system supports cloning,
+    and a copy otherwise. A hard link is the source file itself and must be
+    treated as read only, so it is only used for temporary files, a reflink
+    is copied on write by the file system
+
+    Args:
+        src_path (str): the path to the source file
+        tgt_path (str): the path to the staged file, replaced if it exists
+        hardlink (bool): whether the target can be a hard link to the source,
+                         false for files that are given to the user
+
+    Returns:
+        Union[StagedFile, bool]: the staged file, false if it is not staged
+    """
+    try:
+        if not is_file(src_path):
+            logger.error("not a valid file path")
+            return False
+        if os.path.lexists(tgt_path):
+            if os.path.samefile(src_path, tgt_path):
+                if hardlink:
+                    return StagedFile(tgt_path, src_path, STAGE_METHOD.HARDLINK)
+                if os.path.abspath(src_path) == os.path.abspath(tgt_path):
+                    logger.error("the source cannot be staged to itself")
+                    return False
+            os.remove(tgt_path)
+        if hardlink:
+            try:
+                os.link(src_path, tgt_path)
+                return StagedFile(tgt_path, src_path, STAGE_METHOD.HARDLINK)
+            except OSError:
+                pass
+        if _reflink(src_path, tgt_path):
+            return StagedFile(tgt_path, src_path, STAGE_METHOD.REFLINK)
+        written = _chunked_copy(src_path, tgt_path)
+        return StagedFile(tgt_path, src_path, STAGE_METHOD.COPY, written)
+    except Exception as e:
+        logger.error(e, exc_info=e)
+        return False
+
+def stage_dir(src_path : str, tgt_path : str,
+              hardlink : bool = True) -> Union[List[StagedFile], bool]:
+    """ stage every file in the source directory recursively to the target
+        directory with stage_file
+
+    Returns:
+        Union[List[StagedFile], bool]: the staged files, false if any file
+        is not staged
+    """
+    staged = []
+    for root, _, files in os.walk(src_path):
+        tgt_root = os.path.join(tgt_path, os.path.relpath(root, src_path))
+        os.makedirs(tgt_root, exist_ok=True)
+        for filename in files:
+            result = stage_file(os.path.join(root, filename),
+                                os.path.join(tgt_root, filename), hardlink)
+            if not result:
+                return False
+            staged.append(result)
+    return staged
 
 def rename(src_path, new_name : str) -> str:
     """ rename the file in the source path to the new name """
@@ -419,12 +539,96 @@ def run_cmd(
         the process id that can be used to identify the process the command 
         runs on 
     """
+    # output is discarded since nothing reads it, a full pipe would block
+    # the command
     process = subprocess.Popen(
-        cmd, stdout = subprocess.PIPE, stderr= subprocess.PIPE)
+        cmd, stdout = subprocess.DEVNULL, stderr= subprocess.DEVNULL)
     
     pid = process.pid
     return pid
 
+@dataclass
+class CmdResult:
+    """ the outcome of a command run by run_cmd_and_wait, returncode is
+        None if the command could not be started
+    """
+    returncode : int
+    stdout : str = ""
+    stderr : str = ""
+    timed_out : bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+# maximum number of commands of the same program that run at the same time
+_CMD_CONCURRENCY = {"ffmpeg": max(1, os.cpu_count() or 1)}
+_CMD_SEMAPHORES : Dict[str, BoundedSemaphore] = dict()
+_CMD_SEMAPHORES_LOCK = Lock()
+
+def set_cmd_concurrency(program : str, limit : int) -> None:
+    """
+    Set the maximum number of commands of the given program that
+    run_cmd_and_wait runs at the same time, commands above the limit wait
+    for a running one to finish
+
+    Args:
+        program (str): the name of the program, i.e. the first item of the command
+        limit (int): the maximum number of concurrent commands
+    """
+    with _CMD_SEMAPHORES_LOCK:
+        _CMD_CONCURRENCY[program] = max(1, limit)
+        _CMD_SEMAPHORES.pop(program, None)
+
+def _get_cmd_semaphore(program : str) -> BoundedSemaphore:
+    with _CMD_SEMAPHORES_LOCK:
+        if program not in _CMD_CONCURRENCY:
+            return None
+        if program not in _CMD_SEMAPHORES:
+            _CMD_SEMAPHORES[program] = BoundedSemaphore(_CMD_CONCURRENCY[program])
+        return _CMD_SEMAPHORES[program]
+
+def run_cmd_and_wait(
+    cmd : List[str],
+    timeout : float = None
+) -> CmdResult:
+    """
+    Run the command and block until it finishes, without polling. The
+    output of the command is read while it runs, so verbose commands cannot
+    fill up the pipe and stall.
+    
+    Args:
+        cmd: List[str]
+            A list of string that stores the command 
+        timeout: float, optional
+            the number of seconds after which the command is killed, the
+            time spent waiting for a concurrency slot is not included
+    
+    Return:
+        CmdResult that stores the return code and the output of the command
+    """
+    semaphore = _get_cmd_semaphore(os.path.basename(cmd[0]))
+    if semaphore:
+        semaphore.acquire()
+    try:
+        process = subprocess.Popen(
+            cmd, stdout = subprocess.PIPE, stderr= subprocess.PIPE, 
+            stdin = subprocess.DEVNULL, text = True, errors = "replace")
+        try:
+            stdout, stderr = process.communicate(timeout = timeout)
+            return CmdResult(process.returncode, stdout, stderr)
+        except subprocess.TimeoutExpired:
+            logger.error(f"command {cmd} timed out after {timeout} seconds")
+            process.kill()
+            stdout, stderr = process.communicate()
+            return CmdResult(process.returncode, stdout, stderr, timed_out = True)
+    except OSError as e:
+        logger.error(f"failed to run command {cmd}: {e}", exc_info=e)
+        return CmdResult(returncode = None, stderr = str(e))
+    finally:
+        if semaphore:
+            semaphore.release()
+
 def get_cmd_status(identifier : int) -> CMD_STATUS:
     """
     Obtain the status of the shell command associated with this identifier
@@ -442,7 +646,7 @@ def get_cmd_status(identifier : int) -> CMD_STATUS:
         match status:
             case "zombie":
                 return CMD_STATUS.FINISHED 
-            case "running":
+            case "running" | "sleeping" | "disk-sleep":
                 return CMD_STATUS.RUNNING
             case "stopped":
                 return CMD_STATUS.RUNNING
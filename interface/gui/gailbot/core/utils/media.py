@@ -4,19 +4,19 @@
 # @Last Modified by:   Muhammad Umair
 # @Last Modified time: 2023-01-16 14:33:08
 
-from typing import List, Union, Dict
+from typing import Iterator, List, Union, Dict
 import os
+import wave
+import numpy as np
 from dataclasses import dataclass
 from abc import ABC 
 from .general import (
     get_extension,
     get_name,
     make_dir, 
-    run_cmd,
-    get_cmd_status,
+    run_cmd_and_wait,
     is_directory, 
-    paths_in_dir,
-    CMD_STATUS
+    paths_in_dir
 )
 from gailbot.core.utils.logger import makelogger 
 from pydub import AudioSegment
@@ -66,6 +66,34 @@ class VideoStream(Stream):
     def __repr__(self):
         return f"video stream {self.name}\n"
 
+@dataclass
+class WavInfo:
+    """ the format of a wav file, read from its header """
+    channels : int
+    sample_width : int
+    frame_rate : int
+    num_frames : int
+
+    @property
+    def duration(self) -> float:
+        return self.num_frames / self.frame_rate
+
+    @property
+    def frame_width(self) -> int:
+        return self.channels * self.sample_width
+
+@dataclass
+class AudioChunk:
+    """ a chunk of an audio file, start and duration are in seconds """
+    path : str
+    start : float
+    duration : float
+
+# number of frames read from a wav file at a time
+_WAV_BLOCK_FRAMES = 1 << 16
+# length in seconds of the windows compared when looking for silence
+_SILENCE_WINDOW_S = 0.01
+
 class AudioHandler:
     """ Implement a class that contains functions to handle audio file 
 
@@ -374,19 +402,10 @@ class AudioHandler:
 
     @staticmethod
     def convert_to_16bit_wav(input_path, output_path):
-        pid = run_cmd(["ffmpeg", "-i", input_path, "-acodec", "pcm_s16le", "-ar", "16000", output_path])
-        while True:
-            match get_cmd_status(pid):
-                case CMD_STATUS.STOPPED:
-                    logger.error("process was stopped when converting the audio file to 16bit_wav format")
-                    break
-                case CMD_STATUS.FINISHED:
-                    return output_path
-                case CMD_STATUS.ERROR:
-                    logger.error("error in converting the audio file to 16bit_wav format")
-                    break
-                case CMD_STATUS.NOTFOUND:
-                    break
+        result = run_cmd_and_wait(["ffmpeg", "-i", input_path, "-acodec", "pcm_s16le", "-ar", "16000", output_path])
+        if result.succeeded:
+            return output_path
+        logger.error(f"error in converting the audio file to 16bit_wav format: {result.stderr[-1000:]}")
         logger.warn("cannot convert the file to 16bit_wav file format, use original file instead")
         return input_path
     
@@ -411,23 +430,13 @@ class AudioHandler:
         logger.info("Converting file")
         out_path = "{}/{}.opus".format(output_dir, get_name(audio_path))
         logger.info(f"Converting path{out_path}")
-        pid = run_cmd(["ffmpeg", "-y", "-i", audio_path, "-strict", "-2", out_path])
-        
-        while True:
-            match get_cmd_status(pid):
-                case CMD_STATUS.STOPPED:
-                    raise ChildProcessError("ERROR: child process error")
-                case CMD_STATUS.FINISHED:
-                    break 
-                case CMD_STATUS.ERROR:
-                    raise ChildProcessError("ERROR: child process error")
-                case CMD_STATUS.NOTFOUND:
-                    raise ProcessLookupError("ERROR: process lookup error")
-        
-        if get_cmd_status(pid) == CMD_STATUS.FINISHED:
-            return out_path
-        else: 
-            return False
+        result = run_cmd_and_wait(["ffmpeg", "-y", "-i", audio_path, "-strict", "-2", out_path])
+        if result.returncode is None:
+            raise ProcessLookupError("ERROR: process lookup error")
+        if not result.succeeded:
+            logger.error(result.stderr[-1000:])
+            raise ChildProcessError("ERROR: child process error")
+        return out_path
     
     @staticmethod 
     def chunk_audio_to_outpath(audio_path:str, output_path:str, chunk_duration:int) -> List[str]:
@@ -468,6 +477,124 @@ class AudioHandler:
             
             return audio_chunks
 
+    @staticmethod
+    def wav_info(path : str) -> WavInfo:
+        """ return the format of the wav file without reading its frames
+
+        Raises:
+            wave.Error: raised when the file is not a pcm wav file
+        """
+        with wave.open(path, "rb") as f:
+            return WavInfo(f.getnchannels(), f.getsampwidth(),
+                           f.getframerate(), f.getnframes())
+
+    @staticmethod
+    def iter_wav_chunks(
+        audio_path : str,
+        output_dir : str,
+        chunk_duration : float,
+        silence_window : float = 0,
+        channel : int = None
+    ) -> Iterator[AudioChunk]:
+        """ split a wav file into chunks that are written to the output
+            directory one at a time, the file is read in blocks so the memory
+            used does not depend on the length of the audio
+
+        Args:
+            audio_path (str): the path to the wav file
+            output_dir (str): the directory where the chunks are written
+            chunk_duration (float): the maximum length of a chunk in seconds
+            silence_window (float): if positive, every cut is moved to the
+                quietest point in this many seconds before it
+            channel (int, optional): only keep this channel, all channels are
+                kept if None
+
+        Yields:
+            AudioChunk: the chunks in order
+        """
+        info = AudioHandler.wav_info(audio_path)
+        make_dir(output_dir)
+        basename = get_name(audio_path)
+        chunk_frames = max(1, int(chunk_duration * info.frame_rate))
+        window_frames = int(silence_window * info.frame_rate)
+        with wave.open(audio_path, "rb") as src:
+            start, idx = 0, 0
+            while start < info.num_frames:
+                end = min(start + chunk_frames, info.num_frames)
+                if window_frames and end < info.num_frames:
+                    end = AudioHandler._quietest_frame(
+                        src, info, max(start + 1, end - window_frames), end, channel)
+                path = os.path.join(output_dir, f"{basename}-{idx}.wav")
+                written = AudioHandler._write_wav_frames(src, info, path, start, end, channel)
+                yield AudioChunk(path, start / info.frame_rate, written / info.frame_rate)
+                if written < end - start:
+                    # the header claims more frames than the file has
+                    return
+                start, idx = end, idx + 1
+
+    @staticmethod
+    def _write_wav_frames(
+        src : wave.Wave_read, info : WavInfo, path : str, start : int, end : int, channel : int
+    ) -> int:
+        """ copy the frames in [start, end) to a new wav file in blocks,
+            return the number of frames written
+        """
+        written = 0
+        with wave.open(path, "wb") as out:
+            out.setnchannels(1 if channel is not None else info.channels)
+            out.setsampwidth(info.sample_width)
+            out.setframerate(info.frame_rate)
+            src.setpos(start)
+            while written < end - start:
+                block = src.readframes(min(end - start - written, _WAV_BLOCK_FRAMES))
+                if not block:
+                    break
+                out.writeframes(AudioHandler._select_channel(block, info, channel))
+                written += len(block) // info.frame_width
+        return written
+
+    @staticmethod
+    def _select_channel(block : bytes, info : WavInfo, channel : int) -> bytes:
+        if channel is None or info.channels == 1:
+            return block
+        frames = np.frombuffer(block, dtype=np.uint8).reshape(
+            -1, info.channels, info.sample_width)
+        return frames[:, channel, :].tobytes()
+
+    @staticmethod
+    def _quietest_frame(
+        src : wave.Wave_read, info : WavInfo, lo : int, hi : int, channel : int
+    ) -> int:
+        """ return the frame in [lo, hi] in the middle of the quietest window,
+            the latest one if several windows are equally quiet
+        """
+        src.setpos(lo)
+        samples = AudioHandler._to_samples(
+            AudioHandler._select_channel(src.readframes(hi - lo), info, channel),
+            info.sample_width)
+        width = max(1, int(_SILENCE_WINDOW_S * info.frame_rate))
+        channels = 1 if channel is not None else info.channels
+        frames = len(samples) // channels
+        num_windows = frames // width
+        if num_windows == 0:
+            return hi
+        windows = samples[:num_windows * width * channels].reshape(num_windows, -1)
+        energy = np.mean(windows * windows, axis=1)
+        quietest = num_windows - 1 - int(np.argmin(energy[::-1]))
+        return lo + quietest * width + width // 2
+
+    @staticmethod
+    def _to_samples(data : bytes, sample_width : int) -> np.ndarray:
+        """ convert pcm data to float samples """
+        if sample_width == 1:
+            return np.frombuffer(data, dtype=np.uint8).astype(np.float64) - 128
+        if sample_width == 3:
+            raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+            return np.where(values >= 1 << 23, values - (1 << 24), values).astype(np.float64)
+        dtype = {2: np.int16, 4: np.int32}[sample_width]
+        return np.frombuffer(data, dtype=dtype).astype(np.float64)
+
 
     def overlay_audios(self, audios: List[str], output_path: str, name = MERGED_FILE_NAME):
         res = self.read_file(audios[0])
@@ -856,6 +983,25 @@ class MediaHandler:
                                     chunked audios in order 
         """
         return AudioHandler.chunk_audio_to_outpath(input_path, output_path, duration)
+
+    @staticmethod
+    def wav_info(path : str) -> WavInfo:
+        """ return the format of the wav file without reading its frames """
+        return AudioHandler.wav_info(path)
+
+    @staticmethod
+    def iter_wav_chunks(
+        audio_path : str,
+        output_dir : str,
+        chunk_duration : float,
+        silence_window : float = 0,
+        channel : int = None
+    ) -> Iterator[AudioChunk]:
+        """ split a wav file into chunks without reading the whole file,
+            see AudioHandler.iter_wav_chunks
+        """
+        return AudioHandler.iter_wav_chunks(
+            audio_path, output_dir, chunk_duration, silence_window, channel)
     
     
     @staticmethod 
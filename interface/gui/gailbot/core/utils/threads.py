@@ -54,31 +54,18 @@ class Status:
     cancelled = "CANCELLED"
     error = "ERROR"
 
-class ThreadPool(ThreadPoolExecutor):
+class TaskPool:
     """
-    Implement a threadpool that is able to run tasks parallel on different 
-    threads, support functions to query tasks status, return task result and 
-    add callback task to previous task   
-    
-    Inheritance:
-    ThreadPoolExecutor 
-    
+    Keeps track of the tasks submitted to an executor by key, support 
+    functions to query tasks status, return task result and add callback 
+    task to previous task. Used together with an executor class that 
+    provides submit, such as ThreadPoolExecutor or ProcessPoolExecutor
     """
-    def __init__(self, max_workers: int, *args, **kwargs) -> None:
-        """ 
-        Constructs a threadpool with the given size that is able to run tasks on different 
-            threads.
-
-        Args:
-            max_workers (int):  the maximum number of tasks that will be run 
-                                at the same time parallel
-        """
-        super().__init__(max_workers, *args, **kwargs)
+    def _init_task_pool(self, max_workers: int) -> None:
         self.num_thread = max_workers              
         self.task_pool: Dict[Any, Future] = dict() # used to keeps track of the task status
         self.next_key = 0                          # next available key
 
-
     def get_num_threads(self) -> int:
         """
         Returns the number of threads available in the thread pool.
@@ -435,4 +422,26 @@ class ThreadPool(ThreadPoolExecutor):
         """
         if not key in self.task_pool:
             raise TaskNotFoundException(key)
+
+
+class ThreadPool(TaskPool, ThreadPoolExecutor):
+    """
+    Implement a threadpool that is able to run tasks parallel on different 
+    threads, support functions to query tasks status, return task result and 
+    add callback task to previous task   
     
+    Inheritance:
+    ThreadPoolExecutor 
+    
+    """
+    def __init__(self, max_workers: int, *args, **kwargs) -> None:
+        """ 
+        Constructs a threadpool with the given size that is able to run tasks on different 
+            threads.
+
+        Args:
+            max_workers (int):  the maximum number of tasks that will be run 
+                                at the same time parallel
+        """
+        super().__init__(max_workers, *args, **kwargs)
+        self._init_task_pool(max_workers)
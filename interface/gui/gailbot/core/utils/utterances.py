@@ -0,0 +1,193 @@
+from typing import Any, Dict, Iterator, List, Sequence, Union
+
+import numpy as np
+
+# the fields of an utterance dictionary, in the order used by the engines
+FIELDS = ("start", "end", "text", "speaker")
+
+
+class UtteranceTable:
+    """
+    Columnar storage of the utterances of one file. The start and end times
+    are float arrays, the speakers are stored once and referred to by an id
+    array, and the text of every utterance is kept in one string with an
+    offset array. Slicing by position or by time returns a view that shares
+    the arrays and the text with the table it was taken from.
+    """
+    def __init__(
+        self,
+        start : np.ndarray,
+        end : np.ndarray,
+        speaker_ids : np.ndarray,
+        speakers : List[Any],
+        text : str,
+        text_offsets : np.ndarray,
+        fields : Sequence[str] = FIELDS
+    ) -> None:
+        """
+        Args:
+            start (np.ndarray): the start time of each utterance
+            end (np.ndarray): the end time of each utterance
+            speaker_ids (np.ndarray): the index of the speaker of each
+                utterance in speakers
+            speakers (List[Any]): the distinct speaker labels
+            text (str): the text of all utterances, one after another
+            text_offsets (np.ndarray): the text of utterance i is
+                text[text_offsets[i]:text_offsets[i + 1]]
+            fields (Sequence[str]): the order of the fields in the
+                dictionary view
+        """
+        assert len(start) == len(end) == len(speaker_ids) == len(text_offsets) - 1
+        self.start = start
+        self.end = end
+        self.speaker_ids = speaker_ids
+        self.speakers = speakers
+        self.fields = tuple(fields)
+        self._text = text
+        self._offsets = text_offsets
+        self._sorted = None
+
+    @classmethod
+    def from_dicts(cls, utterances : List[Dict[str, Any]]) -> "UtteranceTable":
+        """ given a list of utterance dictionaries with the start, end,
+            speaker and text of each utterance, return the table
+
+        Raises:
+            ValueError: raised when any utterance has other fields or misses
+            a field, since such utterances cannot be stored in the table
+        """
+        num = len(utterances)
+        fields = tuple(utterances[0].keys()) if num else FIELDS
+        expected = set(FIELDS)
+        for utt in utterances:
+            if utt.keys() != expected:
+                raise ValueError(f"utterances with the fields {tuple(utt.keys())} are not supported")
+        start = np.fromiter((utt["start"] for utt in utterances), np.float64, num)
+        end = np.fromiter((utt["end"] for utt in utterances), np.float64, num)
+        vocab : Dict[Any, int] = dict()
+        speaker_ids = np.fromiter(
+            (vocab.setdefault(utt["speaker"], len(vocab)) for utt in utterances),
+            np.int32, num)
+        texts = [str(utt["text"]) for utt in utterances]
+        offsets = np.zeros(num + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, texts), np.int64, num), out=offsets[1:])
+        return cls(start, end, speaker_ids, list(vocab), "".join(texts), offsets, fields)
+
+    @classmethod
+    def empty(cls) -> "UtteranceTable":
+        return cls.from_dicts([])
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def __getitem__(self, index : Union[int, slice]) -> Union[Dict[str, Any], "UtteranceTable"]:
+        """ return the utterance dictionary at an index, or the table of the
+            utterances in a slice, a slice without a step is a view
+        """
+        if isinstance(index, slice):
+            lo, hi, step = index.indices(len(self))
+            if step != 1:
+                return self.take(np.arange(lo, hi, step))
+            return self._view(lo, max(lo, hi))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("utterance index out of range")
+        return self._record(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self._record(i)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # a view only keeps the text of its own utterances when pickled
+        state = self.__dict__.copy()
+        first, last = int(self._offsets[0]), int(self._offsets[-1])
+        state["_text"] = self._text[first:last]
+        state["_offsets"] = self._offsets - first
+        return state
+
+    @property
+    def durations(self) -> np.ndarray:
+        return self.end - self.start
+
+    @property
+    def speaker_labels(self) -> np.ndarray:
+        """ return the speaker of every utterance """
+        labels = np.empty(len(self.speakers), dtype=object)
+        labels[:] = self.speakers
+        return labels[self.speaker_ids]
+
+    @property
+    def texts(self) -> List[str]:
+        offsets = self._offsets.tolist()
+        return [self._text[a:b] for a, b in zip(offsets, offsets[1:])]
+
+    @property
+    def nbytes(self) -> int:
+        """ return the approximate memory used by the table """
+        return (self.start.nbytes + self.end.nbytes + self.speaker_ids.nbytes
+                + self._offsets.nbytes + int(self._offsets[-1] - self._offsets[0]))
+
+    def text(self, index : int) -> str:
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    def is_sorted(self) -> bool:
+        """ return true if the utterances are ordered by start time """
+        if self._sorted is None:
+            self._sorted = bool(np.all(self.start[1:] >= self.start[:-1]))
+        return self._sorted
+
+    def between(self, start : float, end : float) -> "UtteranceTable":
+        """ return the utterances that start in [start, end), the result is
+            a view if the utterances are ordered by start time
+        """
+        if self.is_sorted():
+            lo, hi = np.searchsorted(self.start, [start, end], side="left")
+            return self._view(int(lo), int(hi))
+        return self.take(np.flatnonzero((self.start >= start) & (self.start < end)))
+
+    def take(self, indices : Sequence[int]) -> "UtteranceTable":
+        """ return a new table with the utterances at the indices """
+        indices = np.asarray(indices, dtype=np.int64)
+        texts = self.texts
+        selected = [texts[i] for i in indices.tolist()]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, selected), np.int64, len(selected)), out=offsets[1:])
+        return UtteranceTable(
+            self.start[indices], self.end[indices], self.speaker_ids[indices],
+            self.speakers, "".join(selected), offsets, self.fields)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """ return the utterances as a list of dictionaries """
+        columns = {
+            "start": self.start.tolist(),
+            "end": self.end.tolist(),
+            "text": self.texts,
+            "speaker": [self.speakers[i] for i in self.speaker_ids.tolist()]
+        }
+        return [dict(zip(self.fields, values))
+                for values in zip(*(columns[field] for field in self.fields))]
+
+    def to_objects(self, cls : type) -> List[Any]:
+        """ return the utterances as objects of a class that takes the start,
+            end, speaker and text as keyword arguments, such as UttObj
+        """
+        return [cls(**utt) for utt in self.to_dicts()]
+
+    ################ PRIVATE METHODS
+    def _view(self, lo : int, hi : int) -> "UtteranceTable":
+        view = UtteranceTable(
+            self.start[lo:hi], self.end[lo:hi], self.speaker_ids[lo:hi],
+            self.speakers, self._text, self._offsets[lo:hi + 1], self.fields)
+        view._sorted = self._sorted
+        return view
+
+    def _record(self, index : int) -> Dict[str, Any]:
+        values = {
+            "start": float(self.start[index]),
+            "end": float(self.end[index]),
+            "text": self.text(index),
+            "speaker": self.speakers[self.speaker_ids[index]]
+        }
+        return {field: values[field] for field in self.fields}
@@ -1,3 +1,5 @@
 from .directoryloader import PluginDirectoryLoader, PluginTOMLLoader
 from .urlloader import PluginURLLoader
-from .pluginLoader import PluginLoader
\ No newline at end of file
+from .pluginLoader import PluginLoader
+from .s3sync import S3SuiteSync
+from .suitecache import SuiteCache
@@ -1,9 +1,11 @@
 import os
 import pip
+from threading import Lock, get_ident
 from cryptography.fernet import Fernet
 from typing import Dict, List, Union, TypedDict, Tuple
 from dataclasses import dataclass
 from .pluginLoader import PluginLoader
+from .suitecache import SuiteCache
 from ..suite import PluginSuite
 from gailbot.core.utils.logger import makelogger
 from gailbot.core.utils.general import (
@@ -62,6 +64,7 @@ class PluginDirectoryLoader(PluginLoader):
     def __init__(
         self,
         suites_dir: str,
+        cache: SuiteCache = None,
     ):
         """initialize a plugin directory loader
 
@@ -69,8 +72,19 @@ class PluginDirectoryLoader(PluginLoader):
             suites_dir (str): the path to the directory that stores all the
                               copies of plugins will be stored and managed
                               by plugin manager
+            cache (SuiteCache, optional): the fingerprints of the loaded
+                              suites, a suite that did not change since it
+                              was last loaded is not installed, copied or
+                              imported again; every suite is loaded in full
+                              if None
         """
         self.suites_dir = suites_dir
+        # new copies of the suites are made here and moved into the suites
+        # directory once they are complete
+        self.staging_dir = os.path.join(os.path.dirname(suites_dir), "staging")
+        # held while a copy is swapped in, when the suite directory is missing
+        self.swap_lock = Lock()
+        self.cache = cache
         self.toml_loader = PluginTOMLLoader()
 
     def load(self, suite_dir_path: str) -> Union[PluginSuite, bool]:
@@ -117,32 +131,98 @@ class PluginDirectoryLoader(PluginLoader):
         if not config or not document or not format:
             return False
 
+        # a suite that is unchanged since it was last loaded has its
+        # packages installed and its copy in place already
+        fingerprint = self.cache.fingerprint(suite_dir_path)[0] if self.cache else None
+        unchanged = self._is_unchanged(suite_dir_name, tgt_path, fingerprint)
+
         # download required package
         try:
-            if requirement:
+            if requirement and not unchanged:
                 self.download_packages(requirement, PROJECT_ROOT)
         except Exception as e:
             logger.error(f"failed to download package", exc_info=e)
             return False
 
-        # make a copy of the original plugin suite
-        if not is_directory(tgt_path):
-            copy(suite_dir_path, tgt_path)
-
-        if is_directory(tgt_path) and self.suites_dir not in suite_dir_path:
-            delete(tgt_path)
-            copy(suite_dir_path, tgt_path)
+        # make a copy of the original plugin suite, the copy that may be in
+        # use is replaced only once the new copy is complete
+        previous = None
+        if not is_directory(tgt_path) or (
+            self.suites_dir not in suite_dir_path and not unchanged
+        ):
+            previous = self._swap_in_copy(suite_dir_path, tgt_path)
+            if previous is False:
+                return False
 
-        suite = self.toml_loader.load(config, suite_dir_name, self.suites_dir)
+        # the plugins of an unchanged suite are imported on first use
+        try:
+            suite = self.toml_loader.load(
+                config, suite_dir_name, self.suites_dir, lazy=unchanged
+            )
+        except Exception as e:
+            logger.error(f"failed to load {suite_dir_name}", exc_info=e)
+            suite = False
 
         if suite:
             # validate
             if self.validate_official(official):
                 suite.set_to_official_suite()
+            if self.cache and not unchanged:
+                self.cache.record(
+                    suite_dir_name, tgt_path, *self.cache.fingerprint(tgt_path)
+                )
+            if previous:
+                delete(previous)
             return [suite]
         else:
             delete(tgt_path)
+            # the suite keeps its copy from before if the new one is invalid
+            if previous:
+                with self.swap_lock:
+                    os.replace(previous, tgt_path)
+            if self.cache:
+                self.cache.forget(suite_dir_name)
+            return False
+
+    def _swap_in_copy(self, suite_dir_path: str, tgt_path: str) -> Union[str, bool]:
+        """copy the suite to the staging directory and move the complete copy
+        to the target path, the copy that was at the target path is moved
+        to the staging directory
+
+        Returns:
+            Union[str, bool]: the path to the copy that was replaced, None if
+                              there was no copy, false if the suite cannot
+                              be copied
+        """
+        os.makedirs(self.staging_dir, exist_ok=True)
+        staged_name = f"{get_name(tgt_path)}.{os.getpid()}.{get_ident()}"
+        staged = os.path.join(self.staging_dir, f"{staged_name}.new")
+        previous = os.path.join(self.staging_dir, f"{staged_name}.old")
+        for path in (staged, previous):
+            if is_directory(path):
+                delete(path)
+        if not copy(suite_dir_path, staged):
+            logger.error(f"failed to copy {suite_dir_path}")
+            delete(staged)
+            return False
+        with self.swap_lock:
+            if not is_directory(tgt_path):
+                os.replace(staged, tgt_path)
+                return None
+            os.replace(tgt_path, previous)
+            os.replace(staged, tgt_path)
+        return previous
+
+    def _is_unchanged(self, suite_name: str, tgt_path: str, fingerprint: str) -> bool:
+        """return true if both the source and the copy of the suite match the
+        fingerprint of the suite when it was last loaded
+        """
+        if not fingerprint or not self.cache.is_unchanged(suite_name, fingerprint):
             return False
+        if not is_directory(tgt_path):
+            return False
+        tgt_fingerprint, _ = self.cache.fingerprint(tgt_path)
+        return tgt_fingerprint == fingerprint
 
     def download_packages(self, req_file, dest):
         """download packages listed under req_file to dest
@@ -190,7 +270,7 @@ class PluginTOMLLoader(PluginLoader):
         self.dict_config_loader = PluginDictLoader()
 
     def load(
-        self, conf_path: str, suite_name: str, suites_directory: str
+        self, conf_path: str, suite_name: str, suites_directory: str, lazy: bool = False
     ) -> PluginSuite:
         """given the path to configuration file of one plugin suite, and
              the suites directory that stores all plugin suites ,
@@ -200,6 +280,8 @@ class PluginTOMLLoader(PluginLoader):
             conf_path (str): a path to the configuration file
             suites_directory (str): a path to the directory that contain
                                     all plugin suites
+            lazy (bool): if true, the plugin modules are imported when the
+                         plugins are first applied
 
         Returns:
             PluginSuite:
@@ -209,7 +291,7 @@ class PluginTOMLLoader(PluginLoader):
         validated, conf = PluginTOMLLoader.validate_config(conf_path, suite_name)
         if validated:
             conf.update({"path": get_parent_path(conf_path)})
-            return self.dict_config_loader.load(conf, suites_directory)
+            return self.dict_config_loader.load(conf, suites_directory, lazy)
         else:
             logger.error(f"Error: {conf}")
             return False
@@ -253,10 +335,12 @@ class PluginDictLoader(PluginLoader):
     of all plugin dependencies and sources
     """
 
-    def load(self, dict_conf: Dict, suites_directory: str) -> PluginSuite:
+    def load(
+        self, dict_conf: Dict, suites_directory: str, lazy: bool = False
+    ) -> PluginSuite:
         if not type(dict_conf) == dict:
             return ""
-        suite = PluginSuite(dict_conf, suites_directory)
+        suite = PluginSuite(dict_conf, suites_directory, lazy)
         if suite.is_ready:
             return suite
         else:
@@ -0,0 +1,198 @@
+import os
+import hashlib
+from threading import Lock
+from zipfile import ZipFile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Union
+
+from gailbot.core.utils.logger import makelogger
+from gailbot.core.utils.general import (
+    read_json,
+    write_json,
+    read_toml,
+    is_file,
+    is_directory,
+    make_dir,
+    delete,
+)
+from gailbot.configs import PLUGIN_CONFIG
+
+logger = makelogger("s3_suite_sync")
+
+MANIFEST_NAME = "suite_manifest.json"
+
+
+class S3SuiteSync:
+    """
+    Keeps local copies of the plugin suites that are stored as zip files in
+    an s3 bucket. The ETag and last modified time of every zip are recorded
+    in a manifest, and a sync only downloads the zips that changed since the
+    last sync, in parallel. When the bucket cannot be reached nothing is
+    downloaded and the copies from the last sync stay in use.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        workspace: str,
+        suites_dir: str,
+        client: Any = None,
+        max_workers: int = 4,
+    ) -> None:
+        """
+        Args:
+            bucket (str): the name of the bucket
+            workspace (str): the directory of the manifest, the zips are
+                             downloaded to a sub directory
+            suites_dir (str): the directory of the registered suites
+            client (Any, optional): the s3 client, a client for the
+                                    official bucket is created on first use
+                                    if None
+            max_workers (int): the maximum number of parallel downloads
+        """
+        self.bucket = bucket
+        self.suites_dir = suites_dir
+        self.download_dir = os.path.join(workspace, "s3_sync")
+        self.manifest_path = os.path.join(workspace, MANIFEST_NAME)
+        self.max_workers = max(1, max_workers)
+        self._client = client
+        self._lock = Lock()
+        self.manifest: Dict[str, Dict] = self._read_manifest()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import boto3
+            from botocore.config import Config
+            from .urlloader import official_credentials
+
+            aws_id, aws_api_key = official_credentials()
+            self._client = boto3.client(
+                "s3",
+                aws_access_key_id=aws_id,
+                aws_secret_access_key=aws_api_key,
+                config=Config(connect_timeout=5, retries={"max_attempts": 2}),
+            )
+        return self._client
+
+    def remote_suites(self) -> Dict[str, Dict[str, str]]:
+        """return the ETag and last modified time of every zip in the bucket
+
+        Raises:
+            Exception: raised by the client when the bucket cannot be listed
+        """
+        remote = dict()
+        kwargs = {"Bucket": self.bucket}
+        while True:
+            response = self.client.list_objects_v2(**kwargs)
+            for obj in response.get("Contents", []):
+                if obj["Key"].endswith(".zip"):
+                    remote[obj["Key"]] = {
+                        "etag": obj["ETag"],
+                        "last_modified": str(obj["LastModified"]),
+                    }
+            if not response.get("IsTruncated"):
+                return remote
+            kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+    def changed_suites(self, remote: Dict[str, Dict[str, str]]) -> List[str]:
+        """return the keys of the zips that changed since the last sync or
+        whose suites are no longer in the suites directory
+        """
+        changed = []
+        for key, version in remote.items():
+            entry = self.manifest.get(key)
+            if (
+                not entry
+                or entry["etag"] != version["etag"]
+                or entry["last_modified"] != version["last_modified"]
+                or not all(
+                    is_directory(os.path.join(self.suites_dir, name))
+                    for name in entry["suites"]
+                )
+            ):
+                changed.append(key)
+        return changed
+
+    def sync(self, register: Callable[[str], Union[List[str], bool]]) -> List[str]:
+        """download the suites that changed and register them
+
+        Args:
+            register (Callable[[str], Union[List[str], bool]]): registers
+                the suite in a directory and returns the names of the
+                registered suites
+
+        Returns:
+            List[str]: the names of the suites that are registered
+        """
+        with self._lock:
+            try:
+                remote = self.remote_suites()
+            except Exception as e:
+                logger.warning(f"cannot reach the bucket {self.bucket}, using the cached suites: {e}")
+                return []
+            changed = self.changed_suites(remote)
+            logger.info(f"{len(changed)} of {len(remote)} suites in {self.bucket} changed")
+            if not changed:
+                return []
+
+            make_dir(self.download_dir, overwrite=True)
+            with ThreadPoolExecutor(min(self.max_workers, len(changed))) as executor:
+                suite_paths = list(executor.map(self._download, changed))
+
+            registered = []
+            for key, suite_path in zip(changed, suite_paths):
+                if not suite_path:
+                    continue
+                names = register(suite_path)
+                if names and isinstance(names, list):
+                    self.manifest[key] = dict(remote[key], suites=names)
+                    registered.extend(names)
+            for key in set(self.manifest) - set(remote):
+                del self.manifest[key]
+            self._write_manifest()
+            delete(self.download_dir)
+            return registered
+
+    ################ PRIVATE METHODS
+    def _download(self, key: str) -> Union[str, bool]:
+        """download and extract one zip, return the path to the suite"""
+        try:
+            name = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+            zip_path = os.path.join(self.download_dir, f"{name}.zip")
+            extract_path = os.path.join(self.download_dir, name)
+            self.client.download_file(self.bucket, key, zip_path)
+            with ZipFile(zip_path, "r") as zip_file:
+                zip_file.extractall(extract_path)
+            return self._find_suite(extract_path)
+        except Exception as e:
+            logger.error(f"failed to download {key} from {self.bucket}: {e}", exc_info=e)
+            return False
+
+    @staticmethod
+    def _find_suite(path: str) -> Union[str, bool]:
+        """return the directory named after the suite in the config file"""
+        for root, _, files in os.walk(path):
+            if PLUGIN_CONFIG.CONFIG in files:
+                suite_name = read_toml(os.path.join(root, PLUGIN_CONFIG.CONFIG))["suite_name"]
+                break
+        else:
+            return False
+        for root, dirs, _ in os.walk(path):
+            if suite_name in dirs:
+                return os.path.join(root, suite_name)
+        return False
+
+    def _read_manifest(self) -> Dict[str, Dict]:
+        if not is_file(self.manifest_path):
+            return dict()
+        try:
+            return read_json(self.manifest_path)
+        except Exception as e:
+            logger.warning(f"ignoring the unreadable manifest {self.manifest_path}: {e}")
+            return dict()
+
+    def _write_manifest(self) -> None:
+        tmp_path = f"{self.manifest_path}.tmp"
+        write_json(tmp_path, self.manifest)
+        os.replace(tmp_path, self.manifest_path)
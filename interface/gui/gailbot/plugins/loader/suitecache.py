@@ -0,0 +1,116 @@
+import os
+import hashlib
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from gailbot.core.utils.logger import makelogger
+from gailbot.core.utils.general import read_json, write_json, is_file
+
+logger = makelogger("suite_cache")
+
+CACHE_NAME = "suite_cache.json"
+# directories in a suite that do not change what is loaded
+IGNORED_DIRS = {"__pycache__"}
+
+
+class SuiteCache:
+    """
+    Records a fingerprint of the files of every plugin suite that was loaded
+    successfully, so that a suite whose files did not change since it was
+    last loaded does not have its requirements installed, its directory
+    copied and its plugin modules imported again. The fingerprint is a hash
+    of the content of every file in the suite. The content of a file is only
+    hashed again when its size, modification time or change time differs
+    from the ones recorded with the fingerprint.
+    """
+
+    def __init__(self, workspace: str) -> None:
+        """
+        Args:
+            workspace (str): the directory of the cache file
+        """
+        self.path = os.path.join(workspace, CACHE_NAME)
+        self._lock = Lock()
+        self.entries: Dict[str, Dict] = self._read()
+
+    def fingerprint(self, suite_dir: str) -> Tuple[str, Dict[str, List]]:
+        """return the fingerprint of the files in suite_dir, and the size,
+        modification time, change time and digest of every file
+        """
+        root = os.path.realpath(suite_dir)
+        with self._lock:
+            known = next(
+                (e["files"] for e in self.entries.values() if e["root"] == root), {}
+            )
+        files = dict()
+        for dirpath, dirs, filenames in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(path, root)
+                stat = os.stat(path)
+                signature = [stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns]
+                cached = known.get(rel_path)
+                if cached and cached[:3] == signature:
+                    files[rel_path] = cached
+                else:
+                    files[rel_path] = signature + [self._digest(path)]
+        suite_hash = hashlib.sha256()
+        for rel_path in sorted(files):
+            suite_hash.update(f"{rel_path}\0{files[rel_path][3]}\n".encode())
+        return suite_hash.hexdigest(), files
+
+    def is_unchanged(self, name: str, fingerprint: str) -> bool:
+        """return true if the suite was last loaded with the fingerprint"""
+        with self._lock:
+            entry = self.entries.get(name)
+            return bool(entry) and entry["fingerprint"] == fingerprint
+
+    def record(
+        self, name: str, suite_dir: str, fingerprint: str, files: Dict[str, List]
+    ) -> None:
+        """record the fingerprint of a suite that is loaded successfully"""
+        entry = {
+            "root": os.path.realpath(suite_dir),
+            "fingerprint": fingerprint,
+            "files": files,
+        }
+        with self._lock:
+            if self.entries.get(name) == entry:
+                return
+            self.entries[name] = entry
+            self._write()
+
+    def forget(self, name: str) -> None:
+        """remove the fingerprint of a suite that is deleted or cannot be
+        loaded
+        """
+        with self._lock:
+            if self.entries.pop(name, None) is not None:
+                self._write()
+
+    ################ PRIVATE METHODS
+    @staticmethod
+    def _digest(path: str) -> str:
+        file_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def _read(self) -> Dict[str, Dict]:
+        if not is_file(self.path):
+            return dict()
+        try:
+            return read_json(self.path)
+        except Exception as e:
+            logger.warning(f"ignoring the unreadable suite cache {self.path}: {e}")
+            return dict()
+
+    def _write(self) -> None:
+        try:
+            tmp_path = f"{self.path}.tmp"
+            write_json(tmp_path, self.entries)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"failed to write the suite cache {self.path}: {e}", exc_info=e)
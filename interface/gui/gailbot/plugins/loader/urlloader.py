@@ -19,6 +19,20 @@ from urllib import request
 logger = makelogger("url_loader")
 
 
+def official_credentials() -> Tuple[str, str]:
+    """return the access key id and secret key of the official plugin
+    bucket, (None, None) if they cannot be decrypted
+    """
+    try:
+        fernet = Fernet(PLUGIN_CONFIG.EN_KEY)
+        aws_api_key = fernet.decrypt(PLUGIN_CONFIG.ENCRYPTED_API_KEY).decode()
+        aws_id = fernet.decrypt(PLUGIN_CONFIG.ENCRYPTED_API_ID).decode()
+        return aws_id, aws_api_key
+    except Exception as e:
+        logger.error(e, exc_info=e)
+        return None, None
+
+
 class UrlLoader(ABC):
     """base class for loading plugin from url"""
 
@@ -243,17 +257,7 @@ class S3BucketLoader(UrlLoader):
         """
         self.download_dir = download_dir
         self.suites_dir = suites_dir
-        try:
-            self.fernet = Fernet(PLUGIN_CONFIG.EN_KEY)
-            self.aws_api_key = self.fernet.decrypt(
-                PLUGIN_CONFIG.ENCRYPTED_API_KEY
-            ).decode()
-            self.aws_id = self.fernet.decrypt(PLUGIN_CONFIG.ENCRYPTED_API_ID).decode()
-        except Exception as e:
-            logger.error(e, exc_info=e)
-            self.fernet = None
-            self.aws_api_key = None
-            self.aws_id = None
+        self.aws_id, self.aws_api_key = official_credentials()
 
     def is_supported_url(self, bucket: str) -> bool:
         """given a url, returns true if the url is supported by the
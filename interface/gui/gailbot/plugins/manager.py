@@ -7,6 +7,7 @@ from dataclasses import dataclass
 import toml
 import sys
 import os
+from threading import RLock, Thread
 from typing import List, Union, Dict
 import validators
 from .suite import PluginSuite, MetaData
@@ -15,6 +16,8 @@ from .loader import (
     PluginDirectoryLoader,
     PluginLoader,
     PluginTOMLLoader,
+    S3SuiteSync,
+    SuiteCache,
 )
 from gailbot.core.utils.logger import makelogger
 from gailbot.configs import PLUGIN_CONFIG
@@ -58,7 +61,12 @@ class PluginManager:
     """
 
     def __init__(
-        self, workspace: str, load_existing: bool = True, over_write: bool = True
+        self,
+        workspace: str,
+        load_existing: bool = True,
+        over_write: bool = True,
+        sync_official: bool = True,
+        suite_sync: S3SuiteSync = None,
     ):
         """
         Args:
@@ -67,34 +75,48 @@ class PluginManager:
         loading_existing: if true, load the existing plugin from plugin workspace
         over_write: if true, overwrite the existing plugin if plugins_sources
                     contain plugin that has already been saved in workspace
+        sync_official: if true, update the official plugin suites from the
+                       official bucket in the background
+        suite_sync: the sync of the official suites, a sync of the official
+                    bucket is used if None
         """
 
         self.workspace = workspace
         logger.info(f"get workspace {self.workspace}")
         self._init_workspace()
 
+        self.suite_cache = SuiteCache(self.workspace)
+        self.dir_loader = PluginDirectoryLoader(self.suites_dir, self.suite_cache)
+        # copies left over from an interrupted load
+        make_dir(self.dir_loader.staging_dir, overwrite=True)
         self.loaders: List[PluginLoader] = [
             PluginURLLoader(self.download_dir, self.suites_dir),
-            PluginDirectoryLoader(self.suites_dir),
+            self.dir_loader,
         ]
+        self.suite_sync = suite_sync or S3SuiteSync(
+            PLUGIN_CONFIG.HILAB_BUCKET, self.workspace, self.suites_dir
+        )
+        self._sync_thread: Thread = None
 
         if load_existing:
             subdirs = subdirs_in_dir(self.suites_dir, recursive=False)
             for plugin_source in subdirs:
                 if not self.register_suite(plugin_source):
                     logger.error(f"{get_name(plugin_source)} cannot be registered")
-        try:
-            self.register_suite(PLUGIN_CONFIG.HILAB_BUCKET)
-        except Exception as e:
-            logger.error(e, exc_info=e)
+        # the cached copies of the official suites are registered above,
+        # the suites that changed in the bucket replace them once downloaded
+        if sync_official:
+            self.sync_official_suites(background=True)
 
     def get_all_suites_name(self) -> List[str]:
         """return a list of available plugin suite names"""
-        return set(self.suites.keys())
+        with self._suites_lock:
+            return set(self.suites.keys())
 
     def is_suite(self, suite_name: str) -> bool:
         """check if suite name is an available plugin suite"""
-        return suite_name in self.suites
+        with self._suites_lock:
+            return suite_name in self.suites
 
     def reset_workspace(self) -> bool:
         """
@@ -115,7 +137,7 @@ class PluginManager:
                 if suites and isinstance(suites, list):
                     for suite in suites:
                         if isinstance(suite, PluginSuite):
-                            self.suites[suite.name] = suite
+                            self._add_suite(suite)
                             registered.append(suite.name)
                     return registered
             return self.report_registration_err(plugin_source)
@@ -123,6 +145,35 @@ class PluginManager:
             logger.error(e, exc_info=e)
             return self.report_registration_err(plugin_source)
 
+    def sync_official_suites(self, background: bool = True) -> List[str]:
+        """download the official plugin suites that changed since the last
+        sync and register them, the suites that did not change are
+        registered from the suites directory
+
+        Args:
+            background (bool): if true, sync in a background thread and
+                               return without waiting
+
+        Returns:
+            List[str]: the names of the suites that are updated, empty if
+                       the sync runs in the background
+        """
+        if background:
+            if not (self._sync_thread and self._sync_thread.is_alive()):
+                self._sync_thread = Thread(
+                    target=self._sync_official_suites, name="plugin-suite-sync", daemon=True
+                )
+                self._sync_thread.start()
+            return []
+        return self._sync_official_suites()
+
+    def wait_for_sync(self, timeout: float = None) -> bool:
+        """wait for the background sync, return true if it has finished"""
+        if self._sync_thread:
+            self._sync_thread.join(timeout)
+            return not self._sync_thread.is_alive()
+        return True
+
     def get_suite(self, suite_name: str) -> PluginSuite:
         """Given a suite name, return the plugin suite object
 
@@ -132,34 +183,53 @@ class PluginManager:
         Returns:
             PluginSuite: the plugin suite object identified by suite name
         """
-        if not self.is_suite(suite_name):
+        with self._suites_lock:
+            suite = self.suites.get(suite_name)
+        if not suite:
             logger.error(f"Suite does not exist {suite_name}")
-            return None
-        return self.suites[suite_name]
+        return suite
 
     def is_official_suite(self, suite_name) -> bool:
-        if not self.is_suite(suite_name):
-            logger.error(f"Suite does not exist {suite_name}")
-            return None
-        return self.suites[suite_name].is_official
+        suite = self.get_suite(suite_name)
+        return suite.is_official if suite else None
 
     def get_suite_metadata(self, suite_name: str) -> Dict[str, str]:
-        if not self.is_suite(suite_name):
-            logger.error(f"Suite does not exist {suite_name}")
-            return None
-        return self.suites[suite_name].get_meta_data()
+        suite = self.get_suite(suite_name)
+        return suite.get_meta_data() if suite else None
 
     def get_suite_dependency_graph(self, suite_name: str) -> Dict[str, List[str]]:
-        if not self.is_suite(suite_name):
-            logger.error(f"Suite does not exist {suite_name}")
-            return None
-        return self.suites[suite_name].dependency_graph()
+        suite = self.get_suite(suite_name)
+        return suite.dependency_graph() if suite else None
 
     def get_suite_documentation_path(self, suite_name) -> str:
-        if not self.is_suite(suite_name):
-            logger.error(f"Suite does not exist {suite_name}")
-            return None
-        return self.suites[suite_name].document_path
+        suite = self.get_suite(suite_name)
+        return suite.document_path if suite else None
+
+    def _sync_official_suites(self) -> List[str]:
+        try:
+            return self.suite_sync.sync(self._register_directory)
+        except Exception as e:
+            logger.error(e, exc_info=e)
+            return []
+
+    def _register_directory(self, suite_dir: str) -> Union[List[str], bool]:
+        """register the suite in a directory, return the names of the
+        registered suites or false if the suite cannot be loaded
+        """
+        suites = self.dir_loader.load(suite_dir)
+        if not suites:
+            logger.error(f"{get_name(suite_dir)} cannot be registered")
+            return False
+        for suite in suites:
+            self._add_suite(suite)
+        return [suite.name for suite in suites]
+
+    def _add_suite(self, suite: PluginSuite) -> None:
+        """make the loaded suite available, replacing the suite of the same
+        name, the suite is complete once it is loaded
+        """
+        with self._suites_lock:
+            self.suites[suite.name] = suite
 
     def _init_workspace(self):
         """
@@ -169,6 +239,9 @@ class PluginManager:
         self.download_dir = f"{self.workspace}/downloads"
         sys.path.append(self.suites_dir)
         self.suites: Dict[str, PluginSuite] = dict()
+        # the suites are registered by the background sync while they are
+        # read by the interface
+        self._suites_lock = RLock()
 
         # Make the directory
         make_dir(self.workspace, overwrite=False)
@@ -180,12 +253,13 @@ class PluginManager:
         given a suite name, delete the plugin suite
         """
         try:
-            if self.is_suite(name):
-                delete(os.path.join(self.suites_dir, name))
+            with self._suites_lock:
+                if name not in self.suites:
+                    return False
                 del self.suites[name]
-                return True
-            else:
-                return False
+            delete(os.path.join(self.suites_dir, name))
+            self.suite_cache.forget(name)
+            return True
         except Exception as e:
             logger.error(e, exc_info=e)
             return False
@@ -196,10 +270,13 @@ class PluginManager:
         """
         if self.is_suite(name):
             path = os.path.join(self.suites_dir, name)
-            if is_directory(path):
+            with self.dir_loader.swap_lock:
+                exists = is_directory(path)
+            if exists:
                 return path
             else:
-                del self.suites[name]
+                with self._suites_lock:
+                    self.suites.pop(name, None)
                 return None
         else:
             return None
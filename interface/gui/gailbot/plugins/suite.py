@@ -8,6 +8,7 @@ import sys
 import os
 from typing import Dict, List, Any, Tuple
 import time
+from threading import Lock
 from pydantic import BaseModel
 
 from .plugin import Plugin, Methods
@@ -42,6 +43,54 @@ class MetaData(BaseModel):
     Version: str
 
 
+class LazyPlugin(Plugin):
+    """
+    Stands in for a plugin whose module has not been imported yet. The module
+    is imported and the plugin instantiated the first time the plugin is
+    applied, so a suite that is registered but not used costs no imports.
+    """
+
+    def __init__(self, module_full_name: str, path: str, clazz_name: str):
+        """
+        Args:
+            module_full_name (str): the name the module is imported as
+            path (str): the path to the plugin script
+            clazz_name (str): the name of the plugin class in the module
+        """
+        self.name = clazz_name
+        self.module_full_name = module_full_name
+        self.path = path
+        self._plugin: Plugin = None
+        self._lock = Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._plugin is not None
+
+    @property
+    def is_successful(self) -> bool:
+        return self.is_loaded and self._plugin.is_successful
+
+    def load(self) -> Plugin:
+        """import the module and return the plugin instance"""
+        with self._lock:
+            if self._plugin is None:
+                spec = importlib.util.spec_from_file_location(
+                    self.module_full_name, self.path
+                )
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[self.module_full_name] = module
+                spec.loader.exec_module(module)
+                self._plugin = getattr(module, self.name)()
+            return self._plugin
+
+    def apply(self, dependency_outputs: Dict[str, Any], methods: Methods, *args, **kwargs) -> Any:
+        return self.load().apply(dependency_outputs, methods, *args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"plugin {self.name}"
+
+
 class PluginComponent(Component):
     """
     This is an adapter because the Plugin expects different args as compared
@@ -99,15 +148,19 @@ class PluginSuite:
     Needs to store the details of each plugin (source file etc.)
     """
 
-    def __init__(self, dict_conf: Dict, abs_path: str):
-        """a dictionary of the dependency map  -> pipeline argument"""
+    def __init__(self, dict_conf: Dict, abs_path: str, lazy: bool = False):
+        """a dictionary of the dependency map  -> pipeline argument,
+        the plugin modules are imported on first use if lazy is true
+        """
         self.dict_conf = dict_conf
         self.source_path = abs_path
         # metadata and document_path will be loaded in _load_from_config
         self.metadata: MetaData = None
         self.document_path: str = None
         self.formatmd_path: str = None
-        self.dependency_map, self.plugins = self._load_from_config(dict_conf, abs_path)
+        self.dependency_map, self.plugins = self._load_from_config(
+            dict_conf, abs_path, lazy
+        )
 
         # Wrap the plugins in PluginComponent
         self.components = {k: PluginComponent(v) for k, v in self.plugins.items()}
@@ -188,7 +241,7 @@ class PluginSuite:
     # PRIVATE
     ##########
     def _load_from_config(
-        self, dict_config, abs_path: str
+        self, dict_config, abs_path: str, lazy: bool = False
     ) -> Tuple[Dict[str, List[str]], Dict[str, Plugin]]:
         """
         load the plugin suite, the information about the each plugin name,
@@ -209,6 +262,10 @@ class PluginSuite:
         abs_path: the absolute path where the plugin suite directory is relative
                   to, each plugins's absolute path can be form as
                   "<abs_path>/<suite_name>/<rel_path>"
+
+        lazy: if true, each plugin is a LazyPlugin that imports its module
+              when it is first applied, otherwise every module is imported
+              here so that a broken plugin fails the loading
         """
         suite_name = dict_config["suite_name"]
         dependency_map: Dict[str, List] = dict()
@@ -229,12 +286,9 @@ class PluginSuite:
             rel_path = conf["rel_path"]
             path = os.path.join(abs_path, suite_name, rel_path)
             clazz_name = conf["plugin_name"]
-            spec = importlib.util.spec_from_file_location(module_full_name, path)
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[module_full_name] = module
-            spec.loader.exec_module(module)
-            clazz = getattr(module, clazz_name)
-            instance = clazz()
+            instance = LazyPlugin(module_full_name, path, clazz_name)
+            if not lazy:
+                instance = instance.load()
             dependency_map[clazz_name] = conf["dependencies"]
             plugins[clazz_name] = instance
         logger.info(f"plugin dependency map {dependency_map}")
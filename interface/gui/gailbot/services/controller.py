@@ -1,15 +1,22 @@
 from typing import Dict, List, Any, Tuple, Union, Callable
+from threading import Thread
 
 from .organizer import Organizer, SettingDict
 from .converter import Converter
-from .pipeline import PipelineService
+from .pipeline import PipelineService, TranscriptionCache
 from ..plugins import PluginManager, PluginSuite
 from gailbot.core.utils.logger import makelogger
 from gailbot.core.utils.general import get_name
 from gailbot.workspace.manager import WorkspaceManager
-from gailbot.configs import service_config_loader, default_setting_loader
+from gailbot.core.engines.engineManager import EngineManager
+from gailbot.configs import (
+    service_config_loader,
+    default_setting_loader,
+    whisper_config_loader
+)
 CONFIG = service_config_loader()
 DEFAULT_SETTING = default_setting_loader()
+WHISPER_CONFIG = whisper_config_loader()
 logger = makelogger("service_controller")
 """ Knows about all three sub modules """
 
@@ -21,8 +28,16 @@ class ServiceController:
         self.organizer = Organizer(ws_manager.setting_src, load_exist_setting)
         self.converter = Converter(ws_manager)
         self.plugin_manager = PluginManager(ws_manager.plugin_src)
+        self.transcription_cache = None
+        if CONFIG.transcription_cache.enabled:
+            self.transcription_cache = TranscriptionCache(
+                ws_manager.transcription_cache,
+                CONFIG.transcription_cache.max_size_mb
+            )
         self.pipeline_service = PipelineService(
-            self.plugin_manager, num_threads=CONFIG.thread.transcriber_num_threads
+            self.plugin_manager,
+            num_threads=CONFIG.thread.transcriber_num_threads,
+            transcription_cache=self.transcription_cache
         )
         self.transcribed = set()  ## stores the file name of transcribed file
         self._init_default_setting()
@@ -43,8 +58,24 @@ class ServiceController:
                     return
             self.organizer.create_new_setting(DEFAULT_SETTING.profile_name,DEFAULT_SETTING.profile_data)
         self.organizer.set_default_setting(DEFAULT_SETTING.profile_name)
-            
-        
+
+    def preload_engines(self) -> Union[Thread, None]:
+        """ start loading the model of the default engine in the background,
+            so that it is resident by the time the first file is transcribed
+
+        Returns:
+            Union[Thread, None]: the thread that loads the model, None if
+            there is nothing to preload
+        """
+        engine = DEFAULT_SETTING.engine_data["engine"]
+        if engine != "whisper" or not WHISPER_CONFIG.registry_configs.preload_on_startup:
+            return None
+        thread = Thread(
+            target=EngineManager().preload, args=(engine,), daemon=True)
+        thread.start()
+        logger.info(f"preloading the model of {engine} engine")
+        return thread
+
     def add_sources(self, src_output_pairs: List[Tuple[str, str]]):
         """add a list of sources
 
@@ -397,6 +428,41 @@ class ServiceController:
         except Exception as e:
             logger.error(e, exc_info=e)
 
+    def get_transcription_cache_info(self) -> Union[bool, Dict[str, Any]]:
+        """
+        return the number of cached transcription results, the size of the
+        cache and its hit rate, and the list of cached entries
+
+        Returns:
+            Union[bool, Dict[str, Any]]: the cache information, false if the
+            cache is disabled
+        """
+        if not self.transcription_cache:
+            return False
+        info = self.transcription_cache.info()
+        info["entries_detail"] = self.transcription_cache.entries()
+        return info
+
+    def purge_transcription_cache(self, older_than_sec: float = None) -> Union[bool, int]:
+        """
+        remove cached transcription results
+
+        Args:
+            older_than_sec (float, optional): only remove the results that were
+                not used in this many seconds, remove all if None
+
+        Returns:
+            Union[bool, int]: the number of removed results, false if the
+            cache is disabled
+        """
+        if not self.transcription_cache:
+            return False
+        try:
+            return self.transcription_cache.purge(older_than_sec)
+        except Exception as e:
+            logger.error(e, exc_info=e)
+            return False
+
     def register_plugin_suite(self, plugin_source: str) -> Union[List[str], str]:
         """
         Registers a plugin suite to the object's plugin manager
@@ -1,4 +1,5 @@
 from typing import Dict, List, Union, Tuple
+from concurrent.futures import ThreadPoolExecutor
 
 from .payload import (
     load_transcribed_dir_payload, 
@@ -8,7 +9,9 @@ from .payload import (
 from gailbot.core.utils.logger import makelogger
 from ..organizer.source import SourceObject
 from gailbot.workspace.manager import WorkspaceManager
+from gailbot.configs import service_config_loader
 
+NUM_THREAD = service_config_loader().thread.payload_num_threads
 logger = makelogger("converter")
 class Converter: 
     """
@@ -21,8 +24,9 @@ class Converter:
         load_conversation_dir_payload]
     
     """ mapping payload name to payloadObject """
-    def __init__(self, ws_manager: WorkspaceManager) -> None:
+    def __init__(self, ws_manager: WorkspaceManager, num_threads: int = NUM_THREAD) -> None:
         self.ws_manager = ws_manager
+        self.num_threads = num_threads
         self.payloads_dict: Dict[str, PayLoadObject] = dict()
         
     def load_source(self, source: SourceObject) -> bool:
@@ -35,13 +39,23 @@ class Converter:
         Returns:
             bool: true if successfully loaded, false if not
         """
+        payloads = self._convert(source)
+        if payloads is False:
+            return False
+        self.payloads_dict[source.name] = payloads
+        return True
+
+    def _convert(self, source: SourceObject) -> Union[bool, List[PayLoadObject]]:
+        """
+        Converts a source object to payloads with the first loader that
+        accepts it, returns false if no loader accepts the source
+        """
         for loader in self.loaders:
             try: 
                 payloads: List [PayLoadObject] = loader(source, self.ws_manager)
                 logger.info(payloads)
                 if isinstance(payloads, list):
-                    self.payloads_dict[source.name] = payloads
-                    return True 
+                    return payloads
             except Exception as e:
                 logger.error(e, exc_info=e) 
         return False
@@ -65,10 +79,17 @@ class Converter:
         invalid = list()
        
         try:
-            for source in sources:
+            # the sources are converted in parallel, and the payloads are
+            # collected in the order of the sources
+            num_threads = max(1, min(self.num_threads, len(sources)))
+            with ThreadPoolExecutor(num_threads) as executor:
+                results = list(executor.map(self._convert, sources))
+            for source, payloads in zip(sources, results):
                 logger.info(source)
-                if not self.load_source(source):
+                if payloads is False:
                     invalid.append(source.name)
+                else:
+                    self.payloads_dict[source.name] = payloads
             logger.info(self.payloads_dict)
             converters = sum(list(self.payloads_dict.values()), []) 
             return converters, invalid
@@ -1,9 +1,9 @@
+from functools import partial
 from typing import List, Union
 from .payloadObject import PayLoadObject, PayLoadStatus
 from ...organizer.source import SourceObject
 from gailbot.core.utils.general import (
-    get_extension,  
-    copy)
+    get_extension)
 from gailbot.core.utils.logger import makelogger
 from gailbot.core.utils.media import AudioHandler
 import os 
@@ -38,6 +38,19 @@ def load_audio_payload(
         logger.error(e, exc_info=e)
         return False
 
+def overlay_audio_files(data_files: List[str], out_dir: str) -> str:
+    """ merge the audio files into one file in the output directory, return
+        the path to the merged file, None if they cannot be merged
+    """
+    try:
+        handler = AudioHandler()
+        merged_path = handler.overlay_audios(data_files, out_dir, MERGED_FILE_NAME)
+        assert merged_path
+        return merged_path
+    except Exception as e:
+        logger.error(e, exc_info=e)
+        return None
+
 class AudioPayload(PayLoadObject):  
     """
     Class for audio payload
@@ -66,17 +79,11 @@ class AudioPayload(PayLoadObject):
         extension = get_extension(self.original_source)
         tgt_path =os.path.join(
             self.workspace.data_copy, f"{self.name}.{extension}")
-        copy(self.original_source, tgt_path)
+        self._stage(self.original_source, tgt_path)
         self.data_files = [tgt_path]
         
-    def _merge_audio(self):
-        try:
-            handler = AudioHandler()
-            merged_path = handler.overlay_audios(self.data_files, self.out_dir.media_file, MERGED_FILE_NAME)
-            self.merged_audio = merged_path
-            assert merged_path
-        except Exception as e:
-            logger.error(e, exc_info=e)
+    def _merge_function(self):
+        return partial(overlay_audio_files, list(self.data_files), self.out_dir.media_file)
             
     @staticmethod
     def supported_format() -> List[str]:
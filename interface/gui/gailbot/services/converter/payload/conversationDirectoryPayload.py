@@ -1,16 +1,15 @@
 import os 
+from functools import partial
 from typing import List,  Union
 from .payloadObject import PayLoadObject, PayLoadStatus
 from ...organizer.source import SourceObject
 from gailbot.core.utils.general import (
     paths_in_dir, 
-    is_directory, 
-    copy
+    is_directory
 )
 from gailbot.core.utils.logger import makelogger
 from gailbot.workspace.manager import WorkspaceManager
-from .audioPayload import AudioPayload
-from gailbot.core.utils.media import AudioHandler
+from .audioPayload import AudioPayload, overlay_audio_files
 
 MERGED_FILE_NAME = "merged"
 logger = makelogger("conversation_payload")
@@ -79,7 +78,7 @@ class ConversationDirectoryPayload(PayLoadObject):
         """
         try:
             tgt_path = os.path.join(self.workspace.data_copy, f"{self.name}")
-            copy(self.original_source, tgt_path)
+            self._stage(self.original_source, tgt_path)
             self.data_files = []
             sub_paths = paths_in_dir(tgt_path, AudioPayload.supported_format(), recursive=False)
             for path in sub_paths:
@@ -87,14 +86,8 @@ class ConversationDirectoryPayload(PayLoadObject):
         except Exception as e:
             logger.error(e, exc_info=e)
     
-    def _merge_audio(self):
-        try:
-            handler = AudioHandler()
-            merged_path = handler.overlay_audios(self.data_files, self.out_dir.media_file, MERGED_FILE_NAME)
-            self.merged_audio = merged_path
-            assert merged_path
-        except Exception as e:
-            logger.error(e, exc_info=e)
+    def _merge_function(self):
+        return partial(overlay_audio_files, list(self.data_files), self.out_dir.media_file)
     
     def _set_initial_status(self) -> None:
         """
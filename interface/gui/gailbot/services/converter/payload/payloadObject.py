@@ -1,11 +1,18 @@
 from abc import ABC
-from typing import List, Dict 
+from typing import Callable, List, Dict, Union
+from threading import Lock
 import os 
 from enum import Enum 
 from datetime import datetime
-from gailbot.core.utils.general import write_json, copy, is_file
+from gailbot.core.utils.general import (
+    write_json,
+    is_file,
+    stage_file,
+    stage_dir,
+    StagedFile)
 from gailbot.configs import  OutputFolder, TemporaryFolder
 from gailbot.core.utils.logger import makelogger
+from gailbot.core.utils.utterances import UtteranceTable
 from ...organizer.source import SourceObject
 from ...organizer.settings import SettingObject
 from ..result import (
@@ -35,6 +42,22 @@ class PayLoadStatus(Enum):
     FORMATTED = 6
     FAILED = 7 
 
+class MergedAudio:
+    """
+    An accessor to the merged audio of a payload that can be sent to a
+    worker process in place of the payload, the audio is merged when the
+    accessor is first called
+    """
+    def __init__(self, path: str = None, merge: Callable[[], str] = None) -> None:
+        self.path = path
+        self.merge = merge
+
+    def __call__(self) -> str:
+        if self.path is None and self.merge:
+            merge, self.merge = self.merge, None
+            self.path = merge()
+        return self.path
+
 class PayLoadObject(ABC):
     """ super class of the payloadObject, interface includes necessary method 
         that subclass needs to implement. 
@@ -58,7 +81,6 @@ class PayLoadObject(ABC):
     
     workspace: TemporaryFolder  # workspace for storing temporary file , will be deleted afterward
     out_dir: OutputFolder       # directory where all the output will be stored 
-    merged_audio: str 
     # payload result
     def __init__(self, source: SourceObject, workspace: WorkspaceManager) -> None:
         """ initialize a payload object
@@ -82,18 +104,102 @@ class PayLoadObject(ABC):
         self.analysis_result: AnalysisResult = AnalysisResult()
         self.format_result: FormatResult = FormatResult(self.workspace.format_ws)
         logger.info(f"ouputspace {self.out_dir.transcribe_result}")
+        # the audio is merged when it is first needed, not when the
+        # payload is created
+        self._merged_audio: str = None
+        self._merge_done = False
+        self._merge_lock = Lock()
+        # the source files are staged into the workspace as links to the
+        # source when possible and must not be modified there, the files in
+        # the output are never hard links, keyed by the staged path
+        self.staged: Dict[str, StagedFile] = dict()
         self._set_initial_status()
         self._copy_file() 
-        self._merge_audio()
     
+    @property
+    def merged_audio(self) -> str:
+        """
+        Path to the audio of all data files merged into one, the audio is
+        merged on first access, None if it cannot be merged. A merge that
+        fails is tried again on the next access
+        """
+        with self._merge_lock:
+            if not self._merge_done:
+                try:
+                    self._merge_audio()
+                except Exception as e:
+                    logger.error(f"fail to merge the audio of {self.name}: {e}", exc_info=e)
+                else:
+                    self._merge_done = True
+        return self._merged_audio
+
+    @merged_audio.setter
+    def merged_audio(self, path: str) -> None:
+        """ records audio that has been merged, the audio is not merged again """
+        self._merged_audio = path
+        self._merge_done = True
+
+    def merged_audio_accessor(self) -> MergedAudio:
+        """
+        Returns an accessor to the merged audio that merges the audio only
+        when it is called, for use where the payload cannot be sent. Audio
+        merged through the accessor in another process is merged into the
+        output of the payload, its path is set back through merged_audio
+        """
+        with self._merge_lock:
+            if self._merge_done:
+                return MergedAudio(self._merged_audio)
+        return MergedAudio(merge=self._merge_function())
+
     def _merge_audio(self):
-        raise NotImplementedError()
+        merge = self._merge_function()
+        if merge:
+            self.merged_audio = merge()
+
+    def _merge_function(self) -> Callable[[], str]:
+        """
+        Returns a function that can be pickled, which merges the audio and
+        returns the path to the merged audio, None if there is no audio
+        """
+        return None
      
     def _set_initial_status(self) -> None: 
         raise NotImplementedError()
     
     def _copy_file(self) -> None:
         raise NotImplementedError()
+    
+    def _stage(self, src_path: str, tgt_path: str,
+               hardlink: bool = True) -> Union[str, bool]:
+        """
+        Stages a file or a directory from the source path to the target path
+        without copying the data when possible, and records the staged files
+
+        Args:
+            hardlink (bool): whether the staged files can be hard links to the
+                             source, only for files in the temporary workspace
+
+        Returns:
+            Union[str, bool]: the target path, false if it is not staged
+        """
+        if os.path.isdir(src_path):
+            staged = stage_dir(src_path, tgt_path, hardlink)
+        else:
+            staged = stage_file(src_path, tgt_path, hardlink)
+            staged = [staged] if staged else staged
+        if not staged:
+            logger.error(f"failed to stage {src_path} to {tgt_path}")
+            return False
+        for file in staged:
+            self.staged[file.path] = file
+        return tgt_path
+
+    @property
+    def bytes_staged(self) -> int:
+        """
+        The number of bytes of file data written to stage the source files
+        """
+        return sum(file.bytes_written for file in self.staged.values())
         
     def is_supported(file_path: str) -> bool:
         raise NotImplementedError()
@@ -192,6 +298,15 @@ class PayLoadObject(ABC):
         """
         return self.setting.engine_setting.get_init_kwargs()
      
+    def validate_engine_setting(self) -> bool:
+        """
+        Checks that the engine accepts the credentials of the engine setting
+
+        Returns:
+            True if the credentials are valid, false if not
+        """
+        return self.setting.engine_setting.validate()
+
     def get_engine_transcribe_setting(self) -> Dict[str, str]:
         """
         Accesses and returns the engine's transcription settings
@@ -324,6 +439,16 @@ class PayLoadObject(ABC):
             to lists of utterance dictionaries
         """
         return self.transcription_result.get_data()
+
+    def get_transcription_tables(self) -> Dict[str, UtteranceTable]:
+        """
+        Accesses the result of the current transcription in columnar form
+
+        Returns:
+            Transcription result in the form of a dictionary mapping strings 
+            to utterance tables
+        """
+        return self.transcription_result.get_tables()
     
     def get_format_result(self) -> FormatResultDict:
         """
@@ -415,11 +540,15 @@ class PayLoadObject(ABC):
         assert self.output_meta_result()
         assert self.output_transcription_result()
         assert self.output_format_result()
+        # the merged audio is part of the output even if no stage used it
+        self.merged_audio
         with open(os.path.join(self.out_dir.root, OUTPUT_MARKER), "w+") as f:
             f.write(f"{self.name}")
         for file in self.data_files:
             if is_file(file):
-                copy(file, os.path.join(self.out_dir.media_file, os.path.basename(file)))
+                self._stage(file, os.path.join(self.out_dir.media_file, os.path.basename(file)),
+                            hardlink=False)
+        logger.info(f"{self.bytes_staged} bytes written to stage the files of {self.name}")
         
     def clear_temporary_workspace(self):
         delete(self.workspace.root)
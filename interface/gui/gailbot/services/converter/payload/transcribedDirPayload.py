@@ -1,3 +1,4 @@
+from functools import partial
 from typing import Union
 import os 
 
@@ -37,6 +38,23 @@ def load_transcribed_dir_payload(
         logger.error(e, exc_info=e)
         return False
 
+def copy_merged_audio(source_dir: str, out_dir: str) -> str:
+    """ copy the merged audio of a gailbot output directory to the output
+        directory, return the path to the copy, None if there is none
+    """
+    try: 
+        for root, dirs, files in os.walk(source_dir):
+            for file in files:
+                file_name, file_extension = os.path.splitext(file)
+                if file_name == MERGED_FILE_NAME:
+                    logger.info(file)
+                    merged_path = copy(os.path.join(root,file), out_dir)
+                    assert merged_path
+                    return merged_path
+    except Exception as e:
+        logger.error(e, exc_info=e)
+    return None
+
 class TranscribedDirPayload(PayLoadObject):
     """
     Class for a transcribed directory payload
@@ -77,20 +95,8 @@ class TranscribedDirPayload(PayLoadObject):
         """
         self.status = PayLoadStatus.TRANSCRIBED
     
-    def _merge_audio(self):
-        try: 
-            for root, dirs, files in os.walk(self.original_source):
-                for file in files:
-                    file_name, file_extension = os.path.splitext(file)
-                    if file_name == MERGED_FILE_NAME:
-                        logger.info(file)
-                        merged_path = copy(os.path.join(root,file), self.out_dir.media_file)
-                        self.merged_audio = merged_path
-                        assert merged_path
-                        break
-        except Exception as e:
-            logger.error(e, exc_info=e)
-            return False
+    def _merge_function(self):
+        return partial(copy_merged_audio, self.original_source, self.out_dir.media_file)
     
     @staticmethod
     def supported_format() -> str:
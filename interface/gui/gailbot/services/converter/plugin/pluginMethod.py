@@ -5,6 +5,7 @@ from ..payload.payloadObject import PayLoadObject, MERGED_FILE_NAME
 from gailbot.services.converter.result import UttDict
 from gailbot.plugins import Methods
 from gailbot.core.utils.logger import makelogger
+from gailbot.core.utils.utterances import UtteranceTable
 from gailbot.core.utils.general import (
     get_name, 
     get_extension,
@@ -28,6 +29,32 @@ class UttObj(BaseModel):
     speaker: str 
     text: str
 
+class PayloadView:
+    """ the part of a payload that plugins read, used in place of the payload
+        when the plugin methods are sent to a worker process
+    """
+    def __init__(self, payload: PayLoadObject):
+        self.data_files = list(payload.data_files)
+        # the audio is merged in the worker if a plugin asks for it
+        self._merged_audio = payload.merged_audio_accessor()
+        self.transcription_tables = payload.get_transcription_tables()
+
+    @property
+    def merged_audio(self) -> str:
+        return self._merged_audio()
+
+    @property
+    def merged_audio_path(self) -> Union[str, None]:
+        """ the path to the merged audio, None if it has not been merged """
+        return self._merged_audio.path
+    
+    def get_transcription_result(self) -> Dict[str, List[UttDict]]:
+        return {name: table.to_dicts() if isinstance(table, UtteranceTable) else table
+                for name, table in self.transcription_tables.items()}
+
+    def get_transcription_tables(self) -> Dict[str, UtteranceTable]:
+        return self.transcription_tables
+
 class GBPluginMethods(Methods):
     format_to_out_fun = {
         "csv" : write_csv,
@@ -49,6 +76,12 @@ class GBPluginMethods(Methods):
         if not is_directory(self.out_path):
             make_dir(self.out_path)
         
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        if not isinstance(self.payload, PayloadView):
+            state["payload"] = PayloadView(self.payload)
+        return state
+
     def get_audio_path(self) -> Dict[str, str]:
         """
         Returns a dictionary that maps the audio name to the audio source
@@ -109,13 +142,21 @@ class GBPluginMethods(Methods):
         Access and return the utterance data as utterance object 
         """
         res = dict()
-        data = self.payload.get_transcription_result()
-        for key, uttlist in data.items(): 
-            newlist = list()
-            for utt in uttlist:
-                newlist.append(UttObj(**utt))
-            res[key] = newlist
+        data = self.payload.get_transcription_tables()
+        for key, table in data.items(): 
+            if isinstance(table, UtteranceTable):
+                res[key] = table.to_objects(UttObj)
+            else:
+                res[key] = [UttObj(**utt) for utt in table]
         return res
+
+    def get_utterance_tables(self) -> Dict[str, UtteranceTable]:
+        """
+        Access and return the utterance data as utterance tables, which store
+        the start time, end time, speaker and text of the utterances in
+        arrays, the tables are shared and should not be modified
+        """
+        return self.payload.get_transcription_tables()
     
     
     def save_item(self, 
@@ -1,28 +1,29 @@
 
 import os 
-from typing import TypedDict, List, Dict
+import sys
+import pickle
+from threading import Lock
+from collections import OrderedDict
+from typing import TypedDict, List, Dict, Union
 
 from gailbot.core.utils.general import (
     write_csv, 
     read_csv,
-    write_json, 
     get_name, 
     make_dir,
-    read_json, 
     paths_in_dir, 
     is_directory, 
     is_file)
 from gailbot.core.utils.logger import makelogger
+from gailbot.core.utils.utterances import UtteranceTable
 from gailbot.configs import service_config_loader
 from .resultInterface import ResultInterface
 
 SERVICE_CONFIG = service_config_loader()
+RESULT_CONFIG = SERVICE_CONFIG.result
 logger = makelogger("transcribe_result")
+_MB = 1024 * 1024
 
-"""
-TODO: 
-use .pickle to store temporary file to save memory
-"""
 class UttDict(TypedDict):
     """
     Defines a class for the utterance dictionary
@@ -34,22 +35,48 @@ class UttDict(TypedDict):
     
 class UttResult(ResultInterface):
     """
-    Defines a class containing the utterance results of a transcription
+    Defines a class containing the utterance results of a transcription.
+    The results are kept in memory as utterance tables, once they are larger
+    than the memory budget the largest results are spilled to pickle files in
+    the workspace, and spilled results that are read are kept in a bounded
+    read cache. The returned tables are shared by every reader and should not
+    be modified. The dictionaries of a result are made once while the result
+    is in memory or in the read cache, and every reader gets its own copies.
     """
-    def __init__(self, workspace: str, data: Dict[str, List[UttDict]] = None) -> None:
+    def __init__(
+        self, 
+        workspace: str, 
+        data: Dict[str, List[UttDict]] = None,
+        memory_budget_mb: float = RESULT_CONFIG.memory_budget_mb,
+        read_cache_mb: float = RESULT_CONFIG.read_cache_mb
+    ) -> None:
         self.workspace = os.path.join(workspace, SERVICE_CONFIG.directory_name.temp_result)
         make_dir(self.workspace, overwrite=True)
-        self.max_size = 1000 # TODO: move to toml 
-        self.data = data 
+        self.max_size = memory_budget_mb * _MB
+        self.read_cache_size = read_cache_mb * _MB
+        self.data : Dict[str, UtteranceTable] = dict()
+        # path to the results that are spilled to disk
         self.filenames :  Dict [str, str] = dict()
         self.saved_to_disk: bool = False
+        self._names : List[str] = list()
+        self._sizes : Dict[str, int] = dict()
+        self._read_cache : OrderedDict = OrderedDict()
+        self._read_cache_bytes = 0
+        # the dictionaries of the results, and the number of times each
+        # result is set so that dictionaries of an older result are not kept
+        self._dicts : Dict[str, List[UttDict]] = dict()
+        self._versions : Dict[str, int] = dict()
+        self._lock = Lock()
+        if data:
+            self.save_data(data)
             
     def save_data(
         self, 
         data: Dict[str, List[UttDict]]
     ) -> bool:
         """
-        Saves the given data to the output directory
+        Saves the given data, the data is written to the workspace only when
+        the results are larger than the memory budget
 
         Args:  
             data: Dict[str, List[UttDict]]: data to save
@@ -61,12 +88,13 @@ class UttResult(ResultInterface):
             logger.error("the result is empty")
             return False
         try: 
-            for name, result in data.items():
-                path = os.path.join(self.workspace, f"{name}.json")  
-                write_json(path, result)
-                if name not in self.filenames:
-                    self.filenames[name] = path
-            self.saved_to_disk = True
+            with self._lock:
+                for name, result in data.items():
+                    self._discard(name)
+                    self._names.append(name)
+                    self.data[name] = self._to_table(result)
+                    self._sizes[name] = self._estimate_size(self.data[name])
+                self._spill_if_needed()
             return True
         except Exception as e:
             logger.error(e, exc_info=e)
@@ -83,14 +111,10 @@ class UttResult(ResultInterface):
             bool: True if successfully outputted, false if not
         """
         try:
-            if self.saved_to_disk:
-                data = self.get_data()
-            else: 
-                data = self.data 
-            for name, result in data.items():
+            for name in list(self._names):
                 logger.info(path)
                 logger.info(name)
-                write_csv(os.path.join(path, name + ".csv"), result)
+                write_csv(os.path.join(path, name + ".csv"), self._get_dicts(name, copy=False))
             return True
         except Exception as e:
             logger.error(f"the path is {path}")
@@ -104,14 +128,17 @@ class UttResult(ResultInterface):
         Returns:
             Data in the form Dict[str, List[UttDict]]
         """
-        if self.saved_to_disk:
-            files = paths_in_dir(self.workspace, ["json"])
-            res = dict()
-            for file in files: 
-                res[get_name(file)] = read_json(file)
-            return res 
-        else:
-            return self.data 
+        return {name: self._get_dicts(name) for name in list(self._names)}
+
+    def get_tables(self) -> Dict[str, UtteranceTable]:
+        """
+        Accesses and returns the data of the current transcription result
+        without converting it to dictionaries
+
+        Returns:
+            Data in the form Dict[str, UtteranceTable]
+        """
+        return {name: self._get_one(name) for name in list(self._names)}
    
     def get_one_file_data(self, name:str) -> Dict[str, List[UttDict]]:
         """
@@ -124,11 +151,7 @@ class UttResult(ResultInterface):
                 dictionary will be the file name, and the value will be the 
                 list of utterance dictionary that stores the utterance data
         """ 
-        res = dict()
-        path = self.filenames[name]
-        res[name] = read_json(path)
-        return res 
-        
+        return {name: self._get_dicts(name)}
         
     def load_result(self, path: str) -> bool:
         """
@@ -186,4 +209,115 @@ class UttResult(ResultInterface):
         except Exception as e:
             logger.error(e, exc_info=e)
             return False
-    
+
+    def _get_one(self, name: str) -> Union[UtteranceTable, List[UttDict]]:
+        """ return the result of one file, from memory if it is not spilled """
+        with self._lock:
+            if name in self.data:
+                return self.data[name]
+            if name in self._read_cache:
+                self._read_cache.move_to_end(name)
+                return self._read_cache[name]
+            path = self.filenames[name]
+        with open(path, "rb") as f:
+            result = pickle.load(f)
+        with self._lock:
+            self._cache_read(name, result)
+        return result
+
+    def _get_dicts(self, name: str, copy: bool = True) -> List[UttDict]:
+        """ return the result of one file as dictionaries, which are kept
+            while the result is in memory or in the read cache, each caller
+            gets copies of the dictionaries unless copy is false and the
+            caller does not modify them
+        """
+        with self._lock:
+            dicts = self._dicts.get(name)
+            version = self._versions.get(name)
+        if dicts is None:
+            dicts = self._to_dicts(self._get_one(name))
+            with self._lock:
+                held = name in self.data or name in self._read_cache
+                if held and self._versions.get(name) == version:
+                    dicts = self._dicts.setdefault(name, dicts)
+        return [dict(utt) for utt in dicts] if copy else dicts
+
+    def _cache_read(self, name: str, result: Union[UtteranceTable, List[UttDict]]) -> None:
+        """ keep a spilled result that is read, drop the least recently read
+            results once the read cache is full
+        """
+        if name not in self.filenames or name in self._read_cache:
+            return
+        size = self._sizes.get(name, 0)
+        if size > self.read_cache_size:
+            return
+        self._read_cache[name] = result
+        self._read_cache_bytes += size
+        while self._read_cache_bytes > self.read_cache_size:
+            old, _ = self._read_cache.popitem(last=False)
+            self._read_cache_bytes -= self._sizes.get(old, 0)
+            self._dicts.pop(old, None)
+
+    def _spill_if_needed(self) -> None:
+        """ write the largest results in memory to disk until the results
+            in memory fit in the memory budget
+        """
+        in_memory = sum(self._sizes[name] for name in self.data)
+        for name in sorted(self.data, key=self._sizes.get, reverse=True):
+            if in_memory <= self.max_size:
+                break
+            path = os.path.join(self.workspace, f"{name}.pickle")
+            with open(path, "wb") as f:
+                pickle.dump(self.data[name], f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.filenames[name] = path
+            in_memory -= self._sizes[name]
+            del self.data[name]
+            self._dicts.pop(name, None)
+            self.saved_to_disk = True
+            logger.info(f"transcription result of {name} is spilled to disk")
+
+    def _discard(self, name: str) -> None:
+        """ remove the previous result of the file """
+        if name in self._names:
+            self._names.remove(name)
+        self.data.pop(name, None)
+        self._dicts.pop(name, None)
+        self._versions[name] = self._versions.get(name, 0) + 1
+        if name in self._read_cache:
+            del self._read_cache[name]
+            self._read_cache_bytes -= self._sizes.get(name, 0)
+        path = self.filenames.pop(name, None)
+        if path and is_file(path):
+            os.remove(path)
+        self._sizes.pop(name, None)
+
+    @staticmethod
+    def _to_table(result: List[UttDict]) -> Union[UtteranceTable, List[UttDict]]:
+        """ convert the utterances to a table, utterances with fields that
+            the table does not store are kept as they are
+        """
+        if isinstance(result, UtteranceTable):
+            return result
+        try:
+            return UtteranceTable.from_dicts(result)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"utterances are not stored as a table: {e}")
+            return result
+
+    @staticmethod
+    def _to_dicts(result: Union[UtteranceTable, List[UttDict]]) -> List[UttDict]:
+        if isinstance(result, UtteranceTable):
+            return result.to_dicts()
+        return result
+
+    @staticmethod
+    def _estimate_size(result: Union[UtteranceTable, List[UttDict]]) -> int:
+        """ return the approximate memory used by the utterances """
+        if isinstance(result, UtteranceTable):
+            return result.nbytes
+        size = sys.getsizeof(result)
+        for utt in result:
+            size += sys.getsizeof(utt)
+            for value in utt.values():
+                size += sys.getsizeof(value)
+        return size
@@ -17,5 +17,12 @@ class EngineSettingInterface(BaseModel):
         """
         d = self.dict()["transcribe"]
         return d
+
+    def validate(self) -> bool:
+        """
+            check that the engine accepts the credentials in the setting,
+            engines without credentials are always valid
+        """
+        return True
     
  
\ No newline at end of file
@@ -1,9 +1,12 @@
 import os
+import filecmp
+import hashlib
 from pydantic import BaseModel, ValidationError
 from typing import Dict, Union
 from .engineSettingInterface import EngineSettingInterface
+from .validationCache import VALIDATION_CACHE
 from gailbot.core.utils.logger import makelogger
-from gailbot.core.engines.google import Google
+from gailbot.core.engines.engineManager import EngineManager
 from gailbot.core.utils.general import copy, is_file, is_directory, make_dir, get_name, get_extension
 from gailbot.configs import  workspace_config_loader
 
@@ -30,12 +33,34 @@ class GoogleInterface(EngineSettingInterface):
     engine: str 
     init: Init = None 
     transcribe: Transcribe = None 
+
+    def validate(self) -> bool:
+        return validate_google_api(self.init.google_api_key)
+
+def validate_google_api(google_api_key: str) -> bool:
+    """ check that google accepts the api key stored in the file, the result
+        is cached by the content of the file
+
+    Args:
+        google_api_key (str): the path to the file that stores the api key
+    """
+    if not is_file(google_api_key):
+        logger.error(f"the google api key file {google_api_key} does not exist")
+        return False
+    with open(google_api_key, "rb") as f:
+        key_digest = hashlib.sha256(f.read()).hexdigest()
+    google = EngineManager.engine_class("google")
+    return VALIDATION_CACHE.validate(
+        VALIDATION_CACHE.fingerprint("google", key_digest),
+        lambda: google.is_valid_google_api(google_api_key))
     
-def load_google_setting(setting: Dict[str, str]) -> Union[bool, EngineSettingInterface]:
+def load_google_setting(setting: Dict[str, str], validate: bool = True) -> Union[bool, EngineSettingInterface]:
     """ given a dictionary, load the dictionary as a google setting 
 
     Args:
         setting (Dict[str, str]): the dictionary that contains the setting data 
+        validate (bool): if true, check that the api key is valid, otherwise
+                         the key is checked when the setting is used
 
     Returns:
         Union[bool , SettingInterface]: if the setting dictionary is validated 
@@ -49,16 +74,22 @@ def load_google_setting(setting: Dict[str, str]) -> Union[bool, EngineSettingInt
         return False
     try:
         setting = setting.copy()
-        validate = ValidateGoogle(**setting)
+        validated = ValidateGoogle(**setting)
         if not is_directory(API_KEY_DIR):
             make_dir(API_KEY_DIR)
         
         # check that the api key is valid
-        assert Google.is_valid_google_api(setting["google_api_key"])
+        if validate:
+            assert validate_google_api(setting["google_api_key"])
         
-        # save a copied version of the api key file to the workspace
+        # save a copied version of the api key file to the workspace, the 
+        # copy is kept if the key file is unchanged or no longer exists
         copied_api = os.path.join(API_KEY_DIR, get_name(setting["google_api_key"]) + ".json")
-        setting["google_api_key"] = copy(setting["google_api_key"], copied_api)
+        if not is_file(copied_api) or (
+            is_file(setting["google_api_key"])
+            and not filecmp.cmp(setting["google_api_key"], copied_api, shallow=False)):
+            copy(setting["google_api_key"], copied_api)
+        setting["google_api_key"] = copied_api
     
         google_set = dict ()
         google_set["engine"] = setting.pop("engine")
@@ -0,0 +1,79 @@
+import time
+import hashlib
+from threading import Lock
+from typing import Callable, Dict
+
+from gailbot.core.utils.logger import makelogger
+from gailbot.configs import service_config_loader
+
+logger = makelogger("validation_cache")
+
+TTL_S = service_config_loader().engine_validation.ttl_s
+
+
+class ValidationCache:
+    """
+    Remembers the engine credentials that were validated successfully, so
+    that the same credentials are not validated again over the network until
+    the validation expires. The credentials are identified by a fingerprint,
+    the credentials themselves are not stored. Failed validations are not
+    remembered, so credentials that failed because the engine could not be
+    reached are validated again on the next use.
+    """
+
+    def __init__(self, ttl: float = TTL_S, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            ttl (float): the number of seconds a successful validation is reused
+            clock (Callable[[], float]): returns the current time in seconds
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self._expiry: Dict[str, float] = dict()
+        self._lock = Lock()
+
+    @staticmethod
+    def fingerprint(*credentials: str) -> str:
+        """return a fingerprint that identifies the credentials"""
+        credential_hash = hashlib.sha256()
+        for credential in credentials:
+            credential_hash.update(f"{credential}\0".encode())
+        return credential_hash.hexdigest()
+
+    def validate(self, fingerprint: str, check: Callable[[], bool]) -> bool:
+        """return true if the credentials identified by the fingerprint were
+        validated before the validation expired, otherwise run check to
+        validate them
+
+        Args:
+            fingerprint (str): the fingerprint of the credentials
+            check (Callable[[], bool]): validates the credentials
+        """
+        with self._lock:
+            expiry = self._expiry.get(fingerprint)
+            if expiry is not None and self.clock() < expiry:
+                return True
+        try:
+            valid = bool(check())
+        except Exception as e:
+            logger.error(f"failed to validate the engine credentials: {e}", exc_info=e)
+            valid = False
+        with self._lock:
+            if valid:
+                self._expiry[fingerprint] = self.clock() + self.ttl
+            else:
+                self._expiry.pop(fingerprint, None)
+        return valid
+
+    def invalidate(self, fingerprint: str = None) -> None:
+        """forget the validation of the credentials, or of all credentials if
+        fingerprint is None
+        """
+        with self._lock:
+            if fingerprint is None:
+                self._expiry.clear()
+            else:
+                self._expiry.pop(fingerprint, None)
+
+
+VALIDATION_CACHE = ValidationCache()
@@ -1,9 +1,10 @@
 from pydantic import BaseModel, ValidationError
 from typing import Dict, Union
 from .engineSettingInterface import EngineSettingInterface
+from .validationCache import VALIDATION_CACHE
 from gailbot.core.utils.logger import makelogger
 from gailbot.core.utils.download import is_internet_connected
-from gailbot.core.engines import Watson
+from gailbot.core.engines.engineManager import EngineManager
 logger = makelogger("watson_interface")
 
 class ValidateWatson(BaseModel):
@@ -35,12 +36,25 @@ class WatsonInterface(EngineSettingInterface):
     def engine(self):
         return "watson"
 
+    def validate(self) -> bool:
+        return validate_watson_api(self.init.apikey, self.init.region)
+
+def validate_watson_api(apikey: str, region: str) -> bool:
+    """ check that watson accepts the api key in the region, the result is
+        cached by the api key and region
+    """
+    watson = EngineManager.engine_class("watson")
+    return VALIDATION_CACHE.validate(
+        VALIDATION_CACHE.fingerprint("watson", apikey, region),
+        lambda: is_internet_connected() and watson.valid_init_kwargs(apikey, region))
     
-def load_watson_setting(setting: Dict[str, str]) -> Union[bool, EngineSettingInterface]:
+def load_watson_setting(setting: Dict[str, str], validate: bool = True) -> Union[bool, EngineSettingInterface]:
     """ given a dictionary, load the dictionary as a watson setting 
 
     Args:
         setting (Dict[str, str]): the dictionary that contains the setting data 
+        validate (bool): if true, check that the api key is valid, otherwise
+                         the key is checked when the setting is used
 
     Returns:
         Union[bool , SettingInterface]: if the setting dictionary is validated 
@@ -49,13 +63,13 @@ def load_watson_setting(setting: Dict[str, str]) -> Union[bool, EngineSettingInt
                                         as an instance of SettingInterface, 
                                         else return false
     """ 
-    if "engine" not in setting.keys() or setting["engine"] != "watson" or not is_internet_connected():
+    if "engine" not in setting.keys() or setting["engine"] != "watson":
         return False
     try:
         logger.info(setting)
         setting = setting.copy()
-        validate = ValidateWatson(**setting)
-        logger.info(validate)
+        validated = ValidateWatson(**setting)
+        logger.info(validated)
         watson_set = dict()
         watson_set["engine"] = setting.pop("engine")
         watson_set["init"] = dict()
@@ -65,7 +79,8 @@ def load_watson_setting(setting: Dict[str, str]) -> Union[bool, EngineSettingInt
         watson_set["transcribe"].update(setting)
         logger.info(watson_set)
         watson_set = WatsonInterface(**watson_set)
-        assert Watson.valid_init_kwargs(watson_set.init.apikey, watson_set.init.region)
+        if validate:
+            assert watson_set.validate()
         return watson_set
     except ValidationError as e:
         logger.error(e, exc_info=e)
@@ -22,11 +22,12 @@ class WhisperInterface(EngineSettingInterface):
     init: Init = None 
     engine: str 
 
-def load_whisper_setting(setting: Dict[str, str]) -> Union[bool, EngineSettingInterface]:
+def load_whisper_setting(setting: Dict[str, str], validate: bool = True) -> Union[bool, EngineSettingInterface]:
     """ given a dictionary, load the dictionary as a whisper setting 
 
     Args:
         setting (Dict[str, str]): the dictionary that contains the setting data 
+        validate (bool): unused, whisper does not need credentials
 
     Returns:
         Union[bool , SettingInterface]: if the setting dictionary is validated 
@@ -41,7 +42,7 @@ def load_whisper_setting(setting: Dict[str, str]) -> Union[bool, EngineSettingIn
     try:
         logger.info(setting)
         setting = setting.copy()
-        validate = ValidateWhisper(**setting)
+        validated = ValidateWhisper(**setting)
         whisper_set = dict()
         whisper_set["engine"] = setting.pop("engine")
         whisper_set["init"] = dict()
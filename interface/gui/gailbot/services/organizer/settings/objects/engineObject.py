@@ -21,17 +21,20 @@ class EngineSetObj():
     name: str     = None                   
     valid_interfaces = [load_whisper_setting, load_google_setting, load_watson_setting] 
      
-    def __init__(self, setting: Dict[str, str], name: str) -> None:
+    def __init__(self, setting: Dict[str, str], name: str, validate: bool = True) -> None:
         """ initializing an engine 
 
         Args:
             setting (Dict[str, str]): engine setting data stored in a dictionary
             name (str): the name of the engine setting 
+            validate (bool): if true, check the engine credentials now, 
+                             otherwise they are checked when the setting
+                             is used
         """ 
         self.applied_in_profiles = set() # a set of profiles that applied this engine setting
         self.name = name
         logger.info("initialize the setting object")
-        assert self._load_engine_setting(setting)
+        assert self._load_engine_setting(setting, validate)
         self.data = setting
         self.engine = self.engine_setting.engine 
     
@@ -40,6 +43,13 @@ class EngineSetObj():
     
     def get_transcribe_kwargs(self):
         return self.engine_setting.get_transcribe_kwargs()
+
+    def validate(self) -> bool:
+        """
+        Checks that the engine accepts the credentials of the setting, 
+        a successful check is reused for the same credentials until it expires
+        """
+        return self.engine_setting.validate()
     
     def get_name(self):
         """
@@ -110,12 +120,13 @@ class EngineSetObj():
     def add_applied_profile(self, profile_name):
         self.applied_in_profiles.add(profile_name)
      
-    def _load_engine_setting(self, setting : Dict[str, str]) -> bool:
+    def _load_engine_setting(self, setting : Dict[str, str], validate: bool = True) -> bool:
         """
         Loads the engine settings
 
         Args:
             setting : List[str]: settings to load
+            validate : bool: if true, check the engine credentials
 
         Returns:
             bool: true if successfully loaded, false if not
@@ -123,7 +134,7 @@ class EngineSetObj():
         logger.info("initialize the engine setting")
         for option in self.valid_interfaces:
             logger.info(option)
-            set_obj = option(setting)
+            set_obj = option(setting, validate)
             if isinstance(set_obj, EngineSettingInterface):
                 self.engine_setting = set_obj
                 return True
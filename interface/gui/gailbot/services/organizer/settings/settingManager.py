@@ -8,6 +8,7 @@
 
 
 from typing import Dict, Union, List
+from functools import partial
 import os
 
 from .objects import SettingDict, SettingObject, PluginSuiteSetObj, EngineSetObj
@@ -58,9 +59,11 @@ class SettingManager():
             make_dir(self.engine_set_space)
             
         if load_exist: 
+            # the credentials of the stored engine settings are validated 
+            # when a setting is used, so loading does not wait on the engines
             engine_files = filepaths_in_dir(self.engine_set_space, ["toml"])
             for file in engine_files:
-                self.load_set_from_file(file, self.add_new_engine)
+                self.load_set_from_file(file, partial(self.add_new_engine, validate=False))
                 
             setting_files = filepaths_in_dir(self.workspace, ["toml"])
             for file in setting_files:
@@ -99,7 +102,7 @@ class SettingManager():
         """
         return list(self.engine_settings.keys())
 
-    def add_new_engine(self, name, engine:Dict[str, str], overwrite: bool = False):
+    def add_new_engine(self, name, engine:Dict[str, str], overwrite: bool = False, validate: bool = True):
         """add a new engine setting
 
         Args:
@@ -110,6 +113,9 @@ class SettingManager():
             
             overwrite (bool, optional): if True, overwrite the existing engine s
                                         etting with the same name. Defaults to False.
+            validate (bool, optional): if True, check the engine credentials 
+                                       now, otherwise they are checked when 
+                                       the setting is used. Defaults to True.
 
         Raises:
             ExistingSettingName: if the engine setting name has been taken, and overwrite is set to False
@@ -120,7 +126,7 @@ class SettingManager():
         if self.is_engine_setting(name) and (not overwrite): 
             raise ExistingSettingName(name)
         try:
-            setting: EngineSetObj = EngineSetObj(engine, name)
+            setting: EngineSetObj = EngineSetObj(engine, name, validate)
             assert setting.engine_setting
             self.engine_settings[name] = setting
             self.save_engine_setting(name)
@@ -180,6 +186,8 @@ class SettingManager():
         """
         try:
             out_path = self.get_engine_src_path(name)
+            if self._is_saved(out_path, self.engine_settings[name].get_setting_dict()):
+                return out_path
             if is_file(out_path):
                 delete(out_path)
             self.engine_settings[name].save_setting(out_path)
@@ -459,6 +467,8 @@ class SettingManager():
         """ 
         try: 
             out_path = self.get_profile_src_path(name)
+            if self._is_saved(out_path, self.profiles[name].get_data()):
+                return out_path
             if is_file(out_path):
                 delete(out_path)
             self.profiles[name].save_setting(out_path) 
@@ -497,7 +507,17 @@ class SettingManager():
             an existing setting file
         """
         return os.path.join(self.workspace, name + ".toml")
-    
+
+    def _is_saved(self, path: str, data: Dict) -> bool:
+        """ return true if the file at path already stores the data, so that
+            an unchanged setting is not written again
+        """
+        try:
+            return is_file(path) and read_toml(path) == data
+        except Exception as e:
+            logger.warning(f"cannot read the saved setting {path}: {e}")
+            return False
+
     def delete_all_settings(self) -> bool:
         """ delete all settings 
 
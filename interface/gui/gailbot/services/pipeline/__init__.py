@@ -1 +1,2 @@
-from .pipeline import PipelineService
\ No newline at end of file
+from .pipeline import PipelineService
+from .transcriptionCache import TranscriptionCache
\ No newline at end of file
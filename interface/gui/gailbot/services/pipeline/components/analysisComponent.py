@@ -1,10 +1,17 @@
 import time
 import os
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Tuple, Union
 from gailbot.core.utils.general import copy, get_name
 from gailbot.core.utils.logger import makelogger
 from gailbot.core.pipeline import Component, ComponentState, ComponentResult
 from gailbot.core.utils.threads import ThreadPool
+from gailbot.core.utils.executors import (
+    Backend,
+    TaskEnvelope,
+    make_executor,
+    get_worker_state
+)
+from threading import Lock
 
 from gailbot.plugins import PluginManager, PluginSuite
 from gailbot.services.converter.result import  ProcessingStats
@@ -15,8 +22,23 @@ from gailbot.configs import service_config_loader
 
 
 NUM_THREAD = service_config_loader().thread.analysis_num_threads
+EXECUTOR_CONFIG = service_config_loader().executor
 logger = makelogger("analysisComponent")
 
+def apply_suite(
+    dict_conf: Dict, source_path: str, methods: GBPluginMethods
+) -> Tuple[Dict[str, ComponentState], Union[str, None]]:
+    """ apply a plugin suite in a worker process, the suite and its modules
+        are loaded the first time the worker uses the suite, returns the
+        result of the suite and the path to the audio merged by the suite
+    """
+    suites = get_worker_state().setdefault("plugin_suites", dict())
+    key = (source_path, dict_conf["suite_name"])
+    if key not in suites:
+        suites[key] = PluginSuite(dict_conf, source_path)
+    result = suites[key](base_input = None, methods = methods)
+    return result, methods.payload.merged_audio_path
+
 class PluginError(Exception):
     def __init__(self, msg) -> None:
         self.msg = msg 
@@ -30,8 +52,15 @@ class AnalysisComponent(Component):
     """ Responsible for running plugin after gailbot has obtained the
         transcription result 
     """
-    def __init__(self, plugin_manager: PluginManager):
+    def __init__(
+        self,
+        plugin_manager: PluginManager,
+        backend: str = EXECUTOR_CONFIG.analysis_backend
+    ):
         self.plugin_manager = plugin_manager
+        self.backend = backend
+        self._process_pool = None
+        self._process_pool_lock = Lock()
         
     def __repr__(self):
         return "Analysis Component"
@@ -80,6 +109,9 @@ class AnalysisComponent(Component):
             )
 
     def analyze_payload(self, payload: PayLoadObject):
+        if payload.failed:
+            logger.info(f"skip analysis of failed payload {payload.name}")
+            return True
         logger.info("start analyzing payload")
         self.emit_progress(payload, ProgressMessage.Analyzing)
         start_time = time.time()
@@ -110,7 +142,7 @@ class AnalysisComponent(Component):
                 # create a method that get passed to plugin suite, and apply plugin suite
                 method = GBPluginMethods(payload, suite_name)
                 # calls the plugin suite 
-                res : Dict[str, ComponentState] = plugin_suite(base_input = None, methods = method)
+                res : Dict[str, ComponentState] = self._apply_suite(plugin_suite, method)
                 
                 # collect plugin suite result
                 logger.info(f"get the plugin result {res}")
@@ -144,6 +176,30 @@ class AnalysisComponent(Component):
             payload.set_analyzed()
             return True
         
+    def _apply_suite(
+        self, plugin_suite: PluginSuite, method: GBPluginMethods
+    ) -> Dict[str, ComponentState]:
+        """ apply the plugin suite on this thread, or in a worker process
+            when the process backend is used
+        """
+        if self.backend != Backend.process:
+            return plugin_suite(base_input = None, methods = method)
+        envelope = TaskEnvelope(
+            f"{__name__}:apply_suite",
+            args=(plugin_suite.dict_conf, plugin_suite.source_path, method))
+        result, merged_audio = self._get_process_pool().submit(envelope).result()
+        # the worker merged the audio into the output, it is not merged again
+        if merged_audio:
+            method.payload.merged_audio = merged_audio
+        return result
+
+    def _get_process_pool(self):
+        with self._process_pool_lock:
+            if not self._process_pool:
+                self._process_pool = make_executor(
+                    Backend.process, EXECUTOR_CONFIG.analysis_num_processes)
+            return self._process_pool
+
     def emit_progress(self, payload: PayLoadObject, msg: str):
         if payload.progress_display:
             payload.progress_display(msg)
@@ -26,12 +26,7 @@ class FormatComponent(Component):
             logger.info(f"format component is run, {len(payloads)} result will be formatted")
             logger.info(payloads)
             for payload in payloads:
-                logger.info(f"saving {payload.name} result to {payload.out_dir}")
-                if not payload.failed:
-                    payload.save()
-                    payload.set_formatted()
-                    # self.emit_progress(payload, ProgressMessage.Finished)
-                payload.clear_temporary_workspace()
+                self.format_payload(payload)
             
             assert dependency_res.state == ComponentState.SUCCESS    
             return ComponentResult(
@@ -49,6 +44,24 @@ class FormatComponent(Component):
                 runtime=0
             )
 
+    def format_payload(self, payload: PayLoadObject) -> bool:
+        """ save the result of a payload that did not fail, the temporary
+            workspace of the payload is cleared either way
+
+        Returns:
+            bool: return true once the payload is handled, an error is raised
+            if the result cannot be saved
+        """
+        logger.info(f"saving {payload.name} result to {payload.out_dir}")
+        try:
+            if not payload.failed:
+                payload.save()
+                payload.set_formatted()
+                # self.emit_progress(payload, ProgressMessage.Finished)
+        finally:
+            payload.clear_temporary_workspace()
+        return True
+
     def __repr__(self):
         return "Format component"
     
@@ -11,15 +11,35 @@ from typing import Any, List, Dict
 from gailbot.core.pipeline import Component, ComponentState, ComponentResult
 from gailbot.core.utils.general import get_name
 from gailbot.core.utils.threads import ThreadPool
+from gailbot.core.utils.executors import (
+    Backend,
+    TaskEnvelope,
+    make_executor,
+    get_worker_state
+)
 from gailbot.core.utils.logger import makelogger
 
 from ...converter.result import  ProcessingStats
 from ...converter.payload import PayLoadObject
 from ..components.progress import ProgressMessage
+from ..transcriptionCache import TranscriptionCache
 from gailbot.configs import service_config_loader
 logger = makelogger("transcribeComponent")
 
 DEFULT_NUM_THREAD = service_config_loader().thread.transcriber_num_threads
+EXECUTOR_CONFIG = service_config_loader().executor
+
+def warm_worker():
+    """ run once in each transcription worker process """
+    get_worker_state().setdefault("engine_manager", EngineManager())
+
+def transcribe_file(engine_name, init_kwargs, transcribe_kwargs) -> List[Dict[str, str]]:
+    """ transcribes a file in a worker process, the models loaded by the
+        engines are kept by the worker for later files
+    """
+    engine_manager = get_worker_state().setdefault("engine_manager", EngineManager())
+    engine = engine_manager.init_engine(engine_name, **init_kwargs)
+    return engine.transcribe(**transcribe_kwargs)
 
 class InvalidEngineError(Exception):
     def __init__(self, engine: str, *args) -> None:
@@ -28,15 +48,31 @@ class InvalidEngineError(Exception):
     def __repr__(self) -> str:
         return self.engine + "is not a valid engine"
 
+class InvalidCredentialError(Exception):
+    def __init__(self, engine: str, *args) -> None:
+        super().__init__(*args)
+        self.engine = engine
+    def __repr__(self) -> str:
+        return "the credentials of " + self.engine + " are not valid"
+
 class TranscribeComponent(Component):
     """
     Responsible for running the transcription process
     """
-    def __init__(self, num_thread : int = DEFULT_NUM_THREAD):
+    def __init__(
+        self,
+        num_thread : int = DEFULT_NUM_THREAD,
+        backend : str = EXECUTOR_CONFIG.transcription_backend,
+        cache : TranscriptionCache = None
+    ):
         self.engine_manager = EngineManager() # a wrapper class for managing
                                               # and transcribing payload using engine
         self.num_thread = num_thread
         self.is_transcribing = False
+        self.backend = backend
+        self.cache = cache
+        self._process_pool = None
+        self._process_pool_lock = threading.Lock()
 
     def __call__(self, dependency_output: Dict[str, ComponentResult]) -> Any:
         """
@@ -104,20 +140,39 @@ class TranscribeComponent(Component):
             )
       
 
+    def transcribe_payload(self, payload : PayLoadObject) -> bool:
+        """ transcribe a single payload on the calling thread, used when
+            payloads are streamed through the pipeline one at a time
+
+        Args:
+            payload (PayLoadObject): payload object that stores the datafiles
+
+        Returns:
+            bool: return True if the payload is transcribed, false otherwise
+        """
+        if payload.transcribed:
+            self._display_progress(payload, ProgressMessage.Finished)
+            return True
+        if self._transcribe_one_payload(payload):
+            payload.set_transcribed()
+            return True
+        payload.set_failure()
+        return False
+
     def _transcribe_one_payload(self, payload : PayLoadObject) -> bool:
         """ private function that transcribe each individual payload
 
         Args:
             payload (PayLoadObject): payload object that stores the datafiles
 
-        Raises:
-            InvalidEngineError:
-            raised when the engine setting uses an invalid engine
-
         Returns:
             : return True if the payload is transcribed successfully , false
-              otherwise
+              otherwise, including when the engine setting uses an invalid
+              engine or invalid credentials
         """
+        # created first so that the pool can be shut down on every failure
+        threadpool = ThreadPool(DEFULT_NUM_THREAD)
+        data_files = list()
         try:
             logger.info(f"Payload {payload} being transcribed")
             self._display_progress(payload, "Start transcribing")
@@ -139,16 +194,25 @@ class TranscribeComponent(Component):
             # check for valid engine engine
             if not self.engine_manager.is_engine(engine_name):
                 raise InvalidEngineError(engine_name)
+            # the credentials are validated when the setting is first used
+            if not payload.validate_engine_setting():
+                raise InvalidCredentialError(engine_name)
             
             # start to use engine to transcribe files in the payload
             utt_map = dict()
-            threadpool = ThreadPool(DEFULT_NUM_THREAD)
             
             # adding the task to transcribe individual file to the thread
             self._display_progress(payload, "Adding Task")
+            cache_keys = dict()
             for idx, file in enumerate(data_files):
                 transcribe_kwargs = copy.deepcopy(transcribe_kwargs)
                 transcribe_kwargs.update({"audio_path": file, "payload_workspace": transcribe_ws})
+
+                # reuse the result of a previous run on the same audio
+                cached = self._get_cached(engine_name, init_kwargs, transcribe_kwargs, cache_keys)
+                if cached is not None:
+                    utt_map[get_name(file)] = cached
+                    continue
                 filename = threadpool.add_task(
                     self._transcribe_single_file,
                     kwargs= {"engine_name" : engine_name,
@@ -167,7 +231,12 @@ class TranscribeComponent(Component):
 
             # get the task result
             for file in data_files:
-                utt_map[get_name(file)] = threadpool.get_task_result(get_name(file))
+                name = get_name(file)
+                if name in utt_map:
+                    continue
+                utt_map[name] = threadpool.get_task_result(name)
+                if name in cache_keys:
+                    self.cache.put(cache_keys[name], utt_map[name], source=file)
            
             
             # if the transcription result is returned successfully
@@ -191,6 +260,34 @@ class TranscribeComponent(Component):
             threadpool.shutdown(cancel_futures=True)
             return True
 
+    def _get_cached(
+        self,
+        engine_name : str,
+        init_kwargs : Dict[str, Any],
+        transcribe_kwargs : Dict[str, Any],
+        cache_keys : Dict[str, str]
+    ) -> List[Dict[str, str]]:
+        """ return the cached result of the file, or None if it has to be
+            transcribed, in which case its cache key is added to cache_keys
+        """
+        if not self.cache:
+            return None
+        audio_path = transcribe_kwargs["audio_path"]
+        try:
+            key = self.cache.make_key(
+                audio_path,
+                engine_name,
+                self.engine_manager.get_model_name(engine_name),
+                init_kwargs,
+                transcribe_kwargs)
+        except Exception as e:
+            logger.error(f"cannot compute the cache key of {audio_path}: {e}", exc_info=e)
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            cache_keys[get_name(audio_path)] = key
+        return cached
+
     def _log_progress(self):
         """display log messages
         """
@@ -211,10 +308,27 @@ class TranscribeComponent(Component):
         Return:
             the utterances result
         """
+        if self.backend == Backend.process:
+            envelope = TaskEnvelope(
+                f"{__name__}:transcribe_file",
+                args=(engine_name, init_kwargs, transcribe_kwargs))
+            return self._get_process_pool().submit(envelope).result()
         engine = self.engine_manager.init_engine(engine_name, **init_kwargs)
         utterances = engine.transcribe(**transcribe_kwargs)
         return utterances
 
+    def _get_process_pool(self):
+        """ the worker processes are started on first use and kept for the
+            lifetime of the component so that they stay warm
+        """
+        with self._process_pool_lock:
+            if not self._process_pool:
+                self._process_pool = make_executor(
+                    Backend.process,
+                    EXECUTOR_CONFIG.transcription_num_processes,
+                    initializers=[f"{__name__}:warm_worker"])
+            return self._process_pool
+
     def __repr__(self):
         return "Transcription Component"
 
@@ -227,6 +341,9 @@ class TranscribeComponent(Component):
         BAR_EMPTY = "  "  # Light shade
         # Determine the length of the progress bar (50 characters)
         bar_length = 20
+        # every file is already transcribed when no task is submitted
+        if total == 0:
+            finished = total = 1
         # Calculate the number of filled and empty blocks in the progress bar
         filled_blocks = int(finished / total * bar_length)
         percent = "..." if finished == 0 else '{:.2f}%'.format(finished / total * 100)
@@ -11,8 +11,13 @@ from gailbot.plugins import PluginManager
 from gailbot.core.utils.logger import makelogger
 from ..converter import PayLoadObject
 from .components import TranscribeComponent, AnalysisComponent, FormatComponent
+from .streaming import StreamingPipeline, Stage
+from .transcriptionCache import TranscriptionCache
+from gailbot.configs import service_config_loader
 
 logger = makelogger("service pipeline")
+PIPELINE_CONFIG = service_config_loader().pipeline
+THREAD_CONFIG = service_config_loader().thread
 class PipelineService:
     """
     Handles the higher level functionality of the pipeline
@@ -20,10 +25,24 @@ class PipelineService:
     def __init__(
         self,
         plugin_manager : PluginManager,
-        num_threads: int
+        num_threads: int,
+        streaming: bool = PIPELINE_CONFIG.streaming,
+        transcription_cache: TranscriptionCache = None
     ):
+        """
+        Args:
+            plugin_manager (PluginManager): provides the plugin suites
+            num_threads (int): the number of threads used by the pipeline
+            streaming (bool): if true, each payload moves on to the next
+                stage as soon as it finishes the current one, otherwise every
+                payload finishes a stage before the next stage starts
+            transcription_cache (TranscriptionCache, optional): if given,
+                files that were transcribed before with the same settings
+                reuse the previous result
+        """
+        self.streaming = streaming
 
-        transcribeComponent = TranscribeComponent()
+        transcribeComponent = TranscribeComponent(cache=transcription_cache)
         analysisComponent = AnalysisComponent(plugin_manager)
         formatComponent = FormatComponent()
 
@@ -41,6 +60,18 @@ class PipelineService:
             num_threads = num_threads  
         )
 
+        self.streaming_pipeline = StreamingPipeline(
+            stages=[
+                Stage("transcription", transcribeComponent.transcribe_payload,
+                      THREAD_CONFIG.transcriber_num_threads),
+                Stage("analysis", analysisComponent.analyze_payload,
+                      THREAD_CONFIG.analysis_num_threads),
+                Stage("format", formatComponent.format_payload,
+                      THREAD_CONFIG.payload_num_threads)
+            ],
+            queue_size=PIPELINE_CONFIG.queue_size
+        )
+
     def __call__(self, payloads : List[PayLoadObject]) -> List[str]:
         """
         Creates and validates a pipeline from a list of payload objects
@@ -51,6 +82,9 @@ class PipelineService:
         Return: 
             return a list of payload object that fails to be transcribed
         """
+        if self.streaming:
+            return self._stream(payloads)
+
         res = self.pipeline(
             base_input= payloads
         )
@@ -66,4 +100,17 @@ class PipelineService:
         
         return fails
 
-        
+    def _stream(self, payloads : List[PayLoadObject]) -> List[str]:
+        """
+        Runs every payload through the stages on its own, a payload that
+        fails a stage is marked as failed and skipped by the later stages
+
+        Return:
+            return a list of payload object that fails to be transcribed
+        """
+        def on_failure(payload : PayLoadObject, stage : str):
+            logger.warning(f"payload {payload.name} failed in {stage}")
+            payload.set_failure()
+
+        self.streaming_pipeline(payloads, on_failure=on_failure)
+        return [payload.name for payload in payloads if payload.failed]
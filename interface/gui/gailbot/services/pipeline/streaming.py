@@ -0,0 +1,133 @@
+from queue import Queue
+from threading import Thread, Lock
+from dataclasses import dataclass
+from typing import Any, Callable, List
+
+from gailbot.core.utils.logger import makelogger
+
+logger = makelogger("streaming_pipeline")
+
+# marks the end of the input of a stage
+_END = object()
+
+
+@dataclass
+class Stage:
+    """ one step of the streaming pipeline
+
+    Args:
+        name (str): the name of the stage
+        run (Callable[[Any], bool]): function that processes one item,
+            returns false if the item failed
+        num_workers (int): the number of items processed at the same time
+    """
+    name : str
+    run : Callable[[Any], bool]
+    num_workers : int = 1
+
+
+class StreamingPipeline:
+    """
+    Runs each item through a chain of stages on its own instead of waiting
+    for every item to finish a stage before the next stage starts. Stages are
+    connected by bounded queues, so a fast stage blocks once the next stage
+    falls behind. An item that fails a stage is handed to the following
+    stages as failed, every stage is responsible for skipping failed items.
+    """
+    def __init__(self, stages : List[Stage], queue_size : int = 4) -> None:
+        """
+        Args:
+            stages (List[Stage]): the stages, in the order they are run
+            queue_size (int): the maximum number of items waiting in front
+                of each stage
+        """
+        assert stages, "streaming pipeline requires at least one stage"
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+
+    def __call__(
+        self,
+        items : List[Any],
+        on_failure : Callable[[Any, str], None] = None
+    ) -> List[Any]:
+        """ run the items through every stage
+
+        Args:
+            items (List[Any]): the items to be processed
+            on_failure (Callable, optional): called with the item and the
+                name of the stage when a stage fails on an item
+
+        Returns:
+            List[Any]: the items in the order they finished the last stage
+        """
+        queues = [Queue(maxsize=self.queue_size) for _ in self.stages]
+        finished = []
+        workers : List[List[Thread]] = []
+
+        for idx, stage in enumerate(self.stages):
+            last_stage = idx + 1 == len(self.stages)
+            out_queue = None if last_stage else queues[idx + 1]
+            num_next = 0 if last_stage else self._num_workers(self.stages[idx + 1])
+            remaining, remaining_lock = [self._num_workers(stage)], Lock()
+            threads = [
+                Thread(
+                    target=self._work,
+                    args=(stage, queues[idx], out_queue, num_next, finished,
+                          remaining, remaining_lock, on_failure),
+                    name=f"{stage.name}-{i}",
+                    daemon=True)
+                for i in range(remaining[0])]
+            workers.append(threads)
+            for thread in threads:
+                thread.start()
+
+        # feeding blocks while the first stage is busy
+        for item in items:
+            queues[0].put(item)
+        for _ in workers[0]:
+            queues[0].put(_END)
+
+        for threads in workers:
+            for thread in threads:
+                thread.join()
+        return finished
+
+    ################ PRIVATE METHODS
+    def _work(
+        self,
+        stage : Stage,
+        in_queue : Queue,
+        out_queue : Queue,
+        num_next : int,
+        finished : List[Any],
+        remaining : List[int],
+        remaining_lock : Lock,
+        on_failure : Callable[[Any, str], None]
+    ) -> None:
+        while True:
+            item = in_queue.get()
+            if item is _END:
+                break
+            try:
+                success = stage.run(item)
+            except Exception as e:
+                logger.error(f"stage {stage.name} failed on {item}: {e}", exc_info=e)
+                success = False
+            if not success and on_failure:
+                on_failure(item, stage.name)
+            if out_queue is not None:
+                out_queue.put(item)
+            else:
+                finished.append(item)
+
+        # the last worker of a stage closes the input of the next stage
+        with remaining_lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and out_queue is not None:
+            for _ in range(num_next):
+                out_queue.put(_END)
+
+    @staticmethod
+    def _num_workers(stage : Stage) -> int:
+        return max(1, stage.num_workers)
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import hashlib
+from threading import Lock
+from typing import Any, Dict, List, Tuple, Union
+
+from gailbot.core.utils.general import (
+    is_directory,
+    is_file,
+    make_dir,
+    delete,
+    read_json,
+    write_json
+)
+from gailbot.core.utils.logger import makelogger
+
+logger = makelogger("transcription_cache")
+
+_MB = 1024 * 1024
+_HASH_CHUNK = 4 * _MB
+# settings that locate the files of one run, not what is transcribed
+_EXCLUDED_SETTINGS = {"audio_path", "payload_workspace"}
+
+
+def hash_audio(path : str) -> str:
+    """ return the content hash of the audio file """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Persistent cache of transcription results. An entry is keyed by the
+    content of the audio file together with the engine, the model and the
+    engine settings, so a file is only transcribed again when one of them
+    changes. Entries are stored as json files and the least recently used
+    entries are removed once the cache exceeds its size limit.
+    """
+    def __init__(self, cache_dir : str, max_size_mb : float = 1024) -> None:
+        """
+        Args:
+            cache_dir (str): the directory where the results are stored
+            max_size_mb (float): the maximum size of the cache on disk
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_size_mb * _MB
+        if not is_directory(cache_dir):
+            make_dir(cache_dir)
+        self._lock = Lock()
+        # content hashes of files that were already read, keyed by the file
+        # path, size and modification time
+        self._audio_hashes : Dict[Tuple, str] = dict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def make_key(
+        self,
+        audio_path : str,
+        engine : str,
+        model : str,
+        init_kwargs : Dict[str, Any],
+        transcribe_kwargs : Dict[str, Any]
+    ) -> str:
+        """ given the audio and the settings used to transcribe it, return
+            the key that identifies the transcription result
+
+        Returns:
+            str: the cache key
+        """
+        settings = {k: v for k, v in transcribe_kwargs.items()
+                    if k not in _EXCLUDED_SETTINGS}
+        identity = json.dumps(
+            [self._audio_hash(audio_path), engine, model, init_kwargs, settings],
+            sort_keys=True, default=str)
+        return hashlib.blake2b(identity.encode(), digest_size=20).hexdigest()
+
+    def get(self, key : str) -> Union[List[Dict], None]:
+        """ return the cached utterances, None if the key is not cached """
+        path = self._entry_path(key)
+        try:
+            entry = read_json(path)
+            os.utime(path)
+        except Exception:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        logger.info(f"transcription cache hit for {entry['source']}")
+        return entry["utterances"]
+
+    def put(self, key : str, utterances : List[Dict], source : str = "") -> bool:
+        """ store the utterances under the key, and evict old entries if
+            the cache is larger than its limit
+
+        Args:
+            key (str): the key returned by make_key
+            utterances (List[Dict]): the transcription result
+            source (str): name of the transcribed file, for inspection only
+
+        Returns:
+            bool: true if the result is stored
+        """
+        path = self._entry_path(key)
+        try:
+            make_dir(os.path.dirname(path), overwrite=False)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            write_json(tmp_path, {
+                "source": source,
+                "created": time.time(),
+                "utterances": utterances
+            })
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"failed to cache the transcription of {source}: {e}", exc_info=e)
+            return False
+        self._evict_if_needed()
+        return True
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """ return the key, source file, size and last access time of every
+            cached result, most recently used first
+        """
+        result = []
+        for key, path, size, accessed in self._scan():
+            try:
+                source = read_json(path).get("source", "")
+            except Exception:
+                source = ""
+            result.append({"key": key, "source": source,
+                           "size_bytes": size, "last_used": accessed})
+        return sorted(result, key=lambda e: e["last_used"], reverse=True)
+
+    def info(self) -> Dict[str, Any]:
+        """ return the number of entries, the size and the hit rate """
+        entries = self._scan()
+        with self._lock:
+            stats = dict(self._stats)
+        stats["entries"] = len(entries)
+        stats["size_mb"] = sum(size for _, _, size, _ in entries) / _MB
+        stats["max_size_mb"] = self.max_bytes / _MB
+        return stats
+
+    def remove(self, key : str) -> bool:
+        """ remove one cached result, return true if it existed """
+        path = self._entry_path(key)
+        if not is_file(path):
+            return False
+        return delete(path) is not False
+
+    def purge(self, older_than_sec : float = None) -> int:
+        """ remove cached results
+
+        Args:
+            older_than_sec (float, optional): only remove the results that
+                were not used in this many seconds, remove all if None
+
+        Returns:
+            int: the number of removed results
+        """
+        now = time.time()
+        removed = 0
+        for _, path, _, accessed in self._scan():
+            if older_than_sec is None or now - accessed > older_than_sec:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError as e:
+                    logger.error(e, exc_info=e)
+        logger.info(f"purged {removed} transcription results")
+        return removed
+
+    ################ PRIVATE METHODS
+    def _audio_hash(self, path : str) -> str:
+        stat = os.stat(path)
+        identity = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if identity in self._audio_hashes:
+                return self._audio_hashes[identity]
+        digest = hash_audio(path)
+        with self._lock:
+            self._audio_hashes[identity] = digest
+        return digest
+
+    def _entry_path(self, key : str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _scan(self) -> List[Tuple[str, str, int, float]]:
+        """ return (key, path, size, last access time) for every entry """
+        entries = []
+        if not is_directory(self.cache_dir):
+            return entries
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.name[:-len(".json")], entry.path,
+                                stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        entries = self._scan()
+        total = sum(size for _, _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for key, path, size, _ in sorted(entries, key=lambda e: e[3]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                with self._lock:
+                    self._stats["evictions"] += 1
+                logger.info(f"evicted transcription result {key}")
+            except OSError:
+                continue
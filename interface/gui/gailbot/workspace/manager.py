@@ -23,6 +23,7 @@ class WorkspaceManager:
         self.user_root:      str = user_root
         self.setting_src:    str = self.path_config.gailbot_data.setting_src
         self.plugin_src:     str = self.path_config.gailbot_data.plugin_src
+        self.transcription_cache: str = self.path_config.gailbot_data.transcription_cache
         self.tempspace_root: str = self.path_config.tempspace_root
         self.file_extension      = self.path_config.file_extension
 
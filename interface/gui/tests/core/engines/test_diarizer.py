@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+import pytest
+
+from gailbot.core.engines.whisperEngine.diarization import diarize
+from gailbot.core.utils.general import write_yaml
+
+
+class FakeHub:
+    """ stands in for the hugging face hub, files that are already in the
+        cache are returned without counting a network request
+    """
+    def __init__(self, root):
+        self.root = root
+        self.network_requests = 0
+
+    def __call__(self, repo_id, filename, cache_dir, local_files_only=False, **kwargs):
+        path = os.path.join(cache_dir, repo_id.replace("/", "--"), filename)
+        if os.path.exists(path):
+            return path
+        if local_files_only:
+            raise FileNotFoundError(path)
+        self.network_requests += 1
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_yaml(path, {"pipeline": {"params": {"segmentation": None}}}, overwrite=True)
+        return path
+
+
+class FakePipeline:
+    loaded = 0
+
+    @classmethod
+    def from_pretrained(cls, path):
+        cls.loaded += 1
+        return lambda audio_path: f"diarized {audio_path}"
+
+
+@pytest.fixture
+def hub(tmp_path, monkeypatch):
+    hub = FakeHub(tmp_path)
+    FakePipeline.loaded = 0
+    monkeypatch.setattr(diarize, "hf_hub_download", hub)
+    monkeypatch.setattr(diarize, "Pipeline", FakePipeline)
+    monkeypatch.setattr(diarize, "_DIARIZERS", dict())
+    return hub
+
+
+def test_diarizer_is_shared(hub, tmp_path):
+    first = diarize.get_diarizer(str(tmp_path))
+    second = diarize.get_diarizer(str(tmp_path))
+    assert first is second
+    assert FakePipeline.loaded == 1
+    assert first("audio.wav") == "diarized audio.wav"
+
+
+def test_cached_files_skip_network(hub, tmp_path):
+    diarize.PyannoteDiarizer(str(tmp_path))
+    assert hub.network_requests == 2
+    diarize.PyannoteDiarizer(str(tmp_path))
+    assert hub.network_requests == 2
+
+
+def test_pipelines_are_pooled(hub, tmp_path, monkeypatch):
+    running = []
+    release = threading.Event()
+
+    class BlockingPipeline(FakePipeline):
+        @classmethod
+        def from_pretrained(cls, path):
+            pipeline = super().from_pretrained(path)
+            def run(audio_path):
+                running.append(audio_path)
+                release.wait(5)
+                return pipeline(audio_path)
+            return run
+
+    monkeypatch.setattr(diarize, "Pipeline", BlockingPipeline)
+    diarizer = diarize.PyannoteDiarizer(str(tmp_path), pool_size=2)
+    threads = [threading.Thread(target=diarizer, args=(f"{i}.wav",))
+               for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for _ in range(100):
+        if len(running) == 2:
+            break
+        time.sleep(0.01)
+    time.sleep(0.1)
+    assert len(running) == 2
+    assert BlockingPipeline.loaded == 2
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(running) == 3
+    assert BlockingPipeline.loaded == 2
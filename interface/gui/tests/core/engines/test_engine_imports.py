@@ -0,0 +1,52 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from gailbot.core.engines.engineManager import EngineManager
+
+# modules that are only needed once an engine is used
+HEAVY_MODULES = ["torch", "pyannote.audio", "whisper", "ibm_watson", "google.cloud.speech"]
+# the cumulative import time of gailbot reported by python -X importtime
+IMPORT_BUDGET_S = 3.0
+GUI_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+def run_python(code, *flags):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=GUI_ROOT,
+        capture_output=True, text=True, timeout=300)
+
+
+@pytest.mark.parametrize("module", [
+    "gailbot",
+    "gailbot.core.engines.engineManager",
+    "gailbot.services.organizer.settings.interface.googleInterface",
+    "gailbot.services.organizer.settings.interface.watsonInterface",
+])
+def test_no_engine_imported(module):
+    result = run_python(
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_import_time_budget():
+    result = run_python("import gailbot", "-X", "importtime")
+    assert result.returncode == 0, result.stderr
+    cumulative = [int(line.split("|")[1]) for line in result.stderr.splitlines()
+                  if line.startswith("import time:") and line.split("|")[-1].strip() == "gailbot"]
+    assert cumulative
+    assert cumulative[-1] / 1e6 < IMPORT_BUDGET_S
+
+
+def test_engine_resolved_on_first_use():
+    assert set(EngineManager().available_engines()) == {"watson", "google", "whisper"}
+    google = EngineManager.engine_class("google")
+    from gailbot.core.engines import Google
+    assert google is Google
+    assert EngineManager().is_loaded("google")
+    with pytest.raises(KeyError):
+        EngineManager.engine_class("unknown")
@@ -0,0 +1,126 @@
+import time
+import wave
+import random
+import threading
+
+import pytest
+from google.api_core import exceptions as api_exceptions
+from google.cloud.speech_v1p1beta1.types import cloud_speech
+
+from gailbot.core.engines.google.core import GoogleCore
+from gailbot.core.engines.google.dispatcher import ChunkDispatcher
+from gailbot.core.utils.media import AudioChunk
+
+
+class StubRecognizeClient:
+    """ local stand in for the google speech client, every chunk is
+        recognized as one word named after the chunk file, and the first
+        request of every chunk in fail_once is rejected as unavailable
+    """
+    def __init__(self, fail_once = ()):
+        self.fail_once = set(fail_once)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    def recognize(self, config, audio):
+        name = audio.content.decode()
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = name in self.fail_once
+            self.fail_once.discard(name)
+        try:
+            time.sleep(random.uniform(0.01, 0.05))
+            if fail:
+                raise api_exceptions.ServiceUnavailable("try again")
+            return cloud_speech.RecognizeResponse(results=[{"alternatives": [{
+                "transcript": name,
+                "words": [{"word": name, "speaker_tag": 1,
+                           "start_time": {"seconds": 1}, "end_time": {"seconds": 2}}]}]}])
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class StubGoogleCore(GoogleCore):
+    def __init__(self, client):
+        self._init_status()
+        self.connected = True
+        self.client = client
+        self.current_chunk_duration = 55
+
+
+def make_chunks(tmp_path, num):
+    chunks = []
+    for i in range(num):
+        path = tmp_path / f"chunk-{i}.wav"
+        path.write_bytes(f"chunk-{i}".encode())
+        chunks.append(AudioChunk(str(path), i * 55.0, 55.0))
+    return chunks
+
+
+def test_dispatcher_order_and_bound():
+    in_flight, peak = 0, 0
+    lock = threading.Lock()
+
+    def recognize(chunk):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(random.uniform(0.001, 0.02))
+        with lock:
+            in_flight -= 1
+        return chunk.start
+
+    chunks = (AudioChunk(str(i), float(i), 1.0) for i in range(40))
+    results = list(ChunkDispatcher(recognize, max_in_flight=3).run(chunks))
+    assert [response for _, response in results] == [float(i) for i in range(40)]
+    assert [chunk.start for chunk, _ in results] == [float(i) for i in range(40)]
+    assert 1 < peak <= 3
+
+
+def test_dispatcher_retry():
+    failures = {"a": 2}
+    delays = []
+
+    def recognize(chunk):
+        if failures.get(chunk.path, 0):
+            failures[chunk.path] -= 1
+            raise api_exceptions.DeadlineExceeded("slow")
+        return chunk.path
+
+    dispatcher = ChunkDispatcher(recognize, backoff=1, sleep=delays.append)
+    chunks = [AudioChunk("a", 0, 1), AudioChunk("b", 1, 1)]
+    assert [r for _, r in dispatcher.run(chunks)] == ["a", "b"]
+    assert len(delays) == 2
+    assert 0.5 <= delays[0] <= 1 and 1 <= delays[1] <= 2
+
+    failures["a"] = 5
+    with pytest.raises(api_exceptions.DeadlineExceeded):
+        list(dispatcher.run(chunks))
+
+
+def test_dispatcher_does_not_retry_other_errors():
+    calls = []
+
+    def recognize(chunk):
+        calls.append(chunk.path)
+        raise ValueError("bad audio")
+
+    with pytest.raises(ValueError):
+        list(ChunkDispatcher(recognize, sleep=lambda _: None).run([AudioChunk("a", 0, 1)]))
+    assert calls == ["a"]
+
+
+def test_transcribe_with_stub_client(tmp_path):
+    client = StubRecognizeClient(fail_once={"chunk-2", "chunk-5"})
+    core = StubGoogleCore(client)
+    utterances = core._transcribe_list_file(make_chunks(tmp_path, 8), str(tmp_path))
+    assert [utt["text"] for utt in utterances] == [f"chunk-{i}" for i in range(8)]
+    assert [utt["start"] for utt in utterances] == [i * 55.0 + 1 for i in range(8)]
+    assert client.calls == 10
+    assert 1 < client.max_in_flight <= 4
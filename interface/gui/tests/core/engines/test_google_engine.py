@@ -62,3 +62,32 @@ def test_60_sec_audio(audio_path):
     assert core.transcribe_success
     logger.info("the final result of the utterance")
     logger.info(res)
+
+
+class ChunkRecordingCore(GoogleCore):
+    """ google core that records the chunks instead of sending them """
+    def __init__(self):
+        self._init_status()
+        self.current_chunk_duration = 55
+    
+    def _run_engine(self, audio_path, workspace):
+        return audio_path
+    
+    def _prepare_utterance(self, response, offset = 0):
+        return [{"start": offset, "text": response}]
+
+def test_stream_wav_chunks(tmp_path):
+    import wave
+    audio_path = str(tmp_path / "stereo.wav")
+    with wave.open(audio_path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(b"\x01\x00\x02\x00" * 8000 * 120)
+    core = ChunkRecordingCore()
+    chunks = core._stream_wav_chunks(audio_path, str(tmp_path))
+    utterances = core._transcribe_list_file(chunks, str(tmp_path))
+    assert [utt["start"] for utt in utterances] == [0, 55, 110]
+    for utt in utterances:
+        with wave.open(utt["text"], "rb") as f:
+            assert f.getnchannels() == 1
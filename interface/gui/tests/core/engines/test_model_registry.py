@@ -0,0 +1,190 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+import pytest
+
+from gailbot.core.engines.whisperEngine.modelRegistry import ModelRegistry
+from gailbot.core.utils.logger import makelogger
+
+logger = makelogger("pytest_model_registry")
+
+_MB = 1024 * 1024
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """ save models of different sizes to disk, loading them goes through
+        the same deserialization path as a real checkpoint
+    """
+    for name, width in [("tiny", 64), ("small", 256), ("base", 512)]:
+        model = torch.nn.Sequential(
+            torch.nn.Linear(width, width), torch.nn.Linear(width, width))
+        torch.save(model, os.path.join(tmp_path, f"{name}.pt"))
+    return str(tmp_path)
+
+
+def make_loader(model_dir, calls):
+    def loader(model_name, device, dtype, delay = 0):
+        calls.append(model_name)
+        time.sleep(delay)
+        model = torch.load(
+            os.path.join(model_dir, f"{model_name}.pt"),
+            map_location=device, weights_only=False)
+        return model.half() if dtype == "float16" else model
+    return loader
+
+
+def test_cold_and_warm_get(model_dir):
+    calls = []
+    registry = ModelRegistry(make_loader(model_dir, calls))
+    start = time.perf_counter()
+    cold = registry.get("base", "cpu", delay=0.2)
+    cold_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        warm = registry.get("base", "cpu", delay=0.2)
+    warm_time = (time.perf_counter() - start) / 100
+    logger.info(f"cold load {cold_time:.4f} sec, warm get {warm_time:.6f} sec")
+
+    assert warm is cold
+    assert calls == ["base"]
+    assert warm_time * 100 < cold_time
+    stats = registry.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 100
+
+
+def test_dtype_is_part_of_key(model_dir):
+    calls = []
+    registry = ModelRegistry(make_loader(model_dir, calls))
+    full = registry.get("tiny", "cpu", "float32")
+    half = registry.get("tiny", "cpu", "float16")
+    assert full is not half
+    assert next(half.model.parameters()).dtype == torch.float16
+    assert calls == ["tiny", "tiny"]
+
+
+def test_evict_least_recently_used(model_dir):
+    evicted = []
+    registry = ModelRegistry(
+        make_loader(model_dir, []), max_models=2,
+        on_evict=lambda handle: evicted.append(handle.key.model_name))
+    registry.get("tiny", "cpu")
+    registry.get("small", "cpu")
+    registry.get("tiny", "cpu")
+    registry.get("base", "cpu")
+    assert evicted == ["small"]
+    assert [k.model_name for k in registry.loaded_models()] == ["tiny", "base"]
+    assert registry.stats()["evictions"] == 1
+
+
+def test_evict_by_memory(model_dir):
+    registry = ModelRegistry(make_loader(model_dir, []), max_models=3)
+    base = registry.get("base", "cpu")
+    registry.max_bytes = base.nbytes + 0.5 * _MB
+    registry.get("small", "cpu")
+    assert not registry.is_loaded("base", "cpu")
+    assert registry.is_loaded("small", "cpu")
+    assert registry.resident_bytes <= registry.max_bytes
+
+
+def test_model_in_use_is_not_evicted(model_dir):
+    registry = ModelRegistry(make_loader(model_dir, []), max_models=1)
+    tiny = registry.get("tiny", "cpu")
+    with tiny as model:
+        assert tiny.in_use
+        registry.get("small", "cpu")
+        assert registry.is_loaded("tiny", "cpu")
+    assert not tiny.in_use
+    registry.get("base", "cpu")
+    assert registry.loaded_models()[-1].model_name == "base"
+    assert len(registry.loaded_models()) == 1
+
+
+def test_concurrent_get_loads_once(model_dir):
+    calls = []
+    registry = ModelRegistry(make_loader(model_dir, calls))
+    with ThreadPoolExecutor(8) as pool:
+        handles = list(pool.map(
+            lambda _: registry.get("small", "cpu", delay=0.1), range(16)))
+    assert calls == ["small"]
+    assert all(handle is handles[0] for handle in handles)
+
+
+def test_preload_failure(model_dir):
+    registry = ModelRegistry(make_loader(model_dir, []))
+    assert registry.preload("tiny", "cpu")
+    assert not registry.preload("large", "cpu")
+    assert not registry.is_loaded("large", "cpu")
+
+
+def decode_files(registry, num_files, decode_time):
+    """ decode the files in parallel with one shared model handle, return
+        the elapsed time and the most replicas used at once
+    """
+    handle = registry.get("tiny", "cpu")
+    active, most = set(), [0]
+
+    def decode(_):
+        with handle as model:
+            assert id(model) not in active
+            active.add(id(model))
+            most[0] = max(most[0], len(active))
+            time.sleep(decode_time)
+            active.discard(id(model))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(num_files) as pool:
+        list(pool.map(decode, range(num_files)))
+    return time.perf_counter() - start, most[0]
+
+
+def test_replicas_decode_in_parallel(model_dir):
+    """ benchmark of decoding four files with one and with four replicas """
+    calls = []
+    single, _ = decode_files(
+        ModelRegistry(make_loader(model_dir, []), max_replicas=1), 4, 0.2)
+    registry = ModelRegistry(make_loader(model_dir, calls), max_replicas=4)
+    replicated, most = decode_files(registry, 4, 0.2)
+    logger.info(f"4 decodes: {single:.3f} sec with 1 replica, "
+                f"{replicated:.3f} sec with 4 replicas")
+    assert single >= 0.8
+    assert replicated < single
+    handle = registry.get("tiny", "cpu")
+    assert 1 < most <= handle.num_replicas <= 4
+    assert len(calls) == handle.num_replicas
+    assert registry.resident_bytes == handle.nbytes * handle.num_replicas
+    assert not handle.in_use
+
+
+def test_replicas_are_bounded(model_dir):
+    registry = ModelRegistry(make_loader(model_dir, []), max_replicas=2)
+    _, most = decode_files(registry, 6, 0.05)
+    assert most <= 2
+    assert registry.get("tiny", "cpu").num_replicas <= 2
+
+
+def test_replicas_within_memory_bound(model_dir):
+    registry = ModelRegistry(make_loader(model_dir, []), max_models=3, max_replicas=4)
+    tiny = registry.get("tiny", "cpu")
+    registry.max_bytes = tiny.nbytes * 2.5
+    _, most = decode_files(registry, 4, 0.1)
+    assert most <= 2 and tiny.num_replicas == 2
+    assert registry.resident_bytes <= registry.max_bytes
+
+
+def test_replica_evicts_idle_model(model_dir):
+    evicted = []
+    registry = ModelRegistry(
+        make_loader(model_dir, []), max_models=3, max_replicas=2,
+        on_evict=lambda handle: evicted.append(handle.key.model_name))
+    small = registry.get("small", "cpu")
+    base = registry.get("base", "cpu")
+    registry.max_bytes = 2 * base.nbytes + small.nbytes // 2
+    # a second replica of base only fits once small is evicted
+    with base, base:
+        assert base.num_replicas == 2
+    assert evicted == ["small"]
+    assert registry.resident_bytes <= registry.max_bytes
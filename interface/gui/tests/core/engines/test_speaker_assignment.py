@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+import pytest
+from pyannote.core import Annotation, Segment
+
+from gailbot.core.engines.whisperEngine.parsers import add_speaker_info_to_text
+from gailbot.core.engines.whisperEngine.speakerAssigner import SpeakerAssigner
+from gailbot.core.utils.logger import makelogger
+
+logger = makelogger("pytest_speaker_assignment")
+
+
+def make_diarization(num_turns, num_speakers = 4, seed = 0):
+    """ consecutive turns with random speakers, some of them overlap the
+        previous turn to simulate people talking over each other
+    """
+    rng = np.random.default_rng(seed)
+    diarization = Annotation()
+    start = 0.0
+    for i in range(num_turns):
+        duration = rng.uniform(0.5, 8.0)
+        overlap = rng.uniform(0, 1.0) if rng.random() < 0.3 else 0
+        turn_start = max(0.0, start - overlap)
+        diarization[Segment(turn_start, start + duration), i] = \
+            f"SPEAKER_{rng.integers(num_speakers):02d}"
+        start += duration + (rng.uniform(0, 2.0) if rng.random() < 0.2 else 0)
+    return diarization, start
+
+
+def make_asr_result(num_words, total_duration, seed = 1):
+    rng = np.random.default_rng(seed)
+    starts = np.sort(rng.uniform(0, total_duration, num_words))
+    ends = starts + rng.uniform(0.05, 0.8, num_words)
+    words = [{"start": float(s), "end": float(e), "text": f"word{i}"}
+             for i, (s, e) in enumerate(zip(starts, ends))]
+    return {"segments": [{"words": words[i:i + 20]} for i in range(0, num_words, 20)]}
+
+
+def crop_reference(asr_res, dir_res):
+    """ the original per word assignment """
+    result = []
+    for segment in asr_res["segments"]:
+        for item in segment["words"]:
+            seg = Segment(item["start"], item["end"])
+            result.append({
+                "start": seg.start,
+                "end": seg.end,
+                "speaker": dir_res.crop(seg).argmax(),
+                "text": item["text"]
+            })
+    return result
+
+
+def test_matches_crop_argmax():
+    diarization, duration = make_diarization(300)
+    asr_res = make_asr_result(3000, duration + 20)
+    assert add_speaker_info_to_text(asr_res, diarization) == \
+        crop_reference(asr_res, diarization)
+
+
+def test_edge_cases():
+    diarization = Annotation()
+    diarization[Segment(0, 2), "a"] = "B"
+    diarization[Segment(1, 3), "b"] = "B"
+    diarization[Segment(2, 5), "c"] = "A"
+    diarization[Segment(10, 12), "d"] = "C"
+    words = [(0, 1), (1.5, 2.5), (2, 4), (5, 6), (9, 11), (3, 3), (4.5, 5.5), (12, 13)]
+    expected = [diarization.crop(Segment(s, e)).argmax() for s, e in words]
+    assert SpeakerAssigner(diarization).assign(*zip(*words)) == expected
+    assert SpeakerAssigner(Annotation()).assign([0.0], [1.0]) == [None]
+
+
+@pytest.mark.parametrize("num_turns, num_words", [(10000, 100000)])
+def test_benchmark(num_turns, num_words):
+    diarization, duration = make_diarization(num_turns)
+    asr_res = make_asr_result(num_words, duration)
+
+    start = time.perf_counter()
+    result = add_speaker_info_to_text(asr_res, diarization)
+    fast = time.perf_counter() - start
+
+    # the original assignment is too slow to run on every word, time a
+    # sample and extrapolate
+    sample = {"segments": asr_res["segments"][::100]}
+    start = time.perf_counter()
+    reference = crop_reference(sample, diarization)
+    slow = (time.perf_counter() - start) * 100
+    logger.info(f"{num_turns} turns, {num_words} words: sweep {fast:.2f} sec, "
+                f"crop argmax about {slow:.2f} sec")
+
+    assert len(result) == num_words
+    sampled = [word for i in range(0, len(asr_res["segments"]), 100)
+               for word in result[i * 20:(i + 1) * 20]]
+    assert sampled == reference
+    assert fast * 10 < slow
@@ -0,0 +1,103 @@
+import random
+from itertools import chain
+
+import pytest
+
+from gailbot.core.engines.watson.core import WatsonCore
+from gailbot.core.engines.watson.recognize_callback import CustomWatsonCallbacks
+from gailbot.core.engines.watson.recognition_results import RecognitionResult
+from gailbot.core.engines.watson.result_assembler import WatsonResultAssembler
+
+
+def make_messages(num_words, words_per_result = 5, seed = 0):
+    """ messages in the format of Watson, the speaker labels of a result
+        are sent with the next result
+    """
+    rng = random.Random(seed)
+    words = [(f"word{i}", round(i * 0.5, 2), round(i * 0.5 + 0.4, 2)) for i in range(num_words)]
+    messages, labels = [], []
+    for index, start in enumerate(range(0, num_words, words_per_result)):
+        timestamps = [list(word) for word in words[start:start + words_per_result]]
+        message = {"result_index": index, "results": [{
+            "final": True,
+            "alternatives": [{"transcript": " ".join(w[0] for w in timestamps),
+                              "confidence": 0.9,
+                              "timestamps": timestamps,
+                              "word_confidence": [[w[0], 0.9] for w in timestamps]}]}]}
+        if labels:
+            message["speaker_labels"] = labels
+        messages.append(message)
+        labels = [{"from": w[1], "to": w[2], "speaker": rng.randint(0, 2),
+                   "confidence": 0.5, "final": False} for w in timestamps]
+    messages.append({"speaker_labels": labels})
+    return messages
+
+
+def reference_utterances(messages):
+    """ the join of the words and speaker labels by their times that the
+        assembler replaces
+    """
+    data, labels, timestamps = dict(), list(), list()
+    for item in messages:
+        result = RecognitionResult(item)
+        labels.extend(result.get_speaker_labels())
+        if result.items["results"]:
+            timestamps.extend(result.get_timestamps_from_alternatives(only_final=False))
+    for label in labels:
+        data.setdefault((label["start_time"], label["end_time"]), {})["speaker"] = label["speaker"]
+    for timestamp in chain(*timestamps):
+        data.setdefault((timestamp[1], timestamp[2]), {})["utterance"] = timestamp[0]
+    return [{"speaker": value["speaker"], "start": times[0], "end": times[1],
+             "text": value["utterance"]} for times, value in data.items()]
+
+
+def test_assembler_matches_reference():
+    messages = make_messages(103)
+    assembler = WatsonResultAssembler()
+    for message in messages:
+        assembler.add(message)
+    expected = sorted(reference_utterances(messages), key=lambda utt: utt["start"])
+    assert assembler.utterances() == expected
+    assert assembler.num_messages == len(messages)
+
+
+def test_partial_results_and_revisions():
+    messages = make_messages(20)
+    assembler = WatsonResultAssembler()
+    assembler.add(messages[0])
+    # the first words wait for their speaker labels
+    assert assembler.partial_utterances() == []
+    assembler.add(messages[1])
+    partial = assembler.partial_utterances()
+    assert [utt["text"] for utt in partial] == [f"word{i}" for i in range(5)]
+
+    # a label that is sent again replaces the earlier one, also once the
+    # utterance is assembled, and copies of partial results are not changed
+    label = dict(messages[1]["speaker_labels"][0], speaker=7)
+    assembler.add({"speaker_labels": [label]})
+    assert assembler.partial_utterances()[0]["speaker"] == 7
+    assert partial[0]["speaker"] != 7
+
+    # out of order messages are joined in the order of the times
+    for message in reversed(messages[2:]):
+        assembler.add(message)
+    assert [utt["text"] for utt in assembler.utterances()] == [f"word{i}" for i in range(20)]
+
+
+def test_word_without_label():
+    assembler = WatsonResultAssembler()
+    assembler.add(make_messages(5)[0])
+    with pytest.raises(ValueError):
+        assembler.utterances()
+
+
+def test_core_uses_callback_assembler():
+    messages = make_messages(12)
+    callbacks = CustomWatsonCallbacks()
+    for message in messages:
+        callbacks.on_data(message)
+    assert "data" not in callbacks.get_results()["results"]
+    assert len(callbacks.get_partial_utterances()) == 12
+    core = WatsonCore.__new__(WatsonCore)
+    utterances = core._prepare_utterance("audio", callbacks)
+    assert utterances == sorted(reference_utterances(messages), key=lambda utt: utt["start"])
@@ -0,0 +1,111 @@
+import time
+from threading import Thread
+from typing import Dict
+
+from gailbot.core.pipeline import (
+    Pipeline, Component, ComponentResult, ComponentState
+)
+
+
+class SleepComponent(Component):
+    def __init__(self, name: str, sleeptime: float, log: Dict[str, tuple]):
+        self.name = name
+        self.sleeptime = sleeptime
+        self.log = log
+
+    def __call__(self, dependency_outputs: Dict[str, ComponentResult], *args, **kwargs):
+        start = time.perf_counter()
+        time.sleep(self.sleeptime)
+        self.log[self.name] = (start, time.perf_counter())
+        return ComponentResult(
+            state=ComponentState.SUCCESS,
+            result=dependency_outputs,
+            runtime=self.sleeptime
+        )
+
+    def __repr__(self):
+        return self.name
+
+
+def test_component_starts_when_dependencies_finish():
+    """ c only depends on a, so it must not wait for its slow sibling b """
+    log = dict()
+    components = {
+        "a": SleepComponent("a", 0.1, log),
+        "b": SleepComponent("b", 1.0, log),
+        "c": SleepComponent("c", 0.1, log),
+        "d": SleepComponent("d", 0.1, log),
+    }
+    pipe = Pipeline(
+        dependency_map={"a": [], "b": [], "c": ["a"], "d": ["b", "c"]},
+        components=components,
+        num_threads=4
+    )
+    res = pipe([])
+    assert all(state == ComponentState.SUCCESS for state in res.values())
+    assert log["c"][1] < log["b"][1]
+    assert log["d"][0] >= log["b"][1]
+
+
+def test_wide_graph_uses_all_threads():
+    log = dict()
+    width = 8
+    components = {str(i): SleepComponent(str(i), 0.5, log) for i in range(width)}
+    components["root"] = SleepComponent("root", 0, log)
+    dependency_map = {"root": []}
+    dependency_map.update({str(i): ["root"] for i in range(width)})
+    components = {name: components[name] for name in dependency_map}
+    pipe = Pipeline(dependency_map=dependency_map, components=components,
+                    num_threads=width)
+    start = time.perf_counter()
+    res = pipe([])
+    assert time.perf_counter() - start < 1.0
+    assert len(res) == width + 1
+
+
+def test_concurrent_runs():
+    """ the same pipeline can be run from several threads at once """
+    log = dict()
+    components = {
+        "a": SleepComponent("a", 0.05, log),
+        "b": SleepComponent("b", 0.05, log),
+    }
+    pipe = Pipeline(dependency_map={"a": [], "b": ["a"]},
+                    components=components, num_threads=4)
+    results = []
+    threads = [Thread(target=lambda i=i: results.append(pipe(i))) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 6
+    assert all(res == {"a": ComponentState.SUCCESS, "b": ComponentState.SUCCESS}
+               for res in results)
+
+
+def test_dispatch_failure_finishes_run():
+    """ b cannot be submitted once the thread pool is shut down, the run
+        must still finish with b and its dependents failed
+    """
+    log = dict()
+
+    class ShutdownComponent(SleepComponent):
+        def __call__(self, dependency_outputs, *args, **kwargs):
+            pipe.threadpool.shutdown(wait=False)
+            return super().__call__(dependency_outputs, *args, **kwargs)
+
+    components = {
+        "a": ShutdownComponent("a", 0, log),
+        "b": SleepComponent("b", 0, log),
+        "c": SleepComponent("c", 0, log),
+    }
+    pipe = Pipeline(dependency_map={"a": [], "b": ["a"], "c": ["b"]},
+                    components=components, num_threads=2)
+    results = []
+    thread = Thread(target=lambda: results.append(pipe([])), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert results == [{"a": ComponentState.SUCCESS,
+                        "b": ComponentState.FAILED,
+                        "c": ComponentState.FAILED}]
@@ -0,0 +1,76 @@
+import os
+from typing import Dict
+
+import pytest
+
+from gailbot.core.pipeline import Pipeline, Component, ComponentResult, ComponentState
+from gailbot.core.utils.executors import (
+    Backend, TaskEnvelope, ProcessPool, make_executor, get_worker_state
+)
+from gailbot.core.utils.threads import ThreadPool, TaskCreateError
+
+
+def warm():
+    get_worker_state()["warm"] = os.getpid()
+
+def count_calls(n):
+    state = get_worker_state()
+    state["calls"] = state.get("calls", 0) + 1
+    return state.get("warm"), state["calls"], n * n
+
+def square(n):
+    return n * n
+
+
+class SquareComponent(Component):
+    """ picklable component that squares the output of its dependencies """
+    def __call__(self, dependency_outputs: Dict[str, ComponentResult], *args, **kwargs):
+        total = sum(res.result for res in dependency_outputs.values())
+        return ComponentResult(ComponentState.SUCCESS, total * total, 0)
+
+    def __repr__(self):
+        return "square"
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    pool = ProcessPool(1, initializers=[f"{__name__}:warm"])
+    yield pool
+    pool.shutdown()
+
+
+def test_make_executor():
+    assert isinstance(make_executor(Backend.thread, 2), ThreadPool)
+    with pytest.raises(ValueError):
+        make_executor("gpu", 2)
+
+
+def test_envelope_keeps_worker_state(process_pool):
+    results = [process_pool.submit(TaskEnvelope(f"{__name__}:count_calls", args=(i,))).result()
+               for i in range(3)]
+    pids = {pid for pid, _, _ in results}
+    assert len(pids) == 1 and os.getpid() not in pids
+    assert [calls for _, calls, _ in results] == [1, 2, 3]
+    assert [res for _, _, res in results] == [0, 1, 4]
+
+
+def test_task_pool_interface(process_pool):
+    key = process_pool.add_task(square, [7], key="seven")
+    assert key == "seven"
+    assert process_pool.get_task_result("seven") == 49
+    assert process_pool.count_completed_tasks() >= 1
+
+
+def test_unpicklable_task(process_pool):
+    with pytest.raises(TaskCreateError):
+        process_pool.submit(lambda: 1)
+
+
+def test_pipeline_on_process_pool(process_pool):
+    pipe = Pipeline(
+        dependency_map={"a": [], "b": ["a"]},
+        components={"a": SquareComponent(), "b": SquareComponent()},
+        num_threads=1,
+        executor=process_pool
+    )
+    assert pipe(3) == {"a": ComponentState.SUCCESS, "b": ComponentState.SUCCESS}
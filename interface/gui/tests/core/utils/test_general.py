@@ -17,6 +17,7 @@ import shutil
 from gailbot.core.utils import general 
 import time
 import logging
+import sys
 
 def create_test_dictionary() -> dict:
     test_dict = dict()
@@ -197,12 +198,50 @@ def test_read_write_txt():
 
 
 def test_run_cmd():
-    pid = general.run_cmd(["ls"]) 
+    # the command sleeps so that it is still running when it is checked
+    pid = general.run_cmd([sys.executable, "-c", "import time; time.sleep(1)"])
     status = general.get_cmd_status(pid)
     assert status == general.CMD_STATUS.RUNNING
-    time.sleep(1)
-    status = general.get_cmd_status(pid)
+    deadline = time.time() + 30
+    while status == general.CMD_STATUS.RUNNING and time.time() < deadline:
+        time.sleep(0.1)
+        status = general.get_cmd_status(pid)
     assert status == general.CMD_STATUS.FINISHED
+
+def test_run_cmd_and_wait():
+    # more output than a pipe holds, the command stalls if it is not read
+    script = "import sys; sys.stderr.write('x' * 2000000); print('done')"
+    result = general.run_cmd_and_wait([sys.executable, "-c", script], timeout=30)
+    assert result.succeeded
+    assert result.stdout.strip() == "done"
+    assert len(result.stderr) == 2000000
+
+    result = general.run_cmd_and_wait([sys.executable, "-c", "exit(3)"])
+    assert result.returncode == 3 and not result.succeeded
+
+    result = general.run_cmd_and_wait(["no-such-program-for-gailbot"])
+    assert result.returncode is None and not result.succeeded
+
+def test_run_cmd_and_wait_timeout():
+    start = time.time()
+    result = general.run_cmd_and_wait(
+        [sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+    assert result.timed_out and not result.succeeded
+    assert time.time() - start < 10
+
+def test_run_cmd_concurrency_limit():
+    program = os.path.basename(sys.executable)
+    general.set_cmd_concurrency(program, 1)
+    try:
+        cmd = [sys.executable, "-c", "import time; print(time.time()); time.sleep(0.5); print(time.time())"]
+        with ThreadPoolExecutor(3) as pool:
+            results = list(pool.map(lambda _: general.run_cmd_and_wait(cmd), range(3)))
+        spans = sorted(tuple(map(float, r.stdout.split())) for r in results)
+        for (_, end), (start, _) in zip(spans, spans[1:]):
+            assert start >= end
+    finally:
+        general.set_cmd_concurrency(program, os.cpu_count() or 1)
+        general._CMD_CONCURRENCY.pop(program)
     
 
 def test_csv():
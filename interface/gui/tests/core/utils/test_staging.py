@@ -0,0 +1,97 @@
+import os
+import time
+import logging
+
+import pytest
+
+from gailbot.core.utils import general
+from gailbot.core.utils.general import (
+    stage_file,
+    stage_dir,
+    STAGE_METHOD)
+
+AUDIO = b"RIFF" + bytes(range(256)) * 64
+
+
+def make_file(path, content = AUDIO):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def no_link(*args, **kwargs):
+    raise OSError("cross-device link")
+
+
+def test_hardlink(tmp_path):
+    src = make_file(tmp_path / "src.wav")
+    staged = stage_file(src, str(tmp_path / "staged.wav"))
+    assert staged.method == STAGE_METHOD.HARDLINK and staged.shared
+    assert staged.bytes_written == 0
+    assert os.path.samefile(src, staged.path)
+
+    # staging again over an existing target replaces it
+    assert stage_file(src, staged.path).bytes_written == 0
+
+
+def test_copy_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(general.os, "link", no_link)
+    monkeypatch.setattr(general, "_reflink", lambda src, tgt: False)
+    src = make_file(tmp_path / "src.wav")
+    staged = stage_file(src, str(tmp_path / "staged.wav"))
+    assert staged.method == STAGE_METHOD.COPY and not staged.shared
+    assert staged.bytes_written == len(AUDIO)
+    assert open(staged.path, "rb").read() == AUDIO
+
+
+def test_reflink_or_copy(tmp_path, monkeypatch):
+    monkeypatch.setattr(general.os, "link", no_link)
+    src = make_file(tmp_path / "src.wav")
+    staged = stage_file(src, str(tmp_path / "staged.wav"))
+    # reflinks depend on the file system, a copy is made without them
+    assert staged.method in (STAGE_METHOD.REFLINK, STAGE_METHOD.COPY)
+    assert open(staged.path, "rb").read() == AUDIO
+
+
+def test_no_hardlink_for_output(tmp_path):
+    src = make_file(tmp_path / "src.wav")
+    # a hard link that already exists at the target is replaced
+    stage_file(src, str(tmp_path / "output.wav"))
+    staged = stage_file(src, str(tmp_path / "output.wav"), hardlink=False)
+    assert staged.method in (STAGE_METHOD.REFLINK, STAGE_METHOD.COPY)
+    assert not os.path.samefile(src, staged.path)
+    with open(staged.path, "wb") as f:
+        f.write(b"changed")
+    assert open(src, "rb").read() == AUDIO
+    assert not stage_file(src, src, hardlink=False)
+    assert open(src, "rb").read() == AUDIO
+
+
+def test_stage_dir(tmp_path):
+    make_file(tmp_path / "conv" / "a.wav")
+    make_file(tmp_path / "conv" / "sub" / "b.wav")
+    staged = stage_dir(str(tmp_path / "conv"), str(tmp_path / "staged"))
+    assert sorted(os.path.relpath(f.path, tmp_path / "staged") for f in staged) \
+        == ["a.wav", os.path.join("sub", "b.wav")]
+    assert sum(f.bytes_written for f in staged) == 0
+
+
+@pytest.mark.parametrize("linked", [True, False])
+def test_bytes_written_per_payload(tmp_path, monkeypatch, linked):
+    """ bytes written to stage one payload into the workspace and the output,
+        once with links and once with copies only
+    """
+    if not linked:
+        monkeypatch.setattr(general.os, "link", no_link)
+        monkeypatch.setattr(general, "_reflink", lambda src, tgt: False)
+    src = make_file(tmp_path / "source" / "audio.wav", AUDIO * 256)
+    start = time.perf_counter()
+    workspace = stage_file(src, str(tmp_path / "workspace.wav"))
+    output = stage_file(workspace.path, str(tmp_path / "output.wav"), hardlink=False)
+    elapsed = time.perf_counter() - start
+    written = workspace.bytes_written + output.bytes_written
+    logging.info(f"linked: {linked}, {written} bytes written in {elapsed:.4f}s")
+    assert workspace.bytes_written == (0 if linked else len(AUDIO) * 256)
+    # the output is a reflink when the file system supports it
+    assert output.bytes_written == \
+        (0 if output.method == STAGE_METHOD.REFLINK else len(AUDIO) * 256)
@@ -0,0 +1,77 @@
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+from gailbot.core.utils.utterances import UtteranceTable
+from gailbot.services import UttObj
+
+
+def make_utterances(num, num_speakers = 3):
+    return [{"start": i * 0.5, "end": i * 0.5 + 0.4,
+             "text": f"word{i}", "speaker": str(i % num_speakers)}
+            for i in range(num)]
+
+
+def test_round_trip():
+    utterances = make_utterances(100)
+    table = UtteranceTable.from_dicts(utterances)
+    assert len(table) == 100
+    assert table.to_dicts() == utterances
+    assert list(table) == utterances
+    assert table[3] == utterances[3] and table[-1] == utterances[-1]
+    assert table.speakers == ["0", "1", "2"]
+    assert table.speaker_labels.tolist() == [utt["speaker"] for utt in utterances]
+    assert [obj.dict() for obj in table.to_objects(UttObj)] == \
+        [UttObj(**utt).dict() for utt in utterances]
+    assert UtteranceTable.empty().to_dicts() == []
+
+    # the field order of the input is kept, and csv strings are converted
+    reordered = [{"speaker": 1, "text": "hi", "start": "1.5", "end": "2"}]
+    assert UtteranceTable.from_dicts(reordered).to_dicts() == \
+        [{"speaker": 1, "text": "hi", "start": 1.5, "end": 2.0}]
+
+
+def test_mixed_fields():
+    """ every utterance is checked, not only the first one """
+    extra = make_utterances(3)
+    extra[2]["confidence"] = 0.9
+    missing = make_utterances(3)
+    del missing[1]["speaker"]
+    for utterances in (extra, missing):
+        with pytest.raises(ValueError):
+            UtteranceTable.from_dicts(utterances)
+
+
+def test_views():
+    utterances = make_utterances(100)
+    table = UtteranceTable.from_dicts(utterances)
+
+    view = table[10:20]
+    assert view.to_dicts() == utterances[10:20]
+    assert np.shares_memory(view.start, table.start)
+    assert view.texts == [utt["text"] for utt in utterances[10:20]]
+    assert table[::10].to_dicts() == utterances[::10]
+
+    window = table.between(5.0, 10.0)
+    assert window.to_dicts() == [utt for utt in utterances if 5.0 <= utt["start"] < 10.0]
+    assert np.shares_memory(window.end, table.end)
+    assert np.allclose(window.durations, 0.4)
+
+    shuffled = UtteranceTable.from_dicts(utterances[::-1])
+    assert not shuffled.is_sorted()
+    assert sorted(shuffled.between(5.0, 10.0).texts) == sorted(window.texts)
+
+    # a pickled view only carries its own text
+    restored = pickle.loads(pickle.dumps(view))
+    assert restored.to_dicts() == utterances[10:20]
+    assert len(pickle.dumps(view)) < len(pickle.dumps(table))
+
+
+def test_memory():
+    utterances = make_utterances(10000)
+    table = UtteranceTable.from_dicts(utterances)
+    dict_size = sum(sys.getsizeof(utt) + sum(map(sys.getsizeof, utt.values()))
+                    for utt in utterances)
+    assert table.nbytes * 8 < dict_size
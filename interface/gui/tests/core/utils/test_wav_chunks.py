@@ -0,0 +1,92 @@
+import wave
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from gailbot.core.utils.media import MediaHandler, AudioHandler
+
+RATE = 8000
+
+
+def make_wav(path, samples, sample_width = 2, rate = RATE):
+    """ samples is an array of shape (frames, channels) """
+    samples = np.asarray(samples)
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[sample_width]
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(sample_width)
+        f.setframerate(rate)
+        f.writeframes(samples.astype(dtype).tobytes())
+    return str(path)
+
+
+def read_frames(path):
+    with wave.open(path, "rb") as f:
+        return f.getnchannels(), f.readframes(f.getnframes())
+
+
+def test_wav_info(tmp_path):
+    path = make_wav(tmp_path / "a.wav", np.zeros((RATE * 3, 2)))
+    info = MediaHandler.wav_info(path)
+    assert (info.channels, info.sample_width, info.frame_rate) == (2, 2, RATE)
+    assert info.duration == 3
+
+
+def test_chunks_cover_audio(tmp_path):
+    samples = np.arange(RATE * 10 + 123) % 1000
+    path = make_wav(tmp_path / "a.wav", samples)
+    chunks = list(MediaHandler.iter_wav_chunks(path, str(tmp_path / "chunks"), 3))
+    assert [chunk.start for chunk in chunks] == [0, 3, 6, 9]
+    assert [chunk.duration for chunk in chunks[:3]] == [3, 3, 3]
+    joined = b"".join(read_frames(chunk.path)[1] for chunk in chunks)
+    assert joined == read_frames(path)[1]
+
+
+def test_chunks_are_generated_lazily(tmp_path):
+    path = make_wav(tmp_path / "a.wav", np.zeros(RATE * 10))
+    chunks = MediaHandler.iter_wav_chunks(path, str(tmp_path / "chunks"), 3)
+    first = next(chunks)
+    assert len(list((tmp_path / "chunks").iterdir())) == 1
+    assert first.path.endswith("a-0.wav")
+
+
+def test_select_channel(tmp_path):
+    left = np.arange(RATE * 2) % 500
+    stereo = np.stack([left, -left], axis=1)
+    path = make_wav(tmp_path / "stereo.wav", stereo)
+    chunks = list(MediaHandler.iter_wav_chunks(path, str(tmp_path / "chunks"), 60, channel=0))
+    channels, frames = read_frames(chunks[0].path)
+    assert channels == 1
+    assert frames == left.astype(np.int16).tobytes()
+
+
+@pytest.mark.parametrize("sample_width", [1, 2, 4])
+def test_silence_aligned_cut(tmp_path, sample_width):
+    rng = np.random.default_rng(0)
+    center = 128 if sample_width == 1 else 0
+    scale = {1: 100, 2: 10000, 4: 10000 << 16}[sample_width]
+    samples = center + rng.uniform(-1, 1, RATE * 10) * scale
+    # silence from 4.5 to 4.7 seconds, the cut at 5 seconds moves into it
+    samples[int(RATE * 4.5):int(RATE * 4.7)] = center
+    path = make_wav(tmp_path / "a.wav", samples, sample_width)
+    chunks = list(MediaHandler.iter_wav_chunks(
+        path, str(tmp_path / "chunks"), 5, silence_window=1))
+    assert 4.5 <= chunks[1].start <= 4.7
+    assert chunks[0].duration == chunks[1].start
+    assert sum(chunk.duration for chunk in chunks) == 10
+
+
+def test_memory_is_flat(tmp_path):
+    """ the memory used to chunk a file is bounded by the block size, not by
+        the length of the audio
+    """
+    path = make_wav(tmp_path / "long.wav", np.zeros(RATE * 600))
+    tracemalloc.start()
+    for _ in MediaHandler.iter_wav_chunks(path, str(tmp_path / "chunks"), 55, silence_window=1):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 4 * AudioHandler.wav_info(path).frame_width * (1 << 16) + 1024 * 1024
@@ -0,0 +1,127 @@
+import os
+import time
+
+from gailbot.plugins import Methods
+from gailbot.plugins.manager import PluginManager
+from gailbot.plugins.suite import LazyPlugin
+from gailbot.plugins.loader import PluginDirectoryLoader, SuiteCache
+from gailbot.configs import PLUGIN_CONFIG
+
+# the module appends to the import log whenever it is executed
+PLUGIN_SOURCE = '''
+from gailbot.plugins import Plugin
+
+with open({log!r}, "a") as f:
+    f.write("imported\\n")
+
+class {cls}(Plugin):
+    def apply(self, dependency_outputs, methods):
+        self.successful = True
+        return "{version}"
+'''
+
+
+class RecordingDirectoryLoader(PluginDirectoryLoader):
+    """ records the requirement files instead of installing them """
+    def __init__(self, suites_dir, cache = None):
+        super().__init__(suites_dir, cache)
+        self.installed = []
+
+    def download_packages(self, req_file, dest):
+        self.installed.append(req_file)
+
+
+def write_suite(root, name, version, log):
+    suite_dir = root / name
+    suite_dir.mkdir(parents=True, exist_ok=True)
+    cls = "".join(part.title() for part in name.split("_"))
+    (suite_dir / PLUGIN_CONFIG.CONFIG).write_text(
+        f'suite_name = "{name}"\n\n[metadata]\nAuthor = "test"\nEmail = "test@test"\nVersion = "{version}"\n\n'
+        f'[[plugins]]\nplugin_name = "{cls}"\ndependencies = []\n'
+        f'rel_path = "plugin.py"\nmodule_name = "plugin"\n')
+    (suite_dir / PLUGIN_CONFIG.DOCUMENT).write_text("document")
+    (suite_dir / PLUGIN_CONFIG.FORMAT).write_text("format")
+    (suite_dir / PLUGIN_CONFIG.REQUIREMENT).write_text("")
+    (suite_dir / "plugin.py").write_text(
+        PLUGIN_SOURCE.format(cls=cls, version=version, log=str(log)))
+    return str(suite_dir)
+
+
+def imports(log):
+    return len(log.read_text().splitlines()) if log.exists() else 0
+
+
+def test_unchanged_suite_is_not_reloaded(tmp_path):
+    log = tmp_path / "imports.log"
+    suites_dir = tmp_path / "workspace" / "suites"
+    suites_dir.mkdir(parents=True)
+    source = write_suite(tmp_path / "source", "cached_suite", "1", log)
+
+    loader = RecordingDirectoryLoader(str(suites_dir), SuiteCache(str(tmp_path / "workspace")))
+    [suite] = loader.load(source)
+    assert len(loader.installed) == 1 and imports(log) == 1
+    assert not isinstance(suite.plugins["CachedSuite"], LazyPlugin)
+
+    # a new launch finds the copy unchanged
+    loader = RecordingDirectoryLoader(str(suites_dir), SuiteCache(str(tmp_path / "workspace")))
+    [suite] = loader.load(str(suites_dir / "cached_suite"))
+    assert loader.installed == [] and imports(log) == 1
+    plugin = suite.plugins["CachedSuite"]
+    assert isinstance(plugin, LazyPlugin) and not plugin.is_loaded
+
+    # the module is imported once the suite is applied
+    assert suite({}, Methods()) and plugin.is_loaded and plugin.is_successful
+    assert imports(log) == 1 + 1
+
+    # registering the same source again does not copy it
+    mtime = os.path.getmtime(suites_dir / "cached_suite" / "plugin.py")
+    [suite] = loader.load(source)
+    assert loader.installed == []
+    assert os.path.getmtime(suites_dir / "cached_suite" / "plugin.py") == mtime
+
+
+def test_changed_suite_is_reloaded(tmp_path):
+    log = tmp_path / "imports.log"
+    suites_dir = tmp_path / "workspace" / "suites"
+    suites_dir.mkdir(parents=True)
+    source = write_suite(tmp_path / "source", "cached_suite", "1", log)
+    cache = SuiteCache(str(tmp_path / "workspace"))
+    loader = RecordingDirectoryLoader(str(suites_dir), cache)
+    loader.load(source)
+
+    # same size and modification time, different content
+    plugin_path = suites_dir / "cached_suite" / "plugin.py"
+    stat = os.stat(plugin_path)
+    plugin_path.write_text(plugin_path.read_text().replace('"1"', '"2"'))
+    os.utime(plugin_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    loader = RecordingDirectoryLoader(str(suites_dir), SuiteCache(str(tmp_path / "workspace")))
+    [suite] = loader.load(str(suites_dir / "cached_suite"))
+    assert len(loader.installed) == 1 and imports(log) == 2
+    assert suite.plugins["CachedSuite"].apply({}, Methods()) == "2"
+
+    # a suite that fails to load is forgotten
+    plugin_path.write_text("raise ImportError")
+    loader = RecordingDirectoryLoader(str(suites_dir), SuiteCache(str(tmp_path / "workspace")))
+    assert not loader.load(str(suites_dir / "cached_suite"))
+    assert "cached_suite" not in SuiteCache(str(tmp_path / "workspace")).entries
+
+
+def test_manager_startup_uses_cache(tmp_path):
+    log = tmp_path / "imports.log"
+    workspace = tmp_path / "workspace"
+    names = [f"suite_{i}" for i in range(5)]
+    manager = PluginManager(str(workspace), sync_official=False)
+    for name in names:
+        assert manager.register_suite(write_suite(tmp_path / "source", name, "1", log)) == [name]
+    assert imports(log) == 5
+
+    start = time.perf_counter()
+    manager = PluginManager(str(workspace), sync_official=False)
+    elapsed = time.perf_counter() - start
+    assert sorted(manager.get_all_suites_name()) == names
+    assert imports(log) == 5
+    assert elapsed < 1
+
+    assert manager.delete_suite("suite_0")
+    assert "suite_0" not in manager.suite_cache.entries
@@ -0,0 +1,181 @@
+import os
+import shutil
+import hashlib
+import zipfile
+import threading
+from datetime import datetime, timezone
+
+from gailbot.plugins.manager import PluginManager
+from gailbot.plugins.loader import S3SuiteSync
+
+PLUGIN_SOURCE = '''
+from gailbot.plugins import Plugin
+
+class {cls}(Plugin):
+    VERSION = "{version}"
+
+    def apply(self, dependency_outputs, methods):
+        self.successful = True
+        return self.VERSION
+'''
+
+
+class FakeS3:
+    """ filesystem backed stand in for the s3 client, every file in the
+        bucket directory is an object
+    """
+    def __init__(self, root, page_size = 1):
+        self.root = root
+        self.page_size = page_size
+        self.downloads = []
+        self.online = True
+        self.lock = threading.Lock()
+
+    def list_objects_v2(self, Bucket, ContinuationToken = None):
+        if not self.online:
+            raise ConnectionError("offline")
+        keys = sorted(os.listdir(os.path.join(self.root, Bucket)))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + self.page_size]
+        contents = []
+        for key in page:
+            path = os.path.join(self.root, Bucket, key)
+            with open(path, "rb") as f:
+                etag = f'"{hashlib.md5(f.read()).hexdigest()}"'
+            modified = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+            contents.append({"Key": key, "ETag": etag, "LastModified": modified})
+        response = {"Contents": contents, "IsTruncated": start + self.page_size < len(keys)}
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + self.page_size)
+        return response
+
+    def download_file(self, Bucket, Key, Filename):
+        with self.lock:
+            self.downloads.append(Key)
+        shutil.copy(os.path.join(self.root, Bucket, Key), Filename)
+
+
+def upload_suite(bucket_dir, name, version, suite_name = None):
+    """ write a plugin suite with one plugin to a zip in the bucket, the
+        suite is invalid if its suite name is not its directory name
+    """
+    bucket_dir.mkdir(parents=True, exist_ok=True)
+    cls = "".join(part.title() for part in name.split("_"))
+    files = {
+        "config.toml": (
+            f'suite_name = "{suite_name or name}"\n\n[metadata]\nAuthor = "test"\nEmail = "test@test"\nVersion = "{version}"\n\n'
+            f'[[plugins]]\nplugin_name = "{cls}"\ndependencies = []\n'
+            f'rel_path = "plugin.py"\nmodule_name = "plugin"\n'),
+        "DOCUMENT.md": "document",
+        "format.md": "format",
+        "plugin.py": PLUGIN_SOURCE.format(cls=cls, version=version),
+    }
+    with zipfile.ZipFile(bucket_dir / f"{name}.zip", "w") as zip_file:
+        for filename, content in files.items():
+            zip_file.writestr(f"{name}/{filename}", content)
+
+
+def make_manager(workspace, client, **kwargs):
+    sync = S3SuiteSync("bucket", str(workspace), str(workspace / "suites"), client=client)
+    return PluginManager(str(workspace), suite_sync=sync, **kwargs)
+
+
+def test_sync_downloads_changed_suites(tmp_path):
+    bucket = tmp_path / "s3" / "bucket"
+    upload_suite(bucket, "first_suite", "1")
+    upload_suite(bucket, "second_suite", "1")
+    client = FakeS3(str(tmp_path / "s3"))
+    workspace = tmp_path / "plugins"
+
+    manager = make_manager(workspace, client)
+    assert manager.wait_for_sync(timeout=60)
+    assert sorted(client.downloads) == ["first_suite.zip", "second_suite.zip"]
+    assert manager.is_suite("first_suite") and manager.is_suite("second_suite")
+
+    # nothing changed, the next launch uses the cached copies
+    client.downloads.clear()
+    manager = make_manager(workspace, client)
+    assert manager.wait_for_sync(timeout=60)
+    assert client.downloads == []
+    assert manager.is_suite("first_suite") and manager.is_suite("second_suite")
+
+    # only the updated suite is downloaded again
+    upload_suite(bucket, "second_suite", "2")
+    manager = make_manager(workspace, client, sync_official=False)
+    assert manager.sync_official_suites(background=False) == ["second_suite"]
+    assert client.downloads == ["second_suite.zip"]
+
+
+def test_sync_offline_uses_cache(tmp_path):
+    bucket = tmp_path / "s3" / "bucket"
+    upload_suite(bucket, "first_suite", "1")
+    client = FakeS3(str(tmp_path / "s3"))
+    workspace = tmp_path / "plugins"
+    manager = make_manager(workspace, client, sync_official=False)
+    assert manager.sync_official_suites(background=False) == ["first_suite"]
+
+    client.online = False
+    manager = make_manager(workspace, client, sync_official=False)
+    assert manager.sync_official_suites(background=False) == []
+    assert manager.is_suite("first_suite")
+
+
+def test_sync_restores_deleted_suite(tmp_path):
+    bucket = tmp_path / "s3" / "bucket"
+    upload_suite(bucket, "first_suite", "1")
+    client = FakeS3(str(tmp_path / "s3"))
+    workspace = tmp_path / "plugins"
+    manager = make_manager(workspace, client, sync_official=False)
+    manager.sync_official_suites(background=False)
+    assert manager.delete_suite("first_suite")
+    assert manager.sync_official_suites(background=False) == ["first_suite"]
+    assert client.downloads == ["first_suite.zip", "first_suite.zip"]
+
+
+def test_invalid_update_keeps_suite(tmp_path):
+    bucket = tmp_path / "s3" / "bucket"
+    upload_suite(bucket, "first_suite", "1")
+    client = FakeS3(str(tmp_path / "s3"))
+    workspace = tmp_path / "plugins"
+    manager = make_manager(workspace, client, sync_official=False)
+    manager.sync_official_suites(background=False)
+    suite = manager.get_suite("first_suite")
+
+    upload_suite(bucket, "first_suite", "2", suite_name="other_suite")
+    assert manager.sync_official_suites(background=False) == []
+    assert manager.get_suite("first_suite") is suite
+    path = manager.get_suite_path("first_suite")
+    assert 'VERSION = "1"' in open(os.path.join(path, "plugin.py")).read()
+    assert os.listdir(workspace / "staging") == []
+
+
+def test_suites_read_during_sync(tmp_path):
+    """ the suite stays available while the sync replaces its copy """
+    bucket = tmp_path / "s3" / "bucket"
+    upload_suite(bucket, "first_suite", "0")
+    client = FakeS3(str(tmp_path / "s3"))
+    workspace = tmp_path / "plugins"
+    manager = make_manager(workspace, client, sync_official=False)
+    manager.sync_official_suites(background=False)
+
+    done, missing = threading.Event(), []
+
+    def read():
+        while not done.is_set():
+            names = manager.get_all_suites_name()
+            if "first_suite" not in names or not manager.get_suite("first_suite") \
+                    or not manager.get_suite_path("first_suite"):
+                missing.append(names)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for version in range(1, 6):
+            upload_suite(bucket, "first_suite", str(version))
+            assert manager.sync_official_suites(background=False) == ["first_suite"]
+    finally:
+        done.set()
+        reader.join()
+    assert missing == []
+    path = manager.get_suite_path("first_suite")
+    assert 'VERSION = "5"' in open(os.path.join(path, "plugin.py")).read()
@@ -0,0 +1,127 @@
+import os
+import time
+import pickle
+from functools import partial
+import wave
+
+from gailbot.core.utils.general import STAGE_METHOD
+from gailbot.services.converter import Converter
+from gailbot.services.converter.payload.audioPayload import AudioPayload
+from gailbot.services.converter.plugin.pluginMethod import GBPluginMethods
+from gailbot.services.organizer.source import SourceObject
+from gailbot.workspace.manager import WorkspaceManager
+
+
+class CountingAudioPayload(AudioPayload):
+    """ audio payload that records the merges instead of running them """
+    def _merge_audio(self):
+        self.merges = getattr(self, "merges", 0) + 1
+        self.merged_audio = self.data_files[0]
+
+
+def make_source(tmp_path, name):
+    path = str(tmp_path / f"{name}.wav")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(b"\x00\x00" * 800)
+    return SourceObject(path, name, str(tmp_path / "output"))
+
+
+def test_lazy_merge(tmp_path):
+    ws_manager = WorkspaceManager(str(tmp_path))
+    payload = CountingAudioPayload(make_source(tmp_path, "lazy"), ws_manager)
+    assert not hasattr(payload, "merges")
+    assert payload.merged_audio == payload.data_files[0]
+    assert payload.merged_audio == payload.data_files[0]
+    assert payload.merges == 1
+
+
+def test_parallel_load_keeps_order(tmp_path):
+    sources = [make_source(tmp_path, f"file{i}") for i in range(6)]
+
+    def loader(source, ws_manager):
+        index = int(source.name[len("file"):])
+        if index == 3:
+            return False
+        # later sources finish first
+        time.sleep(0.01 * (6 - index))
+        return [source.name]
+
+    converter = Converter(WorkspaceManager(str(tmp_path)), num_threads=4)
+    converter.loaders = [loader]
+    payloads, invalid = converter(sources)
+    assert payloads == ["file0", "file1", "file2", "file4", "file5"]
+    assert invalid == ["file3"]
+    assert list(converter.payloads_dict) == ["file0", "file1", "file2", "file4", "file5"]
+
+
+def test_staged_data_files(tmp_path):
+    source = make_source(tmp_path, "staged")
+    payload = CountingAudioPayload(source, WorkspaceManager(str(tmp_path)))
+    data_file = payload.data_files[0]
+    assert data_file in payload.staged
+    # the media in the output does not share the file of the source
+    output = os.path.join(str(tmp_path), "media.wav")
+    assert payload._stage(data_file, output, hardlink=False)
+    assert not os.path.samefile(source.source_path(), output)
+    assert payload.staged[output].method != STAGE_METHOD.HARDLINK
+
+
+def merge_first(data_files):
+    return data_files[0]
+
+
+class LazyAudioPayload(AudioPayload):
+    """ audio payload that merges into its first data file """
+    def _merge_function(self):
+        return partial(merge_first, list(self.data_files))
+
+
+def test_pickled_methods_do_not_merge(tmp_path):
+    source = make_source(tmp_path, "lazy")
+    payload = LazyAudioPayload(source, WorkspaceManager(str(tmp_path)))
+    methods = pickle.loads(pickle.dumps(GBPluginMethods(payload, "suite")))
+    assert not payload._merge_done
+    # the copy merges the audio when a plugin asks for it
+    assert methods.merged_media == payload.data_files[0]
+    assert not payload._merge_done
+
+    # audio that is already merged is sent as its path
+    assert payload.merged_audio == payload.data_files[0]
+    accessor = pickle.loads(pickle.dumps(GBPluginMethods(payload, "suite"))).payload._merged_audio
+    assert accessor.merge is None and accessor.path == payload.data_files[0]
+
+
+def test_worker_merge_is_not_repeated(tmp_path):
+    source = make_source(tmp_path, "worker")
+    payload = CountingAudioPayload(source, WorkspaceManager(str(tmp_path)))
+    payload._merge_function = lambda: partial(merge_first, list(payload.data_files))
+    methods = pickle.loads(pickle.dumps(GBPluginMethods(payload, "suite")))
+    assert methods.payload.merged_audio_path is None
+    assert methods.merged_media == payload.data_files[0]
+
+    # the parent records the path merged by the worker
+    payload.merged_audio = methods.payload.merged_audio_path
+    assert payload.merged_audio == payload.data_files[0]
+    assert not hasattr(payload, "merges")
+
+
+class FlakyAudioPayload(AudioPayload):
+    """ audio payload whose first merge fails """
+    def _merge_audio(self):
+        self.merges = getattr(self, "merges", 0) + 1
+        if self.merges == 1:
+            raise OSError("merge failed")
+        self.merged_audio = self.data_files[0]
+
+
+def test_failed_merge_is_retried(tmp_path):
+    source = make_source(tmp_path, "flaky")
+    payload = FlakyAudioPayload(source, WorkspaceManager(str(tmp_path)))
+    assert payload.merged_audio is None
+    assert not payload._merge_done
+    assert payload.merged_audio == payload.data_files[0]
+    assert payload.merged_audio == payload.data_files[0]
+    assert payload.merges == 2
@@ -0,0 +1,132 @@
+import os
+
+import pytest
+
+from gailbot.core.engines.engineManager import EngineManager
+from gailbot.core.utils.general import write_toml
+from gailbot.services.organizer.settings import SettingManager
+from gailbot.services.organizer.settings.interface import watsonInterface, googleInterface
+from gailbot.services.organizer.settings.interface.validationCache import (
+    ValidationCache,
+    VALIDATION_CACHE,
+)
+
+WATSON_SETTING = {
+    "engine": "watson",
+    "apikey": "api-key",
+    "region": "dallas",
+    "base_model": "en-US_NarrowbandModel",
+}
+
+
+class StubEngine:
+    """ records the credentials that are validated, every credential is
+        valid unless it is in invalid
+    """
+    calls = []
+    invalid = set()
+
+    @classmethod
+    def valid_init_kwargs(cls, apikey, region):
+        cls.calls.append(apikey)
+        return apikey not in cls.invalid
+
+    @classmethod
+    def is_valid_google_api(cls, google_api_key):
+        cls.calls.append(google_api_key)
+        return google_api_key not in cls.invalid
+
+
+@pytest.fixture
+def stub_engine(monkeypatch):
+    StubEngine.calls, StubEngine.invalid = [], set()
+    monkeypatch.setattr(EngineManager, "engine_class", classmethod(lambda cls, name: StubEngine))
+    monkeypatch.setattr(watsonInterface, "is_internet_connected", lambda: True)
+    VALIDATION_CACHE.invalidate()
+    yield StubEngine
+    VALIDATION_CACHE.invalidate()
+
+
+@pytest.fixture
+def new_manager(monkeypatch):
+    """ the settings are stored on the class, every manager starts empty """
+    def make(workspace):
+        monkeypatch.setattr(SettingManager, "profiles", dict())
+        monkeypatch.setattr(SettingManager, "engine_settings", dict())
+        return SettingManager(str(workspace))
+    return make
+
+
+def test_cache_ttl():
+    now = [0.0]
+    cache = ValidationCache(ttl=10, clock=lambda: now[0])
+    calls = []
+
+    def check():
+        calls.append(now[0])
+        return True
+
+    key = cache.fingerprint("watson", "key", "dallas")
+    assert key != cache.fingerprint("watson", "key", "london")
+    assert cache.validate(key, check) and cache.validate(key, check)
+    assert calls == [0.0]
+    now[0] = 11.0
+    assert cache.validate(key, check)
+    assert calls == [0.0, 11.0]
+
+
+def test_cache_does_not_keep_failures():
+    cache = ValidationCache(ttl=10)
+    results = [False, True]
+    assert not cache.validate("key", lambda: results.pop(0))
+    assert cache.validate("key", lambda: results.pop(0))
+
+    def unreachable():
+        raise ConnectionError("offline")
+    assert not cache.validate("other", unreachable)
+
+
+def test_stored_settings_are_validated_on_use(tmp_path, stub_engine, new_manager):
+    workspace = tmp_path / "settings"
+    engine_path = workspace / "engine_setting" / "watson.toml"
+    profile_path = workspace / "watson profile.toml"
+    os.makedirs(engine_path.parent)
+    write_toml(str(engine_path), WATSON_SETTING)
+    write_toml(str(profile_path), {"engine_setting": WATSON_SETTING,
+                                   "engine_setting_name": "watson",
+                                   "plugin_setting": []})
+    mtimes = [os.stat(engine_path).st_mtime_ns, os.stat(profile_path).st_mtime_ns]
+
+    # loading neither validates the credentials nor writes the files again
+    manager = new_manager(workspace)
+    assert manager.is_engine_setting("watson") and manager.is_setting("watson profile")
+    assert stub_engine.calls == []
+    assert [os.stat(engine_path).st_mtime_ns, os.stat(profile_path).st_mtime_ns] == mtimes
+
+    # the credentials are validated once when the setting is used
+    engine = manager.get_setting("watson profile").engine_setting
+    assert engine.validate() and engine.validate()
+    assert stub_engine.calls == ["api-key"]
+
+    # an edited setting is validated right away
+    stub_engine.invalid.add("wrong-key")
+    assert not manager.update_engine_setting("watson", dict(WATSON_SETTING, apikey="wrong-key"))
+    assert manager.update_engine_setting("watson", dict(WATSON_SETTING, apikey="new-key"))
+    assert stub_engine.calls == ["api-key", "wrong-key", "new-key"]
+
+    # a new setting is validated when it is added
+    assert not manager.add_new_engine("wrong", dict(WATSON_SETTING, apikey="wrong-key"))
+    assert stub_engine.calls[-1] == "wrong-key"
+
+
+def test_google_key_cached_by_content(tmp_path, stub_engine):
+    key_file = tmp_path / "key.json"
+    key_file.write_text('{"key": 1}')
+    assert googleInterface.validate_google_api(str(key_file))
+    assert googleInterface.validate_google_api(str(key_file))
+    assert len(stub_engine.calls) == 1
+
+    key_file.write_text('{"key": 2}')
+    assert googleInterface.validate_google_api(str(key_file))
+    assert len(stub_engine.calls) == 2
+    assert not googleInterface.validate_google_api(str(tmp_path / "missing.json"))
@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+
+from gailbot.services.pipeline.components.analysisComponent import AnalysisComponent
+
+
+def test_failed_payload_is_skipped():
+    component = AnalysisComponent(plugin_manager=None)
+    payload = SimpleNamespace(name="failed", failed=True, progress_display=None)
+    assert component.analyze_payload(payload)
+
+
+def test_worker_merged_audio_is_set(monkeypatch):
+    component = AnalysisComponent(plugin_manager=None, backend="process")
+    pool = SimpleNamespace(submit=lambda envelope: SimpleNamespace(
+        result=lambda: ({"plugin": "success"}, "merged.wav")))
+    monkeypatch.setattr(component, "_get_process_pool", lambda: pool)
+    payload = SimpleNamespace(merged_audio=None)
+    method = SimpleNamespace(payload=payload)
+    plugin_suite = SimpleNamespace(dict_conf={}, source_path="")
+    assert component._apply_suite(plugin_suite, method) == {"plugin": "success"}
+    assert payload.merged_audio == "merged.wav"
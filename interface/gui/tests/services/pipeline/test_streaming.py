@@ -0,0 +1,86 @@
+import time
+import threading
+
+from gailbot.services.pipeline.streaming import StreamingPipeline, Stage
+
+
+class Item:
+    def __init__(self, name, duration = 0.0, fail_at = None):
+        self.name = name
+        self.duration = duration
+        self.fail_at = fail_at
+        self.failed = False
+        self.stages = []
+
+
+def make_stage(name, log, num_workers = 1):
+    def run(item: Item):
+        if item.failed:
+            return True
+        if name == "transcription":
+            time.sleep(item.duration)
+        if item.fail_at == name:
+            raise ValueError(f"{item.name} failed")
+        item.stages.append(name)
+        log.append((name, item.name, time.time()))
+        return True
+    return Stage(name, run, num_workers)
+
+
+def mark_failed(item, stage):
+    item.failed = True
+
+
+def test_short_items_are_not_held_back():
+    log = []
+    pipeline = StreamingPipeline(
+        [make_stage("transcription", log, 4), make_stage("analysis", log),
+         make_stage("format", log)])
+    items = [Item("long", 1.0)] + [Item(f"short{i}", 0.01) for i in range(10)]
+    start = time.time()
+    finished = pipeline(items, on_failure=mark_failed)
+
+    assert len(finished) == len(items)
+    assert finished[-1].name == "long"
+    short_done = max(t for stage, name, t in log
+                     if stage == "format" and name.startswith("short"))
+    assert short_done - start < 0.5
+    assert all(item.stages == ["transcription", "analysis", "format"] for item in items)
+
+
+def test_failure_is_per_item():
+    log = []
+    pipeline = StreamingPipeline(
+        [make_stage("transcription", log, 2), make_stage("analysis", log, 2),
+         make_stage("format", log)])
+    items = [Item("ok1"), Item("bad", fail_at="analysis"), Item("ok2")]
+    failed = []
+    pipeline(items, on_failure=lambda item, stage: (mark_failed(item, stage),
+                                                    failed.append((item.name, stage))))
+    assert failed == [("bad", "analysis")]
+    assert items[1].stages == ["transcription"]
+    assert items[0].stages == items[2].stages == ["transcription", "analysis", "format"]
+
+
+def test_backpressure_bounds_waiting_items():
+    waiting = []
+    release = threading.Event()
+
+    def slow(item):
+        release.wait(5)
+        return True
+
+    def fast(item):
+        waiting.append(item)
+        return True
+
+    pipeline = StreamingPipeline(
+        [Stage("transcription", fast, 1), Stage("analysis", slow, 1)], queue_size=2)
+    runner = threading.Thread(target=pipeline, args=([Item(str(i)) for i in range(20)],))
+    runner.start()
+    time.sleep(0.3)
+    # one item in analysis, two queued in front of it, one blocked putting
+    assert len(waiting) <= 4
+    release.set()
+    runner.join(10)
+    assert len(waiting) == 20
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from gailbot.core.pipeline import ComponentResult, ComponentState
+from gailbot.services.pipeline.components.transcribeComponent import TranscribeComponent
+
+
+class StubPayload:
+    """ a payload without audio files whose engine credentials are valid
+        or not
+    """
+    def __init__(self, name, valid):
+        self.name = name
+        self.valid = valid
+        self.transcribed = False
+        self.failed = False
+        self.progress_display = None
+        self.workspace = SimpleNamespace(transcribe_ws="")
+        self.data_files = []
+        self.result = None
+
+    def get_engine(self):
+        return "whisper"
+
+    def get_engine_init_setting(self):
+        return {}
+
+    def get_engine_transcribe_setting(self):
+        return {}
+
+    def validate_engine_setting(self):
+        return self.valid
+
+    def set_transcription_result(self, result):
+        self.result = result
+        return True
+
+    def set_transcription_process_stats(self, stats):
+        return True
+
+    def set_failure(self):
+        self.failed = True
+
+    def set_transcribed(self):
+        self.transcribed = True
+
+
+def test_invalid_credentials_fail_the_payload():
+    component = TranscribeComponent(cache=None)
+    payload = StubPayload("invalid", valid=False)
+    assert not component.transcribe_payload(payload)
+    assert payload.failed and payload.result is None
+
+
+def test_invalid_credentials_do_not_fail_the_batch():
+    component = TranscribeComponent(cache=None)
+    payloads = [StubPayload("invalid", valid=False), StubPayload("valid", valid=True)]
+    result = component({"base": ComponentResult(
+        state=ComponentState.SUCCESS, result=payloads, runtime=0)})
+    assert result.state == ComponentState.SUCCESS
+    assert payloads[0].failed and not payloads[0].transcribed
+    assert payloads[1].transcribed and payloads[1].result == {}
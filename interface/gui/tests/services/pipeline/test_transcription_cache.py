@@ -0,0 +1,149 @@
+import os
+import time
+from types import SimpleNamespace
+
+from gailbot.services.pipeline.components.transcribeComponent import TranscribeComponent
+from gailbot.services.pipeline.transcriptionCache import TranscriptionCache
+
+UTTERANCES = [{"start": 0.0, "end": 1.0, "speaker": "0", "text": "hello"}]
+
+
+def make_audio(tmp_path, name = "audio.wav", content = b"audio"):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def make_key(cache, audio, model = "small", **kwargs):
+    transcribe_kwargs = {"language": "English",
+                         "audio_path": audio,
+                         "payload_workspace": os.path.dirname(audio)}
+    transcribe_kwargs.update(kwargs)
+    return cache.make_key(audio, "whisper", model, {}, transcribe_kwargs)
+
+
+def test_key(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    audio = make_audio(tmp_path)
+    copy = make_audio(tmp_path, "copy.wav")
+    other = make_audio(tmp_path, "other.wav", b"other audio")
+
+    # the key depends on the content, not on where the file is
+    assert make_key(cache, audio) == make_key(cache, copy)
+    assert make_key(cache, audio) != make_key(cache, other)
+    assert make_key(cache, audio) != make_key(cache, audio, model="large")
+    assert make_key(cache, audio) != make_key(cache, audio, detect_speakers=True)
+
+
+def test_get_put(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    key = make_key(cache, make_audio(tmp_path))
+    assert cache.get(key) is None
+    assert cache.put(key, UTTERANCES, source="audio")
+    assert cache.get(key) == UTTERANCES
+
+    # results persist across instances
+    assert TranscriptionCache(str(tmp_path / "cache")).get(key) == UTTERANCES
+    info = cache.info()
+    assert info["hits"] == 1 and info["misses"] == 1 and info["entries"] == 1
+    assert cache.entries()[0]["source"] == "audio"
+
+    assert cache.remove(key)
+    assert cache.get(key) is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    keys = [make_key(cache, make_audio(tmp_path, f"{i}.wav", bytes([i])))
+            for i in range(3)]
+    cache.put(keys[0], UTTERANCES)
+    entry_size = cache.info()["size_mb"]
+    cache.max_bytes = entry_size * 1024 * 1024 * 2.5
+
+    cache.put(keys[1], UTTERANCES)
+    past = time.time() - 100
+    os.utime(cache._entry_path(keys[0]), (past, past))
+    os.utime(cache._entry_path(keys[1]), (past - 100, past - 100))
+    # using the oldest entry makes it the most recent
+    assert cache.get(keys[1]) == UTTERANCES
+    cache.put(keys[2], UTTERANCES)
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) == UTTERANCES
+    assert cache.get(keys[2]) == UTTERANCES
+    assert cache.info()["evictions"] == 1
+
+
+def test_purge(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    old = make_key(cache, make_audio(tmp_path, "old.wav", b"old"))
+    new = make_key(cache, make_audio(tmp_path, "new.wav", b"new"))
+    cache.put(old, UTTERANCES)
+    cache.put(new, UTTERANCES)
+    past = time.time() - 3600
+    os.utime(cache._entry_path(old), (past, past))
+
+    assert cache.purge(older_than_sec=60) == 1
+    assert cache.get(old) is None and cache.get(new) == UTTERANCES
+    assert cache.purge() == 1
+    assert cache.info()["entries"] == 0
+
+
+class CachedPayload:
+    """ a payload transcribed with whisper that records its progress """
+    def __init__(self, tmp_path, data_files):
+        self.name = "cached"
+        self.data_files = data_files
+        self.workspace = SimpleNamespace(transcribe_ws=str(tmp_path))
+        self.progress = []
+        self.progress_display = self.progress.append
+        self.result = None
+        self.transcribed = False
+        self.failed = False
+
+    def get_engine(self):
+        return "whisper"
+
+    def get_engine_init_setting(self):
+        return {}
+
+    def get_engine_transcribe_setting(self):
+        return {"language": "English"}
+
+    def validate_engine_setting(self):
+        return True
+
+    def set_transcription_result(self, result):
+        self.result = result
+        return True
+
+    def set_transcription_process_stats(self, stats):
+        return True
+
+    def set_transcribed(self):
+        self.transcribed = True
+
+    def set_failure(self):
+        self.failed = True
+
+
+def test_component_with_every_file_cached(tmp_path, monkeypatch):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    component = TranscribeComponent(cache=cache)
+    monkeypatch.setattr(component.engine_manager, "get_model_name", lambda name: "small")
+    files = [make_audio(tmp_path, f"{i}.wav", bytes([i])) for i in range(2)]
+
+    monkeypatch.setattr(component, "_transcribe_single_file", lambda **kwargs: UTTERANCES)
+    first = CachedPayload(tmp_path, files)
+    assert component.transcribe_payload(first)
+    assert cache.info()["entries"] == 2
+
+    # the second run submits no task and must not fail on its progress bar
+    def transcribe(**kwargs):
+        raise AssertionError("the file is transcribed again")
+    monkeypatch.setattr(component, "_transcribe_single_file", transcribe)
+    second = CachedPayload(tmp_path, files)
+    assert component.transcribe_payload(second)
+    assert not second.failed
+    assert second.result == {"0": UTTERANCES, "1": UTTERANCES}
+    assert any("100.00%" in msg for msg in second.progress)
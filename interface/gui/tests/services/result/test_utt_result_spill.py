@@ -0,0 +1,104 @@
+import copy
+import pickle
+
+from gailbot.services.converter.result import UttResult
+
+
+def make_data(num_files, num_utt = 2000):
+    return {f"file{i}": [{"speaker": str(j % 2),
+                          "start": float(j),
+                          "end": float(j + 1),
+                          "text": f"hello {i} {j}"} for j in range(num_utt)]
+            for i in range(num_files)}
+
+
+def test_in_memory(tmp_path):
+    data = make_data(3)
+    result = UttResult(str(tmp_path))
+    assert result.save_data(data)
+    assert not result.saved_to_disk
+    assert result.get_data() == data
+    # every reader gets the same table without a copy
+    assert result.get_tables()["file0"] is result.get_tables()["file0"]
+
+
+def test_spill_to_disk(tmp_path, monkeypatch):
+    data = make_data(4)
+    result = UttResult(str(tmp_path), memory_budget_mb=0.1, read_cache_mb=1)
+    assert result.save_data(data)
+    assert result.saved_to_disk
+    assert result.filenames and len(result.data) < len(data)
+    assert list(result.get_data().keys()) == list(data.keys())
+    assert result.get_data() == data
+    assert result.get_one_file_data("file3") == {"file3": data["file3"]}
+
+    # spilled results are read from disk once while they fit in the cache
+    loads = []
+    real_load = pickle.load
+    monkeypatch.setattr(pickle, "load", lambda f: loads.append(f) or real_load(f))
+    for _ in range(15):
+        result.get_one_file_data(next(iter(result.filenames)))
+    assert len(loads) <= 1
+
+
+def test_replace_and_output(tmp_path):
+    result = UttResult(str(tmp_path / "ws"), memory_budget_mb=0)
+    result.save_data(make_data(2))
+    new = make_data(1, 3)
+    result.save_data(new)
+    assert result.get_one_file_data("file0") == new
+
+    out = tmp_path / "out"
+    out.mkdir()
+    assert result.output(str(out))
+    assert sorted(p.name for p in out.iterdir()) == ["file0.csv", "file1.csv"]
+
+    loaded = UttResult(str(tmp_path / "ws2"))
+    assert loaded.load_result(str(out))
+    assert sorted(loaded.get_data().keys()) == ["file0", "file1"]
+
+
+def test_dicts_are_memoized(tmp_path, monkeypatch):
+    data = make_data(2, num_utt=10)
+    result = UttResult(str(tmp_path))
+    assert result.save_data(data)
+    conversions = []
+    real_to_dicts = UttResult._to_dicts
+    monkeypatch.setattr(UttResult, "_to_dicts", staticmethod(
+        lambda table: conversions.append(table) or real_to_dicts(table)))
+    first = result.get_data()
+    assert result.get_data() == first
+    assert result.get_one_file_data("file1") == {"file1": first["file1"]}
+    assert len(conversions) == 2
+
+    # setting the result again clears its dictionaries
+    new = make_data(1, num_utt=3)
+    assert result.save_data(new)
+    assert result.get_one_file_data("file0") == new
+    assert result.get_data()["file1"] == first["file1"]
+    assert len(conversions) == 3
+
+
+def test_changes_do_not_reach_other_readers(tmp_path):
+    data = make_data(1, num_utt=3)
+    # results that are not stored as tables are copied as well
+    data["mixed"] = [{"speaker": "0", "start": 0.0, "end": 1.0, "text": "hi", "extra": 1}]
+    expected = copy.deepcopy(data)
+    result = UttResult(str(tmp_path))
+    assert result.save_data(data)
+    for name in expected:
+        mine = result.get_data()[name]
+        mine[0]["text"] = "changed"
+        mine[0]["note"] = "added"
+        mine.append({"text": "appended"})
+        assert result.get_data()[name] == expected[name]
+        assert result.get_one_file_data(name)[name] == expected[name]
+
+
+def test_mixed_fields_round_trip(tmp_path):
+    data = make_data(1, num_utt=3)
+    data["file0"][2]["confidence"] = 0.9
+    expected = copy.deepcopy(data)
+    result = UttResult(str(tmp_path))
+    assert result.save_data(data)
+    assert result.get_data() == expected
@@ -44,30 +44,9 @@ class GapPlugin(Plugin):
         # Get the output of the previous plugin
         cm: ConversationModel = dependency_outputs[PLUGIN_NAME.ConvModel]
 
-        utterances = cm.getUttMap(False)
-
-        mapIter = cm.map_iterator(utterances)  # iterator
-        i = mapIter.iter()  # i is the iterable object
-
-        # while there is still an utterance pair,
-        while i.hasNextPair():
-            pair = i.nextPair()
-            curr_utt = cm.getWordFromNode(pair[0])
-            nxt_utt = cm.getWordFromNode(pair[1])
-            logging.debug(f"get current utterance {curr_utt}, next utterance {nxt_utt}")
-
-            # calculate the floor transfer offset
-            fto = round(nxt_utt[0].startTime - curr_utt[-1].endTime, 2)
-            logging.debug(f"get fto : {fto}")
-
-            # only add a gap marker if speakers are different
-            if fto >= self.lb_gap and curr_utt[0].sLabel != nxt_utt[0].sLabel:
-                markerText = MARKER.TYPE_INFO_SP.format(
-                    MARKER.GAPS, str(round(fto, 1)), str(curr_utt[-1].sLabel)
-                )
-                # insert marker into the tree
-                cm.insertToTree(
-                    curr_utt[-1].endTime, nxt_utt[0].startTime, MARKER.GAPS, markerText
-                )
+        gaps = cm.getTurnAnalysis().gaps
+        # insert markers into the tree
+        cm.insertMarkersToTree(gaps)
+        logging.debug(f"insert {len(gaps)} gap markers")
         self.successful = True
         return cm
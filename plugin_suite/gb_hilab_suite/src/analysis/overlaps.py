@@ -11,11 +11,11 @@ import logging
 from gailbot import Plugin, UttObj, GBPluginMethods
 from gb_hilab_suite.src.core.nodes import Word
 from gb_hilab_suite.src.core.conversation_model import ConversationModel
+from gb_hilab_suite.src.analysis.turn_analysis import overlapPositions, INVALID_OVERLAP
 from gb_hilab_suite.src.configs import INTERNAL_MARKER, load_threshold, PLUGIN_NAME
 
 MARKER = INTERNAL_MARKER
 THRESHOLD = load_threshold()
-INVALID_OVERLAP = (-1, -1, -1, -1)
 
 
 class OverlapPlugin(Plugin):
@@ -44,77 +44,11 @@ class OverlapPlugin(Plugin):
 
         # Get the output of the previous plugin
         cm: ConversationModel = dependency_outputs[PLUGIN_NAME.ConvModel]
-        utterances = cm.getUttMap(False)
-        unique_id = 0
-
-        mapIter = cm.map_iterator(utterances)  # iterator
-        i = mapIter.iter()  # i is the iterable object
         logging.debug(f"start analyze overlap")
-        while i.hasNextPair():
-            pair = i.nextPair()
-            curr_utt = cm.getWordFromNode(pair[0])
-            nxt_utt = cm.getWordFromNode(pair[1])
-
-            # In the case of an overlap, get its 4 marker positions
-            if nxt_utt[0].startTime < curr_utt[-1].endTime:
-                logging.debug(
-                    f"overlap detected between {nxt_utt[0].startTime} and {curr_utt[-1].endTime}"
-                )
-                curr_x, curr_y, nxt_x, nxt_y = self._get_overlap_positions(
-                    curr_utt, nxt_utt
-                )
-                if (curr_x, curr_y, nxt_x, nxt_y) == INVALID_OVERLAP:
-                    logging.warn(f"detect overlap between the same speaker")
-                    continue
-
-                if curr_x >= len(curr_utt):
-                    curr_x = -1
-                if nxt_x >= len(nxt_utt):
-                    nxt_x = -1
-                if curr_y >= len(curr_utt):
-                    curr_y = -1
-                if nxt_y >= len(nxt_utt):
-                    nxt_y = -1
-
-                fst_start = MARKER.TYPE_INFO_SP.format(
-                    MARKER.OVERLAP_FIRST_START, str(unique_id), curr_utt[0].sLabel
-                )
-                fst_end = MARKER.TYPE_INFO_SP.format(
-                    MARKER.OVERLAP_FIRST_END, str(unique_id), curr_utt[0].sLabel
-                )
-                snd_start = MARKER.TYPE_INFO_SP.format(
-                    MARKER.OVERLAP_SECOND_START, str(unique_id), nxt_utt[0].sLabel
-                )
-                snd_end = MARKER.TYPE_INFO_SP.format(
-                    MARKER.OVERLAP_SECOND_END, str(unique_id), nxt_utt[0].sLabel
-                )
-
-                # insert the overlap markers into the tree
-                cm.insertToTree(
-                    curr_utt[curr_x].startTime,
-                    curr_utt[curr_x].startTime,
-                    MARKER.OVERLAPS,
-                    fst_start,
-                )
-                cm.insertToTree(
-                    curr_utt[curr_y].endTime,
-                    curr_utt[curr_y].endTime,
-                    MARKER.OVERLAPS,
-                    fst_end,
-                )
-                cm.insertToTree(
-                    nxt_utt[nxt_x].startTime,
-                    nxt_utt[nxt_x].startTime,
-                    MARKER.OVERLAPS,
-                    snd_start,
-                )
-                cm.insertToTree(
-                    nxt_utt[nxt_y].endTime,
-                    nxt_utt[nxt_y].endTime,
-                    MARKER.OVERLAPS,
-                    snd_end,
-                )
-                unique_id += 1
+        overlaps = cm.getTurnAnalysis().overlaps
+        # insert the overlap markers into the tree
+        cm.insertMarkersToTree(overlaps)
+        logging.debug(f"insert {len(overlaps) // 4} overlaps")
 
         cm.buildUttMap()
         utterances = cm.getUttMap(False)
@@ -125,60 +59,4 @@ class OverlapPlugin(Plugin):
         """
         Return the position of where the overlap markers should be inserted.
         """
-
-        # check speaker label
-        if curr_utt[0].sLabel == nxt_utt[0].sLabel:
-            return INVALID_OVERLAP
-
-        # when there is an overlap and diff speakers
-        next_start = nxt_utt[0].startTime
-        next_end = nxt_utt[-1].endTime
-        curr_start = curr_utt[0].startTime
-        curr_end = curr_utt[-1].endTime
-
-        # do dummy value
-        curr_overlap_start_pos = 0
-        curr_overlap_end_pos = 0
-
-        # iterate through every word in the current utterance
-        for word in curr_utt:
-            if word.startTime < next_end and word.endTime > next_start:
-                # overlap happening
-                if curr_overlap_start_pos != 0 and curr_overlap_end_pos == 0:
-                    curr_overlap_end_pos = curr_overlap_start_pos
-                    curr_overlap_end_pos += 1
-                else:
-                    curr_overlap_end_pos += 1
-            else:
-                if curr_overlap_end_pos == 0:
-                    curr_overlap_start_pos += 1
-                else:
-                    break
-
-        next_overlap_start_pos = 0
-        next_overlap_end_pos = len(nxt_utt) - 1
-
-        # iterate through every word in the next utterance
-        for word in nxt_utt:
-            if word.startTime < curr_end and word.endTime > curr_start:
-                # overlap happening
-                if next_overlap_start_pos != 0 and next_overlap_end_pos == 0:
-                    next_overlap_end_pos = next_overlap_start_pos
-                    next_overlap_end_pos += 1
-                else:
-                    next_overlap_end_pos += 1
-            else:
-                if next_overlap_end_pos == 0:
-                    next_overlap_start_pos += 1
-                else:
-                    break
-
-        if curr_overlap_end_pos == 0 and next_overlap_end_pos == 0:
-            return INVALID_OVERLAP
-
-        return (
-            curr_overlap_start_pos,
-            curr_overlap_end_pos,
-            next_overlap_start_pos,
-            next_overlap_end_pos,
-        )
+        return overlapPositions(curr_utt, nxt_utt)
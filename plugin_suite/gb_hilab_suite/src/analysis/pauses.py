@@ -43,78 +43,10 @@ class PausePlugin(Plugin):
         """
         # Get the output of the previous plugin
         cm: ConversationModel = dependency_outputs[PLUGIN_NAME.ConvModel]
-        utterances = cm.getUttMap(False)
-        logging.info(
-            f"the type of the utterances is {type(utterances)}, the length of the dictionary is {len(utterances.keys())}, they keys are {utterances.keys()}"
-        )
-        mapIter = cm.map_iterator(utterances)  # iterator
-        i = mapIter.iter()  # i is the iterable object
         logging.info("start to pauses analysis")
-        while i.hasNextPair():
-            logging.info("has pair")
-            pair = i.nextPair()
-            curr_utt = cm.getWordFromNode(pair[0])
-            logging.info(curr_utt)
-
-            nxt_utt = cm.getWordFromNode(pair[1])
-            logging.info(nxt_utt)
-
-            if curr_utt[0].sLabel == nxt_utt[0].sLabel:
-                fto = round(nxt_utt[0].startTime - curr_utt[-1].endTime, 2)
-                markerText = ""
-                logging.info(f"get fto {fto}")
-
-                if (THRESHOLD.LB_LATCH <= fto) and (fto <= THRESHOLD.UB_LATCH):
-                    logging.debug(f"latch detected with fto {fto}")
-                    markerText = MARKER.TYPE_INFO_SP.format(
-                        MARKER.PAUSES, str(round(fto, 2)), str(curr_utt[-1].sLabel)
-                    )
-                    cm.insertToTree(
-                        curr_utt[-1].endTime,
-                        nxt_utt[0].startTime,
-                        MARKER.PAUSES,
-                        markerText,
-                    )
-                    logging.debug(f"insert the latch marker {markerText}")
-
-                elif THRESHOLD.LB_PAUSE <= fto <= THRESHOLD.UB_PAUSE:
-                    logging.debug(f" pauses detected with fto {fto}")
-                    markerText = MARKER.TYPE_INFO_SP.format(
-                        MARKER.PAUSES, str(round(fto, 2)), str(curr_utt[-1].sLabel)
-                    )
-                    cm.insertToTree(
-                        curr_utt[-1].endTime,
-                        nxt_utt[0].startTime,
-                        MARKER.PAUSES,
-                        markerText,
-                    )
-                    logging.debug(f"insert the pause marker {markerText}")
-
-                elif THRESHOLD.LB_MICROPAUSE <= fto <= THRESHOLD.UB_MICROPAUSE:
-                    logging.debug(f"micro pauses detected with fto {fto}")
-                    markerText = MARKER.TYPE_INFO_SP.format(
-                        MARKER.PAUSES, str(round(fto, 1)), str(curr_utt[-1].sLabel)
-                    )
-                    cm.insertToTree(
-                        curr_utt[-1].endTime,
-                        nxt_utt[0].startTime,
-                        MARKER.PAUSES,
-                        markerText,
-                    )
-                    logging.debug(f"insert the micro pause marker {markerText}")
-
-                elif fto >= THRESHOLD.LB_LARGE_PAUSE:
-                    logging.debug(f"large pauses detected with fto {fto}")
-                    markerText = MARKER.TYPE_INFO_SP.format(
-                        MARKER.PAUSES, str(round(fto, 1)), str(curr_utt[-1].sLabel)
-                    )
-                    cm.insertToTree(
-                        curr_utt[-1].endTime,
-                        nxt_utt[0].startTime,
-                        MARKER.PAUSES,
-                        markerText,
-                    )
-                    logging.debug(f"insert the larger pause marker {markerText}")
+        pauses = cm.getTurnAnalysis().pauses
+        cm.insertMarkersToTree(pauses)
+        logging.debug(f"insert {len(pauses)} pause markers")
 
         cm.buildUttMap()
         self.successful = True
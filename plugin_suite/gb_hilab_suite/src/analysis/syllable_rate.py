@@ -5,14 +5,16 @@
 # @Last Modified time: 2022-08-24 12:12:15
 
 
-from typing import Dict, Any, List, TypedDict
+from typing import Dict, Any, Iterable, List, TypedDict, Union
+from collections import Counter, OrderedDict
+from threading import Lock
 import logging
 from scipy.stats import median_abs_deviation
 import syllables
 import numpy
 from gailbot import Plugin, GBPluginMethods, UttObj
 from gb_hilab_suite.src.core.conversation_model import ConversationModel
-from gb_hilab_suite.src.core.nodes import Node
+from gb_hilab_suite.src.core.nodes import Node, Marker
 from gb_hilab_suite.src.configs import INTERNAL_MARKER, load_threshold, PLUGIN_NAME
 
 MARKER = INTERNAL_MARKER
@@ -36,6 +38,87 @@ class STAT_DICT(TypedDict):
 
 # The number of deviations above or below the absolute median deviation.
 LimitDeviations = 2
+# The number of distinct tokens whose syllable counts are kept.
+SyllableCacheSize = 50000
+
+
+class SyllableCache:
+    """
+    Bounded memo of syllable counts keyed by token. Conversational speech
+    repeats a small vocabulary, so the counts are estimated once per distinct
+    token, and the least recently used tokens are dropped once the cache is
+    full. The cache is shared by the payloads of a run.
+    """
+
+    def __init__(self, maxsize: int = SyllableCacheSize) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._counts: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def estimateMany(self, tokens: Iterable[str]) -> Dict[str, int]:
+        """
+        Returns the syllable count of every token, the counts of the distinct
+        tokens that are not cached are estimated in one batch
+
+        Args:
+            tokens (Iterable[str]): the tokens, with repetitions
+
+        Returns:
+            Dict[str, int]: maps every distinct token to its syllable count
+        """
+        occurrences = Counter(self.normalize(token) for token in tokens)
+        counts = dict()
+        with self._lock:
+            for token in occurrences:
+                if token in self._counts:
+                    self._counts.move_to_end(token)
+                    counts[token] = self._counts[token]
+                else:
+                    counts[token] = self._counts[token] = syllables.estimate(token)
+                    self.misses += 1
+                    # the other occurrences of the token reuse the estimate
+                    occurrences[token] -= 1
+                self.hits += occurrences[token]
+            while len(self._counts) > self.maxsize:
+                self._counts.popitem(last=False)
+        return counts
+
+    def estimate(self, token: str) -> int:
+        return self.estimateMany([token])[self.normalize(token)]
+
+    @staticmethod
+    def normalize(token: str) -> str:
+        """
+        Returns the key of a token, the estimate depends on the case of the
+        token, so only the type is normalized
+        """
+        return str(token)
+
+    def hitRate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._counts),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hitRate(),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# shared by every SyllableRatePlugin in the process
+SYLLABLE_CACHE = SyllableCache()
 
 
 class SyllableRatePlugin(Plugin):
@@ -45,6 +128,7 @@ class SyllableRatePlugin(Plugin):
         """
         super().__init__()
         self.marker_limit = THRESHOLD.OVERLAP_MARKERLIMIT
+        self.cache = SYLLABLE_CACHE
 
     def apply(
         self, dependency_outputs: Dict[str, Any], methods: GBPluginMethods
@@ -63,13 +147,15 @@ class SyllableRatePlugin(Plugin):
         syll_dict = self.syll_rate(cm, utterances)
         logging.debug("computed syllable dictionary")
         cm.Maps["map3"]["uttLevel"]["uttRate"] = syll_dict
+        rates = self.rateArray(syll_dict)
 
         # list of dic, each ele in dic is corr to an utt
-        statsDic = self.stats(cm.Maps["map3"]["uttLevel"]["uttRate"])
+        statsDic = self.stats(rates)
         cm.Maps["map3"]["convLevel"]["stats"] = statsDic
 
         # add marker to the tree based on the syllable dictionary
-        self.addDelims(cm, syll_dict, statsDic)
+        self.addDelims(cm, syll_dict, statsDic, rates)
+        logging.info(f"syllable cache {self.cache.info()}")
 
         self.successful = True
         return cm
@@ -81,48 +167,52 @@ class SyllableRatePlugin(Plugin):
         Calculates the syllable rates for each utterance
         """
         logging.debug("start computing syllable dictionary")
-        mapIter = cm.map_iterator(utterances)  # iterator
-        i = mapIter.iter()  # i is the iterable object
+        utts = list(utterances.values())
+        words = [cm.getWordFromNode(utt) for utt in utts]
+        # estimate the syllables of the vocabulary at once
+        counts = self.cache.estimateMany(word.text for curr_utt in words for word in curr_utt)
+        normalize = self.cache.normalize
+        syllNums = [sum(counts[normalize(word.text)] for word in curr_utt) for curr_utt in words]
 
-        # while there is still an utterance
-        syll_num = 0
         utt_syll_dict = []  # list of dictionary
-
-        while i.hasNext():
-            utt = i.next()
-            curr_utt = cm.getWordFromNode(utt)
-            syll_num = sum([syllables.estimate(word.text) for word in curr_utt])
-            logging.debug(f"estimated syllable num {syll_num}")
+        for utt, curr_utt, syll_num in zip(utts, words, syllNums):
             time_diff = abs(curr_utt[0].startTime - curr_utt[-1].endTime)
-            logging.warn(f"get time {curr_utt[0].startTime} and {curr_utt[-1].endTime}")
-
             if time_diff == 0:
                 logging.warn(
                     f"get no 0 time difference between the words {curr_utt[0].text} and {curr_utt[-1].text}"
                 )
                 time_diff = 0.001
 
-            syll_rate = round(syll_num / time_diff, 2)
             new_syll_dict: SYLL_DICT = {
                 "utt": utt,
                 "syllableNum": syll_num,
-                "syllRate": syll_rate,
+                "syllRate": round(syll_num / time_diff, 2),
             }
-            logging.debug(f"get new syllable dictionary {new_syll_dict}")
             utt_syll_dict.append(new_syll_dict)
-
+        logging.debug(f"computed the syllable rates of {len(utt_syll_dict)} utterances")
         return utt_syll_dict
 
-    def stats(self, utt_syll_dict) -> STAT_DICT:
+    @staticmethod
+    def rateArray(
+        rates: Union[List[SYLL_DICT], numpy.ndarray]
+    ) -> numpy.ndarray:
+        """
+        Returns the syllable rates of the utterances as an array
+        """
+        if isinstance(rates, numpy.ndarray):
+            return rates
+        return numpy.fromiter((dic["syllRate"] for dic in rates), numpy.float64, len(rates))
+
+    def stats(self, rates: Union[List[SYLL_DICT], numpy.ndarray]) -> STAT_DICT:
         """
         Creates a dictionary containing the statistics
+
+        Args:
+            rates: the syllable rates of the utterances, or the list of
+                   syllable dictionaries
         """
         logging.debug("start analysis syllable rate stats")
-        allRates = []
-        for dic in utt_syll_dict:
-            allRates.append(dic["syllRate"])
-
-        allRates = numpy.sort(numpy.array(allRates))
+        allRates = numpy.sort(self.rateArray(rates))
         median = numpy.median(allRates)
         median_absolute_deviation = round(median_abs_deviation(allRates), 2)
         lowerLimit = median - (LimitDeviations * median_absolute_deviation)
@@ -141,87 +231,75 @@ class SyllableRatePlugin(Plugin):
         cm: ConversationModel,
         dictionaryList: List[SYLL_DICT],
         statsDic: STAT_DICT,
+        rates: numpy.ndarray = None,
     ):
         """
-        Adds fast and slow speech delimiter markers into the tree.
+        Adds fast and slow speech delimiter markers into the tree, the
+        utterances with slow or fast speech are found from the array of
+        syllable rates and their markers are inserted at once.
         """
         logging.debug("start add marker to syllable tree")
+        if rates is None:
+            rates = self.rateArray(dictionaryList)
+        slow = rates <= statsDic["lowerLimit"]
+        fast = ~slow & (rates >= statsDic["upperLimit"])
         vowels = ["a", "e", "i", "o", "u"]
         fastCount = 0
         slowCount = 0
-        for utt_dict in dictionaryList:
+        markers = []
+        for index in numpy.flatnonzero(slow | fast).tolist():
+            utt_dict = dictionaryList[index]
             utt_words = cm.getWordFromNode(utt_dict["utt"])
-
-            if utt_words[0].text not in MARKER.UTT_PAUSE_MARKERS:
-                if utt_dict["syllRate"] <= statsDic["lowerLimit"]:
-                    logging.debug("detect potential slow speech")
-                    if len(utt_words) == 1 and any(
-                        char in vowels for char in utt_words[0].text
-                    ):
-                        pos = self.lastVowelPos(utt_words[0].text)
-                        colons = self.numColons(
-                            statsDic["medianAbsDev"],
-                            utt_dict["syllRate"],
-                            statsDic["median"],
-                        )
-                    else:
-                        markerText1 = MARKER.TYPE_INFO_SP.format(
-                            MARKER.SLOWSPEECH_START,
-                            MARKER.SLOWSPEECH_DELIM,
-                            utt_words[0].sLabel,
-                        )
-                        markerText2 = MARKER.TYPE_INFO_SP.format(
-                            MARKER.SLOWSPEECH_END,
-                            MARKER.SLOWSPEECH_DELIM,
-                            utt_words[0].sLabel,
-                        )
-
-                        cm.insertToTree(
-                            utt_words[0].startTime,
-                            utt_words[0].startTime,
-                            MARKER.SLOWSPEECH_START,
-                            markerText1,
-                        )
-                        cm.insertToTree(
-                            utt_words[-1].endTime,
-                            utt_words[-1].endTime,
-                            MARKER.SLOWSPEECH_END,
-                            markerText2,
-                        )
-                        logging.debug(
-                            f"insert marker for slow speech start {markerText1}, \
-                                        and slow speech end {markerText2}"
-                        )
-                        slowCount += 1
-                elif utt_dict["syllRate"] >= statsDic["upperLimit"]:
-                    markerText1 = MARKER.TYPE_INFO_SP.format(
-                        MARKER.FASTSPEECH_END,
-                        MARKER.FASTSPEECH_DELIM,
-                        utt_words[0].sLabel,
-                    )
-                    markerText2 = MARKER.TYPE_INFO_SP.format(
-                        MARKER.FASTSPEECH_END,
-                        MARKER.FASTSPEECH_DELIM,
-                        utt_words[0].sLabel,
+            if utt_words[0].text in MARKER.UTT_PAUSE_MARKERS:
+                continue
+            if slow[index]:
+                logging.debug("detect potential slow speech")
+                if len(utt_words) == 1 and any(
+                    char in vowels for char in utt_words[0].text
+                ):
+                    pos = self.lastVowelPos(utt_words[0].text)
+                    colons = self.numColons(
+                        statsDic["medianAbsDev"],
+                        utt_dict["syllRate"],
+                        statsDic["median"],
                     )
-
-                    cm.insertToTree(
+                else:
+                    markers.append(Marker(
                         utt_words[0].startTime,
                         utt_words[0].startTime,
-                        MARKER.FASTSPEECH_START,
-                        markerText1,
-                    )
-                    cm.insertToTree(
+                        MARKER.SLOWSPEECH_START,
+                        MARKER.SLOWSPEECH_START,
+                        MARKER.SLOWSPEECH_DELIM,
+                        utt_words[0].sLabel,
+                    ))
+                    markers.append(Marker(
                         utt_words[-1].endTime,
                         utt_words[-1].endTime,
-                        MARKER.FASTSPEECH_END,
-                        markerText2,
-                    )
-                    logging.debug(
-                        f"insert marker for fast speech start {markerText1}, \
-                                    and fast speech end {markerText2}"
-                    )
-                    fastCount += 1
+                        MARKER.SLOWSPEECH_END,
+                        MARKER.SLOWSPEECH_END,
+                        MARKER.SLOWSPEECH_DELIM,
+                        utt_words[0].sLabel,
+                    ))
+                    slowCount += 1
+            else:
+                markers.append(Marker(
+                    utt_words[0].startTime,
+                    utt_words[0].startTime,
+                    MARKER.FASTSPEECH_START,
+                    MARKER.FASTSPEECH_END,
+                    MARKER.FASTSPEECH_DELIM,
+                    utt_words[0].sLabel,
+                ))
+                markers.append(Marker(
+                    utt_words[-1].endTime,
+                    utt_words[-1].endTime,
+                    MARKER.FASTSPEECH_END,
+                    MARKER.FASTSPEECH_END,
+                    MARKER.FASTSPEECH_DELIM,
+                    utt_words[0].sLabel,
+                ))
+                fastCount += 1
+        cm.insertMarkersToTree(markers)
         logging.debug(
             f"the total count for fast speech is {fastCount}, for slow speech is {slowCount}"
         )
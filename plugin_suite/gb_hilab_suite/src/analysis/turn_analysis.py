@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# Standard imports
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Local imports
+from gb_hilab_suite.src.core.nodes import Node, Word, Marker
+from gb_hilab_suite.src.configs import INTERNAL_MARKER, load_threshold
+
+MARKER = INTERNAL_MARKER
+THRESHOLD = load_threshold()
+INVALID_OVERLAP = (-1, -1, -1, -1)
+
+# kinds of pauses, in the order they are checked
+NO_PAUSE, LATCH, PAUSE, MICROPAUSE, LARGE_PAUSE = range(5)
+
+
+@dataclass
+class TurnAnalysis:
+    """
+    The markers found between adjacent utterances, each list is in the order
+    the markers are inserted into the tree
+    """
+    overlaps: List[Marker] = field(default_factory=list)
+    pauses: List[Marker] = field(default_factory=list)
+    gaps: List[Marker] = field(default_factory=list)
+
+
+def analyzeTurns(utterances: Dict[int, List[Node]]) -> TurnAnalysis:
+    """
+    Finds the overlaps, pauses and gaps between every pair of adjacent
+    utterances in one pass. The floor transfer offsets, speaker changes and
+    overlaps of all pairs are computed at once from arrays of the first and
+    last word of each utterance, and only the pairs with a marker are visited.
+
+    Args:
+        utterances (Dict[int, List[Node]]): the utterance map
+
+    Returns:
+        TurnAnalysis: the markers to insert into the tree
+    """
+    result = TurnAnalysis()
+    utts = [[node.val for node in nodes] for nodes in utterances.values()]
+    if len(utts) < 2:
+        return result
+
+    speakerIds: Dict = dict()
+    start = np.array([utt[0].startTime for utt in utts], dtype=np.float64)
+    end = np.array([utt[-1].endTime for utt in utts], dtype=np.float64)
+    speaker = np.array(
+        [speakerIds.setdefault(utt[0].sLabel, len(speakerIds)) for utt in utts])
+
+    # the pair i is the utterance i and the utterance i + 1
+    diff = start[1:] - end[:-1]
+    fto = np.fromiter(map(round, diff.tolist(), repeat(2)), np.float64, len(diff))
+    sameSpeaker = speaker[1:] == speaker[:-1]
+
+    for i in np.flatnonzero(start[1:] < end[:-1]).tolist():
+        positions = overlapPositions(utts[i], utts[i + 1])
+        if positions == INVALID_OVERLAP:
+            continue
+        result.overlaps.extend(
+            _overlapMarkers(utts[i], utts[i + 1], positions, len(result.overlaps) // 4))
+
+    kind = np.select(
+        [
+            (THRESHOLD.LB_LATCH <= fto) & (fto <= THRESHOLD.UB_LATCH),
+            (THRESHOLD.LB_PAUSE <= fto) & (fto <= THRESHOLD.UB_PAUSE),
+            (THRESHOLD.LB_MICROPAUSE <= fto) & (fto <= THRESHOLD.UB_MICROPAUSE),
+            fto >= THRESHOLD.LB_LARGE_PAUSE,
+        ],
+        [LATCH, PAUSE, MICROPAUSE, LARGE_PAUSE],
+        NO_PAUSE,
+    )
+    kind[~sameSpeaker] = NO_PAUSE
+    # the marker info is rounded as python floats, as numpy rounds differently
+    ftos = fto.tolist()
+    for i in np.flatnonzero(kind).tolist():
+        digits = 2 if kind[i] in (LATCH, PAUSE) else 1
+        result.pauses.append(Marker(
+            utts[i][-1].endTime,
+            utts[i + 1][0].startTime,
+            MARKER.PAUSES,
+            MARKER.PAUSES,
+            str(round(ftos[i], digits)),
+            str(utts[i][-1].sLabel),
+        ))
+
+    for i in np.flatnonzero((fto >= THRESHOLD.GAPS_LB) & ~sameSpeaker).tolist():
+        result.gaps.append(Marker(
+            utts[i][-1].endTime,
+            utts[i + 1][0].startTime,
+            MARKER.GAPS,
+            MARKER.GAPS,
+            str(round(ftos[i], 1)),
+            str(utts[i][-1].sLabel),
+        ))
+    return result
+
+
+def overlapPositions(curr_utt: List[Word], nxt_utt: List[Word]) -> Tuple[int, int, int, int]:
+    """
+    Return the position of where the overlap markers should be inserted.
+    """
+
+    # check speaker label
+    if curr_utt[0].sLabel == nxt_utt[0].sLabel:
+        return INVALID_OVERLAP
+
+    # when there is an overlap and diff speakers
+    next_start = nxt_utt[0].startTime
+    next_end = nxt_utt[-1].endTime
+    curr_start = curr_utt[0].startTime
+    curr_end = curr_utt[-1].endTime
+
+    # do dummy value
+    curr_overlap_start_pos = 0
+    curr_overlap_end_pos = 0
+
+    # iterate through every word in the current utterance
+    for word in curr_utt:
+        if word.startTime < next_end and word.endTime > next_start:
+            # overlap happening
+            if curr_overlap_start_pos != 0 and curr_overlap_end_pos == 0:
+                curr_overlap_end_pos = curr_overlap_start_pos
+                curr_overlap_end_pos += 1
+            else:
+                curr_overlap_end_pos += 1
+        else:
+            if curr_overlap_end_pos == 0:
+                curr_overlap_start_pos += 1
+            else:
+                break
+
+    next_overlap_start_pos = 0
+    next_overlap_end_pos = len(nxt_utt) - 1
+
+    # iterate through every word in the next utterance
+    for word in nxt_utt:
+        if word.startTime < curr_end and word.endTime > curr_start:
+            # overlap happening
+            if next_overlap_start_pos != 0 and next_overlap_end_pos == 0:
+                next_overlap_end_pos = next_overlap_start_pos
+                next_overlap_end_pos += 1
+            else:
+                next_overlap_end_pos += 1
+        else:
+            if next_overlap_end_pos == 0:
+                next_overlap_start_pos += 1
+            else:
+                break
+
+    if curr_overlap_end_pos == 0 and next_overlap_end_pos == 0:
+        return INVALID_OVERLAP
+
+    return (
+        curr_overlap_start_pos,
+        curr_overlap_end_pos,
+        next_overlap_start_pos,
+        next_overlap_end_pos,
+    )
+
+
+def _overlapMarkers(
+    curr_utt: List[Word], nxt_utt: List[Word], positions: Tuple, unique_id: int
+) -> List[Marker]:
+    """
+    Returns the four markers of an overlap, positions past the end of an
+    utterance are moved to its last word
+    """
+    curr_x, curr_y, nxt_x, nxt_y = positions
+    if curr_x >= len(curr_utt):
+        curr_x = -1
+    if nxt_x >= len(nxt_utt):
+        nxt_x = -1
+    if curr_y >= len(curr_utt):
+        curr_y = -1
+    if nxt_y >= len(nxt_utt):
+        nxt_y = -1
+    return [
+        Marker(
+            curr_utt[curr_x].startTime,
+            curr_utt[curr_x].startTime,
+            MARKER.OVERLAPS,
+            MARKER.OVERLAP_FIRST_START,
+            str(unique_id),
+            curr_utt[0].sLabel,
+        ),
+        Marker(
+            curr_utt[curr_y].endTime,
+            curr_utt[curr_y].endTime,
+            MARKER.OVERLAPS,
+            MARKER.OVERLAP_FIRST_END,
+            str(unique_id),
+            curr_utt[0].sLabel,
+        ),
+        Marker(
+            nxt_utt[nxt_x].startTime,
+            nxt_utt[nxt_x].startTime,
+            MARKER.OVERLAPS,
+            MARKER.OVERLAP_SECOND_START,
+            str(unique_id),
+            nxt_utt[0].sLabel,
+        ),
+        Marker(
+            nxt_utt[nxt_y].endTime,
+            nxt_utt[nxt_y].endTime,
+            MARKER.OVERLAPS,
+            MARKER.OVERLAP_SECOND_END,
+            str(unique_id),
+            nxt_utt[0].sLabel,
+        ),
+    ]
@@ -6,12 +6,14 @@
 
 from dataclasses import dataclass
 from copy import deepcopy
-from typing import Dict, Any, List
+from threading import Lock
+from typing import Dict, Any, List, Tuple
 import logging
 
 # Local imports
-from gb_hilab_suite.src.core.nodes import Word, Node
-from gb_hilab_suite.src.core.utterance_map import UtteranceMapPlugin
+from gb_hilab_suite.src.core.nodes import Word, Node, Marker
+from gb_hilab_suite.src.core.utterance_map import UtteranceMapPlugin, UtteranceGrouper
+from gb_hilab_suite.src.analysis.turn_analysis import TurnAnalysis, analyzeTurns
 from gailbot import Plugin, UttObj, GBPluginMethods
 from gb_hilab_suite.src.configs import INTERNAL_MARKER, load_threshold, PLUGIN_NAME
 
@@ -26,6 +28,88 @@ class CONVERSATION:
     map3 = "map3"
 
 
+class ConversationView:
+    """
+    The utterances of the tree with every marker node parsed once. The view
+    does not depend on how the markers are printed, so it is built once after
+    the analysis plugins and shared by all format plugins, each of which
+    substitutes its own labels for the markers with substitute().
+    """
+
+    def __init__(self, root: Node, version: int) -> None:
+        """
+        Args:
+            root (Node): root of the tree after the analysis plugins
+            version (int): version of the tree the view is built from
+        """
+        self.root = root
+        self.version = version
+        # every item is the node and, for a marker node, the marker
+        self.utterances: Dict[int, List[Tuple[Node, Marker]]] = dict()
+        markers: Dict[int, Marker] = dict()
+        grouper = UtteranceGrouper(
+            self.utterances, THRESHOLD.TURN_END_THRESHOLD_SECS)
+        for currNode in Node.iterNodes(root):
+            word = currNode.val
+            if word.startTime is None:
+                continue
+            if word.sLabel in MARKER.INTERNAL_MARKER_SET:
+                marker = Marker.fromWord(word)
+                # the marker is grouped with the utterances of its speaker
+                currNode = Node(word.startTime, word.endTime, marker.markerSpeaker, None)
+                markers[id(currNode)] = marker
+            grouper.add(word.startTime, currNode.val.sLabel, currNode)
+        for uttId, nodes in self.utterances.items():
+            self.utterances[uttId] = [(node, markers.get(id(node))) for node in nodes]
+
+    def substitute(self, varDict: Dict[str, str]) -> Dict[int, List[Node]]:
+        """
+        Returns the utterance map with the marker nodes substituted with the
+        labels in varDict, the same map as buildUttMapWithChange builds. The
+        marker nodes are new nodes and the other nodes are the nodes of the tree.
+        """
+        uttMap = dict()
+        for uttId, items in self.utterances.items():
+            uttMap[uttId] = [
+                node if marker is None else substituteMarker(marker, varDict)
+                for node, marker in items
+            ]
+        return uttMap
+
+
+def substituteMarker(marker: Marker, varDict: Dict[str, str]) -> Node:
+    """
+    Returns a new node of the marker speaker with the marker substituted with
+    its label in varDict, markers without a label keep their text
+
+    Args:
+        marker (Marker): the marker in the tree
+        varDict (Dict[str, str]): maps the marker types to their labels
+    """
+    startTime, endTime, speaker = marker.startTime, marker.endTime, marker.markerSpeaker
+    if marker.sLabel in varDict:
+        surfaceFormat = varDict[marker.markerType]
+        # specific to XMLSCHEMA plugin for PAUSES marker HACK
+        if marker.markerType == MARKER.PAUSES or marker.markerType == MARKER.GAPS:
+            return Node(
+                startTime,
+                endTime,
+                speaker,
+                surfaceFormat[0]
+                + surfaceFormat[1:-1]
+                + " "
+                + marker.markerInfo
+                + surfaceFormat[-1],
+            )
+        return Node(startTime, endTime, speaker, surfaceFormat)
+
+    text = marker.text
+    for underlyFormat, val in varDict.items():
+        if text.find(underlyFormat) != -1:
+            return Node(startTime, endTime, speaker, val)
+    return Node(startTime, endTime, speaker, text)
+
+
 class ConversationModel:
     """
     This class is a wrapper around ConversationModel, with helper methods to interact
@@ -36,6 +120,16 @@ class ConversationModel:
     Tree: Node = None
     Maps = dict()
 
+    def __init__(self) -> None:
+        # the version changes whenever the tree is modified, the word version
+        # only when a word that is not a marker is inserted or deleted
+        self._version = 0
+        self._wordVersion = 0
+        self._view: ConversationView = None
+        self._turns: TurnAnalysis = None
+        self._turnsVersion = -1
+        self._lock = Lock()
+
     ######################################################################
     ################## BELOW ARE PUBLIC FUNCTIONS ########################
     ######################################################################
@@ -203,7 +297,31 @@ class ConversationModel:
         """
         Inserts a new node into the tree.
         """
-        self.Tree.insert(self.Tree, startTime, endTime, sLabel, text)
+        with self._lock:
+            self.Tree = self.Tree.insert(self.Tree, startTime, endTime, sLabel, text)
+            self._version += 1
+            if sLabel not in MARKER.INTERNAL_MARKER_SET:
+                self._wordVersion += 1
+
+    def insertMarkerToTree(self, marker: Marker) -> None:
+        """
+        Inserts a marker into the tree, the marker text is only formatted
+        when it is output.
+        """
+        with self._lock:
+            self.Tree = self.Tree.insertNode(self.Tree, Node.fromWord(marker))
+            self._version += 1
+
+    def insertMarkersToTree(self, markers: List[Marker]) -> None:
+        """
+        Inserts the markers into the tree at once, in the order of the list.
+        """
+        if not markers:
+            return
+        with self._lock:
+            self.Tree = Node.insertAll(
+                self.Tree, [Node.fromWord(marker) for marker in markers])
+            self._version += 1
 
     def searchTree(self, startTime) -> Word:
         """
@@ -212,12 +330,35 @@ class ConversationModel:
         logging.info(f"search for node with start time {startTime}")
         return self.Tree.search(self.Tree, startTime)
 
+    def searchTreeRange(self, startTime, endTime) -> List[Word]:
+        """
+        Returns the words that start in the time window [startTime, endTime).
+        """
+        return self.Tree.searchRange(self.Tree, startTime, endTime)
+
     def deleteFromTree(self, startTime) -> None:
         """
         Deletes a node, which is found based on its start time, from the tree.
         """
         logging.info(f"delete node {startTime} from tree ")
-        self.Tree.deleteNode(self.Tree, startTime)
+        with self._lock:
+            self.Tree = self.Tree.deleteNode(self.Tree, startTime)
+            self._version += 1
+            self._wordVersion += 1
+
+    def getTurnAnalysis(self) -> TurnAnalysis:
+        """
+        Returns the overlaps, pauses and gaps between the adjacent utterances
+        of the utterance map. Markers are not part of the utterance map, so
+        the analysis is computed once and shared by the analysis plugins
+        until a word is inserted or deleted.
+        """
+        with self._lock:
+            if self._turns is None or self._turnsVersion != self._wordVersion:
+                logging.info("analyze turns")
+                self._turns = analyzeTurns(self.Maps[CONVERSATION.map1])
+                self._turnsVersion = self._wordVersion
+            return self._turns
 
     ################## BELOW ARE UTTMAP FUNCTIONS ########################
 
@@ -245,56 +386,10 @@ class ConversationModel:
         currSL = inputNode.val.sLabel
 
         if currSL in MARKER.INTERNAL_MARKER_SET:
-            arr = inputNode.val.text[1 : len(inputNode.val.text) - 1].split(
-                MARKER.MARKER_SEP
-            )
-            currSL = (arr[-1].split(MARKER.KEYVALUE_SEP))[-1]
-            temp = arr[0].split(MARKER.KEYVALUE_SEP)[-1]
-            markerInfo = arr[1].split(MARKER.KEYVALUE_SEP)[-1]
-            logging.warn(f"maker info is --- {markerInfo}, marker is {temp}")
-            if inputNode.val.sLabel in varDict:
-                surfaceFormat = varDict[temp]
-                logging.info(
-                    f"replace node marker in the tree with node {inputNode},\
-                             replace {temp} with {surfaceFormat}"
-                )
-
-                # specific to XMLSCHEMA plugin for PAUSES marker HACK
-                if temp == MARKER.PAUSES or temp == MARKER.GAPS:
-                    newNode = Node(
-                        inputNode.val.startTime,
-                        inputNode.val.endTime,
-                        currSL,
-                        surfaceFormat[0]
-                        + surfaceFormat[1:-1]
-                        + " "
-                        + markerInfo
-                        + surfaceFormat[-1],
-                    )
-                    return newNode
-
-                newNode = Node(
-                    inputNode.val.startTime,
-                    inputNode.val.endTime,
-                    currSL,
-                    surfaceFormat,
-                )
-                return newNode
-
-            for _, (underlyFormat, val) in enumerate(varDict.items()):
-                if inputNode.val.text.find(underlyFormat) != -1:
-                    newNode = Node(
-                        inputNode.val.startTime, inputNode.val.endTime, currSL, val
-                    )
-                    return newNode
-
-            newNode = Node(
-                inputNode.val.startTime,
-                inputNode.val.endTime,
-                currSL,
-                inputNode.val.text,
-            )
-            return newNode
+            marker = Marker.fromWord(inputNode.val)
+            logging.warn("maker info is --- %s, marker is %s",
+                         marker.markerInfo, marker.markerType)
+            return substituteMarker(marker, varDict)
         else:
             if currSL[0] != "0":
                 logging.warn(f"{currSL} is not in the internal marker set")
@@ -305,100 +400,51 @@ class ConversationModel:
         id = id_arg
 
         def buildUttMapWithChange(
-            currNode: Node, outputUttDict: Dict[str, List[Node]], varDict
+            root: Node, outputUttDict: Dict[str, List[Node]], varDict
         ):
             """
             Called to build a utterance map with marker nodes substituted with the
-            corresponding external format
+            corresponding external format, the nodes are visited in order
 
             """
             nonlocal id
-            currSL = currNode.val.sLabel
-            if currNode.val.sLabel in MARKER.INTERNAL_MARKER_SET:
-                arr = currNode.val.text[1 : len(currNode.val.text) - 1].split(
-                    MARKER.MARKER_SEP
-                )
-                currSL = (arr[-1].split(MARKER.KEYVALUE_SEP))[-1]
-
-            if currNode.left is not None:
-                buildUttMapWithChange(currNode.left, outputUttDict, varDict)
-
-            if currNode.val.startTime is not None:
-                # create the first list in our dictionary
-                if id == 0:
-                    newList = list()
-                    newList.append(self.toReplace(currNode, varDict))
-                    id += 1
-                    outputUttDict[id] = newList
-
-                elif id < 2:
-                    # calculate fto & combine utterance based on sLabel + threshold
-                    fto = currNode.val.startTime - outputUttDict[id][-1].val.endTime
-
-                    if (
-                        currSL == outputUttDict[id][-1].val.sLabel
-                        and fto < THRESHOLD.TURN_END_THRESHOLD_SECS
-                    ):
-                        outputUttDict[id].append(self.toReplace(currNode, varDict))
-                    # if not, create a new list add current node to new list
-                    else:
-                        newList = list()
-                        newList.append(self.toReplace(currNode, varDict))
-                        id += 1
-                        outputUttDict[id] = newList
-
-                else:
-                    # calculate fto & combine utterance based on sLabel + threshold
-                    fto = currNode.val.startTime - outputUttDict[id][-1].val.endTime
-
-                    index2 = id
-                    while (
-                        index2 > 1
-                        and outputUttDict[index2][-1].val.sLabel
-                        in MARKER.INTERNAL_MARKER_SET
-                    ):
-                        index2 -= 1
-                    fto2 = (
-                        currNode.val.startTime - outputUttDict[index2][-1].val.endTime
-                    )
-
-                    index3 = id
-                    while index3 > 1 and (
-                        outputUttDict[index3][-1].val.sLabel != currSL
-                    ):
-                        index3 -= 1
-                    fto3 = (
-                        currNode.val.startTime - outputUttDict[index3][-1].val.endTime
-                    )
-
-                    if (
-                        currSL == outputUttDict[id][-1].val.sLabel
-                        and fto < THRESHOLD.TURN_END_THRESHOLD_SECS
-                    ):
-                        outputUttDict[id].append(self.toReplace(currNode, varDict))
-                    elif (
-                        currSL == outputUttDict[index2][-1].val.sLabel
-                        and fto2 < THRESHOLD.TURN_END_THRESHOLD_SECS
-                    ):
-                        outputUttDict[index2].append(self.toReplace(currNode, varDict))
-                    elif (
-                        fto3 < THRESHOLD.TURN_END_THRESHOLD_SECS
-                        and currSL == outputUttDict[index3][-1].val.sLabel
-                    ):
-                        outputUttDict[index3].append(self.toReplace(currNode, varDict))
-
-                    # if not, create a new list add current node to new list
-                    else:
-                        newList = list()
-                        newList.append(self.toReplace(currNode, varDict))
-                        id += 1
-                        outputUttDict[id] = newList
-
-            if currNode.right is not None:
-                buildUttMapWithChange(currNode.right, outputUttDict, varDict)
+            grouper = UtteranceGrouper(
+                outputUttDict, THRESHOLD.TURN_END_THRESHOLD_SECS, id)
+            for currNode in Node.iterNodes(root):
+                currSL = currNode.val.sLabel
+                if currNode.val.sLabel in MARKER.INTERNAL_MARKER_SET:
+                    currSL = Marker.fromWord(currNode.val).markerSpeaker
+
+                if currNode.val.startTime is not None:
+                    grouper.add(
+                        currNode.val.startTime, currSL, self.toReplace(currNode, varDict))
+            id = grouper.id
 
         return buildUttMapWithChange
 
+    def getConversationView(self) -> ConversationView:
+        """
+        Returns the view of the utterances with the markers parsed, the view
+        is built on first use and again only after the tree is modified
+        """
+        with self._lock:
+            view = self._view
+            if view is None or view.root is not self.Tree or view.version != self._version:
+                logging.info("build conversation view")
+                view = ConversationView(self.Tree, self._version)
+                self._view = view
+            return view
+
+    def getUttMapWithChange(self, varDict: Dict[str, str]) -> Dict[int, List[Node]]:
+        """
+        Returns the utterance map with marker nodes substituted with the
+        labels in varDict, built from the shared conversation view
+
+        Args:
+            varDict (Dict[str, str]): maps the marker types to their labels
+        """
+        return self.getConversationView().substitute(varDict)
+
     def getUttMap(self, copy: bool):
         """
         Returns either the utterance-level dictionary itself or its
@@ -454,6 +500,7 @@ class ConversationModel:
         Update the given map to ConversationModel
         """
         self.Maps[CONVERSATION.map1] = map
+        self._turns = None
 
     ################## BELOW ARE SPEAKERMAP FUNCTIONS ########################
     def getSpeakerMap(self, copy: bool) -> map:
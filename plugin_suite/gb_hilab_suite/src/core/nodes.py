@@ -5,21 +5,164 @@
 # @Last Modified time: 2022-08-24 12:07:34
 
 # Standard imports
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Iterator, Tuple
 from dataclasses import dataclass
+from itertools import count
+import heapq
 import logging
+
+from gb_hilab_suite.src.configs import INTERNAL_MARKER
+
+MARKER = INTERNAL_MARKER
+
+# nodes are ordered by start time, a node inserted with the start time of
+# nodes already in the tree goes after the ones inserted later than the first
+# node and before the first node, the first node keeps the FIRST order
+FIRST = float("inf")
+_insertion_order = count()
+
 @dataclass
 class Word:
     startTime: float
     endTime: float
     sLabel: str
     text: str
-    
+
+
+class Marker:
+    """
+    A marker inserted into the tree by the analysis plugins in place of a
+    Word. The marker type, info and speaker are kept as fields, and the text
+    in the format of MARKER.TYPE_INFO_SP is only built when it is read.
+    """
+    __slots__ = ("startTime", "endTime", "sLabel", "markerType", "markerInfo",
+                 "markerSpeaker", "_text")
+
+    def __init__(self, startTime, endTime, sLabel, markerType, markerInfo, markerSpeaker):
+        """
+        Args:
+            startTime (float): start time
+            endTime (float): end time
+            sLabel (str): the label of the marker in the tree, which is one
+                          of MARKER.INTERNAL_MARKER_SET
+            markerType (str): type of the marker
+            markerInfo (str): information of the marker, such as its duration
+            markerSpeaker (str): speaker the marker belongs to
+
+        The type, info and speaker are kept as strings, as they are in the
+        marker text.
+        """
+        self.startTime = startTime
+        self.endTime = endTime
+        self.sLabel = sLabel
+        self.markerType = str(markerType)
+        self.markerInfo = str(markerInfo)
+        self.markerSpeaker = str(markerSpeaker)
+        self._text = None
+
+    @staticmethod
+    def fromWord(word: Word) -> "Marker":
+        """
+        Returns the marker of a word whose text is in the format of
+        MARKER.TYPE_INFO_SP, a marker is returned as it is
+        """
+        if isinstance(word, Marker):
+            return word
+        text = word.text
+        arr = text[1 : len(text) - 1].split(MARKER.MARKER_SEP)
+        return Marker(
+            word.startTime,
+            word.endTime,
+            word.sLabel,
+            arr[0].split(MARKER.KEYVALUE_SEP)[-1],
+            arr[1].split(MARKER.KEYVALUE_SEP)[-1],
+            arr[-1].split(MARKER.KEYVALUE_SEP)[-1],
+        )
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            return MARKER.TYPE_INFO_SP.format(
+                self.markerType, self.markerInfo, self.markerSpeaker)
+        return self._text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        self._text = text
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Marker):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        return (f"Marker(startTime={self.startTime!r}, endTime={self.endTime!r}, "
+                f"sLabel={self.sLabel!r}, text={self.text!r})")
+
+
 class Node:
+    """
+    Node of a self balancing (AVL) binary search tree ordered by start time.
+    The tree operations are iterative and the operations that change the
+    tree return the new root, which has to be used in place of the old one.
+    """
     def __init__(self, startTime, endTime, speakerLabel, text):
         self.val = Word(startTime, endTime, speakerLabel, text)
         self.left: Node = None
         self.right: Node = None
+        self.height = 1
+        self.order = FIRST
+
+    @staticmethod
+    def fromWord(word: Word) -> "Node":
+        """
+        Returns a node that holds the given Word or Marker
+        """
+        node = Node.__new__(Node)
+        node.val = word
+        node.left = None
+        node.right = None
+        node.height = 1
+        node.order = FIRST
+        return node
+
+    @staticmethod
+    def fromSorted(nodes: List["Node"]) -> "Node":
+        """
+        Builds a balanced tree from nodes sorted by start time
+
+        Args:
+            nodes (List[Node]): nodes in order, nodes with the same start
+                                time keep their order described at FIRST
+
+        Returns:
+            Node: the root of the tree
+        """
+        def build(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            root = nodes[mid]
+            root.left = build(lo, mid)
+            root.right = build(mid + 1, hi)
+            _update(root)
+            return root
+        return build(0, len(nodes))
+
+    @staticmethod
+    def iterNodes(root: "Node") -> Iterator["Node"]:
+        """
+        Yields the nodes of the tree in order of start time
+        """
+        stack = []
+        curr = root
+        while stack or curr is not None:
+            while curr is not None:
+                stack.append(curr)
+                curr = curr.left
+            curr = stack.pop()
+            yield curr
+            curr = curr.right
 
     def inorder(self, vals: List[Word])->List[Word]:
         """
@@ -31,12 +174,9 @@ class Node:
         Returns:
             List[Word] in chronological order
         """
-        if self.left is not None:
-            self.left.inorder(vals)
-        if self.val.startTime is not None:
-            vals.append(self.val)
-        if self.right is not None:
-            self.right.inorder(vals)
+        for node in Node.iterNodes(self):
+            if node.val.startTime is not None:
+                vals.append(node.val)
         return vals
 
     def inorderChange(self, varDict: Dict[str, str]) -> None:
@@ -47,39 +187,81 @@ class Node:
         Args:
             varDict(Dict[str, str]): contains new text for output
         """
-        if self.left:
-            self.left.inorderChange(varDict)
-        if self.val.sLabel in varDict.keys():
-            self.val.text = varDict[self.val.sLabel]
-        if self.right:
-            self.right.inorderChange(varDict)
+        for node in Node.iterNodes(self):
+            if node.val.sLabel in varDict.keys():
+                node.val.text = varDict[node.val.sLabel]
 
-    def insert(self, root, startTime, endTime, speakerLabel, text) -> None:
+    def insert(self, root, startTime, endTime, speakerLabel, text) -> "Node":
         """
-        Inserts a node into the BST by its unique start time
+        Inserts a node into the BST by its start time and rebalances the tree
         Args:
             root (Node):
-            startTime (int): unique start time for node identifier
+            startTime (int): start time, nodes with the same start time are
+                             kept in the order described at FIRST
             endTime (int): end time
             speakerLabel (str): speaker label
             text (str): text
         Returns:
-            Node: void, insert the node at the correct position
+            Node: the new root of the tree, which can differ from the given
+                  root since the tree is rebalanced. Unlike the unbalanced
+                  tree, callers must use the returned root in place of root
+        """
+        return self.insertNode(root, Node(startTime, endTime, speakerLabel, text))
+
+    def insertNode(self, root, newNode) -> "Node":
         """
+        Inserts a new node into the BST by its start time and rebalances the
+        tree, as insert does
+
+        Args:
+            root (Node):
+            newNode (Node): the node to insert, such as a node of a Marker
+
+        Returns:
+            Node: the new root of the tree
+        """
+        startTime = newNode.val.startTime
         if root is None:
-            return Node(startTime, endTime, speakerLabel, text)
+            return newNode
+        if _find(root, (startTime, FIRST)) is not None:
+            newNode.order = next(_insertion_order)
+        key = _key(newNode)
+        path = []
+        curr = root
+        while curr is not None:
+            path.append(curr)
+            curr = curr.left if key < _key(curr) else curr.right
+        parent = path[-1]
+        if key < _key(parent):
+            parent.left = newNode
         else:
-            if root.val.startTime == startTime:
-                # insert to the right is start time is the same
-                newNode = Node(startTime, endTime, speakerLabel, text)
-                newNode.left = root.left
-                root.left = newNode
-            elif root.val.startTime < startTime:
-                root.right = self.insert(root.right, startTime, endTime, speakerLabel, text)
-            else:
-                root.left = self.insert(root.left, startTime, endTime, speakerLabel, text)
-        return root
+            parent.right = newNode
+        return _rebalancePath(path)
+
+    @staticmethod
+    def insertAll(root, newNodes: List["Node"]) -> "Node":
+        """
+        Inserts the nodes into the tree in linear time by merging them with
+        the nodes of the tree and rebuilding the tree, the nodes are ordered
+        as if they were inserted one by one in the given order
 
+        Args:
+            root (Node): root of the tree, or None
+            newNodes (List[Node]): the nodes to insert
+
+        Returns:
+            Node: the root of the new tree
+        """
+        nodes = list(Node.iterNodes(root)) if root is not None else []
+        startTimes = {node.val.startTime for node in nodes}
+        for node in newNodes:
+            if node.val.startTime in startTimes:
+                node.order = next(_insertion_order)
+            else:
+                node.order = FIRST
+                startTimes.add(node.val.startTime)
+        merged = heapq.merge(nodes, sorted(newNodes, key=_key), key=_key)
+        return Node.fromSorted(list(merged))
 
     def search(self, curr, s) -> Word:
         """
@@ -87,111 +269,177 @@ class Node:
 
         Args:
             curr (Node): current node of tree
-            s (int): unique start time for node identifier
+            s (int): start time, the first node inserted with the start time
+                     is returned
 
         Returns:
             Word: the Word object in the corresponding/found Node
         """
+        node = _find(curr, (s, FIRST))
+        return node.val if node is not None else None
 
-        if curr is None:
-            return None
-        else:
-            if curr.val.startTime == s:
-                return curr.val
-            elif curr.val.startTime < s:
-                return self.search(curr.right, s)
-            else:
-                return self.search(curr.left, s)
+    def searchRange(self, root, start, end) -> List[Word]:
+        """
+        Returns the words that start in the time window [start, end)
+
+        Args:
+            root (Node): root of the tree
+            start (float): start of the window
+            end (float): end of the window
+
+        Returns:
+            List[Word]: the words in order of start time
+        """
+        words = []
+        stack = []
+        curr = root
+        while stack or curr is not None:
+            while curr is not None:
+                stack.append(curr)
+                # the left subtree only has earlier words
+                curr = curr.left if curr.val.startTime >= start else None
+            curr = stack.pop()
+            if curr.val.startTime >= end:
+                break
+            if curr.val.startTime >= start:
+                words.append(curr.val)
+            curr = curr.right
+        return words
 
     def deleteNode(self, root, key):
         """
-        Given a binary search tree and a key, this function delete the key
-        and returns the new root
+        Given a binary search tree and a start time, delete the first node
+        inserted with the start time and returns the new root
 
         Args:
-            root (Node): current node of tree
-            key (int): unique start time for node identifier
+            root (Node): root of the tree
+            key (int): start time of the node to be deleted
 
         Returns:
             root
-
-        source: https://www.geeksforgeeks.org/binary-search-tree-set-2-delete/
         """
-
-        # Base Case
-        if root is None:
+        path = []
+        curr = root
+        target = (key, FIRST)
+        while curr is not None and _key(curr) != target:
+            path.append(curr)
+            curr = curr.left if target < _key(curr) else curr.right
+        if curr is None:
             return root
 
-        # If the key to be deleted
-        # is smaller than the root's
-        # key then it lies in  left subtree
-        if key < root.val.startTime:
-            root.left = self.deleteNode(root.left, key)
-
-        # If the kye to be delete
-        # is greater than the root's key
-        # then it lies in right subtree
-        elif(key > root.val.startTime):
-            root.right = self.deleteNode(root.right, key)
-
-        # If key is same as root's key, then this is the node
-        # to be deleted
+        if curr.left is None or curr.right is None:
+            replacement = curr.left if curr.left is not None else curr.right
+            rebalance = path
         else:
-            # Node with only one child or no child
-            if root.left is None:
-                temp = root.right
-                root = None
-                return temp
+            # replace the node with its inorder successor
+            succPath = []
+            succ = curr.right
+            while succ.left is not None:
+                succPath.append(succ)
+                succ = succ.left
+            if succPath:
+                succPath[-1].left = succ.right
+                succ.right = curr.right
+            succ.left = curr.left
+            replacement = succ
+            rebalance = path + [succ] + succPath
+        if path:
+            if path[-1].left is curr:
+                path[-1].left = replacement
+            else:
+                path[-1].right = replacement
+        else:
+            root = replacement
+        curr.left = curr.right = None
+        if rebalance:
+            root = _rebalancePath(rebalance)
 
-            elif root.right is None:
-                temp = root.left
-                root = None
-                return temp
+        # the last node with the same start time takes the place of the
+        # deleted node
+        last = _lastBefore(root, target)
+        if last is not None and last.val.startTime == key:
+            last.order = FIRST
+        return root
+
+    def __str__(self) -> str:
+        return "".join(str(node.val) for node in Node.iterNodes(self))
+    
+    def __repr__(self) -> str:
+        return self.__str__() 
 
-            # Node with two children:
-            # Get the inorder successor
-            # (smallest in the right subtree)
-            temp = self.__minValueNode(root.right)
 
-            # Copy the inorder successor's
-            # content to this node
-            root.val = temp.val
+def _key(node: Node) -> Tuple[float, float]:
+    return (node.val.startTime, node.order)
 
-            # Delete the inorder successor
-            root.right = self.deleteNode(root.right, temp.val.startTime)
+def _height(node: Node) -> int:
+    return node.height if node is not None else 0
 
-        return root
+def _update(node: Node) -> None:
+    node.height = 1 + max(_height(node.left), _height(node.right))
 
-    def __minValueNode(self, node):
-        """
-        Return the node of a given tree with the minimum
-        key value found in that tree. Note that the entire
-        tree does not need to be searched.
+def _rotateLeft(node: Node) -> Node:
+    right = node.right
+    node.right = right.left
+    right.left = node
+    _update(node)
+    _update(right)
+    return right
 
-        Credit: https://www.geeksforgeeks.org/binary-search-tree-set-2-delete/
+def _rotateRight(node: Node) -> Node:
+    left = node.left
+    node.left = left.right
+    left.right = node
+    _update(node)
+    _update(left)
+    return left
 
-        Args:
-            node (Node): current node of tree
+def _rebalance(node: Node) -> Node:
+    """ restore the AVL property at the node, return the subtree root """
+    _update(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotateLeft(node.left)
+        return _rotateRight(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotateRight(node.right)
+        return _rotateLeft(node)
+    return node
 
-        Returns:
-            Node: the tree's node with the minimum key value
-        """
-        current = node
+def _rebalancePath(path: List[Node]) -> Node:
+    """ rebalance the nodes on the path from the root, bottom up, and
+        return the new root
+    """
+    child = None
+    for i in range(len(path) - 1, -1, -1):
+        node = path[i]
+        if child is not None:
+            # the subtree below the node may have a new root
+            if i + 1 < len(path) and node.left is path[i + 1]:
+                node.left = child
+            elif i + 1 < len(path) and node.right is path[i + 1]:
+                node.right = child
+        child = _rebalance(node)
+    return child
 
-        # loop down to find the leftmost leaf
-        while(current.left is not None):
-            current = current.left
-        return current
+def _find(root: Node, key: Tuple[float, float]) -> Node:
+    curr = root
+    while curr is not None:
+        currKey = _key(curr)
+        if currKey == key:
+            return curr
+        curr = curr.left if key < currKey else curr.right
+    return None
 
-    def __str__(self) -> str:
-        if not self.left and not self.right:
-            return str(self.val)
-        elif not self.right:
-            return str(self.left) + str(self.val)
-        elif not self.left:
-            return str(self.val) + str(self.right)
+def _lastBefore(root: Node, key: Tuple[float, float]) -> Node:
+    """ return the node with the largest key smaller than the key """
+    result = None
+    curr = root
+    while curr is not None:
+        if _key(curr) < key:
+            result = curr
+            curr = curr.right
         else:
-            return str(self.left) + str(self.val) + str(self.right)
-    
-    def __repr__(self) -> str:
-        return self.__str__() 
\ No newline at end of file
+            curr = curr.left
+    return result
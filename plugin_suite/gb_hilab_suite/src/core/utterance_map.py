@@ -47,74 +47,111 @@ class UtteranceMapPlugin(Plugin):
     def outer_create_dict(self, id_arg):
         id = id_arg
        
-        def create_dict(currNode: Node, uttDict: Dict[str, List[Node]]):
-            nonlocal id
-            currSL = currNode.val.sLabel
-
+        def create_dict(root: Node, uttDict: Dict[str, List[Node]]):
             """
             Given the root of a tree, create an utterance dictionary that
             maps a speaker ID to a list of utterances.
 
             Args:
-                currNode (Node): current node to be added
+                root (Node): root of the tree, the nodes are visited in order
                 uttDict (Dict[int:List[Node]]): utterance map
             """
-            if currNode.left is not None:
-                create_dict(currNode.left, uttDict)
-
-            if (currNode.val.startTime is not None) and (currSL not in MARKER.INTERNAL_MARKER_SET):
-
-                # create the first list in our dictionary
-                if id == 0:
-                    newList = list()
-                    newList.append(currNode)
-                    id += 1
-                    # create a new list with updated speaker label ID
-                    uttDict[id] = newList
-
-                elif id < 2:
-                    # calculate fto & combine utterance based on sLabel + threshold
-                    fto = currNode.val.startTime - uttDict[id][-1].val.endTime
-                    if currSL == uttDict[id][-1].val.sLabel and fto < self.turn_end_threshold_secs:
-                        uttDict[id].append(currNode)
-                    # if not, create a new list add current node to new list
-                    else:
-                        newList = list()
-                        newList.append(currNode)
-                        id += 1
-                        uttDict[id] = newList
-
-                else:
-                    # calculate fto & combine utterance based on sLabel + threshold
-                    fto = currNode.val.startTime - uttDict[id][-1].val.endTime
-
-                    index2 = id
-                    while index2 > 1 and uttDict[index2][-1].val.sLabel in MARKER.INTERNAL_MARKER_SET:
-                        index2 -= 1
-                    fto2 = currNode.val.startTime - \
-                        uttDict[index2][-1].val.endTime
-
-                    index3 = id
-                    while index3 > 1 and (uttDict[index3][-1].val.sLabel != currSL):
-                        index3 -= 1
-                    fto3 = currNode.val.startTime - \
-                        uttDict[index3][-1].val.endTime
-
-                    if currSL == uttDict[id][-1].val.sLabel and fto < self.turn_end_threshold_secs:
-                        uttDict[id].append(currNode)
-                    elif currSL == uttDict[index2][-1].val.sLabel and fto2 < self.turn_end_threshold_secs:
-                        uttDict[index2].append(currNode)
-                    elif fto3 < self.turn_end_threshold_secs and currSL == uttDict[index3][-1].val.sLabel:
-                        uttDict[index3].append(currNode)
-
-                    # if not, create a new list add current node to new list
-                    else:
-                        newList = list()
-                        newList.append(currNode)
-                        id += 1
-                        uttDict[id] = newList
-
-            if currNode.right is not None:
-                create_dict(currNode.right, uttDict)
-                
+            nonlocal id
+            grouper = UtteranceGrouper(uttDict, self.turn_end_threshold_secs, id)
+            for currNode in Node.iterNodes(root):
+                currSL = currNode.val.sLabel
+                if (currNode.val.startTime is not None) and (currSL not in MARKER.INTERNAL_MARKER_SET):
+                    grouper.add(currNode.val.startTime, currSL, currNode)
+            id = grouper.id
+
         return create_dict
+
+
+class UtteranceGrouper:
+    """
+    Groups words, visited in order of start time, into utterances. A word of
+    the same speaker that starts within the turn end threshold joins the
+    current utterance, else the last utterance that does not end with a
+    marker, else the last utterance of the speaker, otherwise it starts a
+    new utterance. A word only joins an utterance that ends with its own
+    speaker, so the speaker at the end of an utterance does not change and
+    the candidate utterances are tracked as the utterances are created
+    instead of being searched for.
+    """
+    def __init__(self, uttDict: Dict[int, List[Node]], threshold: float, id: int = 0):
+        """
+        Args:
+            uttDict (Dict[int, List[Node]]): utterance map to be populated,
+                utterances are numbered from 1
+            threshold (float): the turn end threshold in seconds
+            id (int): the number of utterances already in the map
+        """
+        self.uttDict = uttDict
+        self.threshold = threshold
+        self.id = id
+        self._reindex()
+
+    def add(self, startTime: float, sLabel: str, item: Node) -> None:
+        """
+        Adds a word to the utterance map
+
+        Args:
+            startTime (float): start time of the word
+            sLabel (str): speaker of the word
+            item (Node): the node stored in the utterance map
+        """
+        if self.id == 0:
+            self._open(item)
+            return
+
+        # calculate fto & combine utterance based on sLabel + threshold
+        fto = startTime - self.uttDict[self.id][-1].val.endTime
+        if self.id < 2:
+            if sLabel == self.uttDict[self.id][-1].val.sLabel and fto < self.threshold:
+                self._append(self.id, item)
+            else:
+                self._open(item)
+            return
+
+        index2 = self.lastNonMarker
+        fto2 = startTime - self.uttDict[index2][-1].val.endTime
+        index3 = self.lastOfSpeaker.get(sLabel, 1)
+        fto3 = startTime - self.uttDict[index3][-1].val.endTime
+
+        if sLabel == self.uttDict[self.id][-1].val.sLabel and fto < self.threshold:
+            self._append(self.id, item)
+        elif sLabel == self.uttDict[index2][-1].val.sLabel and fto2 < self.threshold:
+            self._append(index2, item)
+        elif fto3 < self.threshold and sLabel == self.uttDict[index3][-1].val.sLabel:
+            self._append(index3, item)
+        # if not, create a new list add current node to new list
+        else:
+            self._open(item)
+
+    def _open(self, item: Node) -> None:
+        self.id += 1
+        self.uttDict[self.id] = [item]
+        self._register(self.id)
+
+    def _append(self, index: int, item: Node) -> None:
+        before = self.uttDict[index][-1].val.sLabel
+        self.uttDict[index].append(item)
+        if item.val.sLabel != before:
+            self._reindex()
+
+    def _register(self, index: int) -> None:
+        """ records the utterance as the latest one of its speaker, the
+            first utterance is never a candidate
+        """
+        if index < 2:
+            return
+        sLabel = self.uttDict[index][-1].val.sLabel
+        if sLabel not in MARKER.INTERNAL_MARKER_SET:
+            self.lastNonMarker = index
+        self.lastOfSpeaker[sLabel] = index
+
+    def _reindex(self) -> None:
+        self.lastNonMarker = 1
+        self.lastOfSpeaker: Dict[str, int] = dict()
+        for index in range(2, self.id + 1):
+            self._register(index)
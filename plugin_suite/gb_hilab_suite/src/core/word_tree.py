@@ -6,9 +6,7 @@
 
 # Standard imports
 from typing import Any, Dict, List
-import random
 import re
-from math import floor
 from gailbot import Plugin, GBPluginMethods,  UttObj
 from gb_hilab_suite.src.core.nodes import Node
 
@@ -45,24 +43,17 @@ class WordTreePlugin(Plugin):
         if len(utterances_map.values()) == 1 and list(utterances_map.values())[0] == []:
             root = Node(0, 1, "0", "empty")
         else:
+            nodes: List[Node] = list()
             for _, utterances in utterances_map.items():
                 k = self.__speakerNum(utterances)
-                random.shuffle(utterances)
                 for utt in utterances:
-                    if (root == None):
-                        root = Node(utt.start,
-                                    utt.end,
-                                    # NOTE
-                                    "0" + str(self._getIntLabel(utt.speaker) + i),
-                                    utt.text)
-                    else:
-                        self._insert(
-                            root, 
-                            utt.start,
-                            utt.end,
-                            "0" + str(self._getIntLabel(utt.speaker) + i),
-                            utt.text)
+                    nodes.append(Node(utt.start,
+                                      utt.end,
+                                      # NOTE
+                                      "0" + str(self._getIntLabel(utt.speaker) + i),
+                                      utt.text))
                 i += k
+            root = Node.fromSorted(self._uniqueStartTimes(nodes))
             
         self.successful = True
         return root
@@ -71,57 +62,24 @@ class WordTreePlugin(Plugin):
     ################## BELOW ARE HELPER FUNCTIONS ########################
     ######################################################################
 
-    def _insert(self, root: Node, start_time: float, end_time: float,
-               speaker_label: str, text: str) -> Node:
+    def _uniqueStartTimes(self, nodes: List[Node]) -> List[Node]:
         """
-        Inserts a new node into the BST using start time (in secs) as index.
+        Sorts the nodes by start time (in secs), which is the index of the
+        tree, only the first word with a given start time is kept.
 
         Args:
-            start_time (float): start time.
-            end_time (float): End time.
-            speaker_label (str): Speaker label.
-            text (str): Word that the node stores.
+            nodes (List[Node]): the nodes of every word
 
         Returns:
-             Node
+             List[Node]
         """
-        if root is None:
-            return Node(start_time, end_time, speaker_label, text)
-        else:
-            if root.val.startTime == start_time:
-                return
-            elif root.val.startTime < start_time:
-                root.right = self._insert(
-                    root.right, start_time, end_time, speaker_label, text)
-            else:
-                root.left = self._insert(
-                    root.left, start_time, end_time, speaker_label, text)
-        return root
-
-    def __sortedArrayToBST(self, arr: List[UttObj]):
-        """
-        Makes the binary search tree balanced
-        credit: https://www.geeksforgeeks.org/sorted-array-to-balanced-bst/
-
-        Args:
-            arr (Utt): list of uttered words
-
-        Returns:
-            Node: root of the balanced BST
-        """
-        if not arr:
-            return None
-
-        mid = floor((len(arr)) / 2)
-        root = Node(
-            arr[mid].start,
-            arr[mid].end,
-            arr[mid].speaker,
-            arr[mid].text)
-        root.left = self.__sortedArrayToBST(arr[:mid])
-        root.right = self.__sortedArrayToBST(arr[mid+1:])
-
-        return root
+        nodes = sorted(nodes, key=lambda node: node.val.startTime)
+        unique = list()
+        for node in nodes:
+            if unique and unique[-1].val.startTime == node.val.startTime:
+                continue
+            unique.append(node)
+        return unique
 
     # return the number of spealer in utterances
     def __speakerNum(self, utterances: List[UttObj]):
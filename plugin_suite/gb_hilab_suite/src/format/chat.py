@@ -39,10 +39,7 @@ class ChatPlugin(Plugin):
         }
         # Gets tree and utterance map from conversation model generated from dependency map
 
-        root = cm.getTree(False)
-        newUttMap = dict()
-        myFunction = cm.outer_buildUttMapWithChange(0)
-        myFunction(root, newUttMap, varDict)
+        newUttMap = cm.getUttMapWithChange(varDict)
 
         # start printing to file
         # header of the file 
@@ -45,10 +45,7 @@ class CSVPlugin(Plugin):
             MARKER.PAUSES: LABEL.PAUSE,
         }
 
-        root = cm.getTree(False)
-        newUttMap = dict()
-        myFunction = cm.outer_buildUttMapWithChange(0)
-        myFunction(root, newUttMap, varDict)
+        newUttMap = cm.getUttMapWithChange(varDict)
         path = os.path.join(methods.output_path, OUTPUT_FILE.UTT_CSV)
 
         with open(path, 'w', newline='') as outfile:
@@ -91,10 +88,7 @@ class CSVPlugin(Plugin):
             MARKER.PAUSES: LABEL.PAUSE
         }
 
-        root = cm.getTree(False)
-        newUttMap = dict()
-        myFunction = cm.outer_buildUttMapWithChange(0)
-        myFunction(root, newUttMap, varDict)
+        newUttMap = cm.getUttMapWithChange(varDict)
 
 
         path = os.path.join(methods.output_path, OUTPUT_FILE.WORD_CSV)
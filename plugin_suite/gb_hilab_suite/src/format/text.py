@@ -38,10 +38,7 @@ class TextPlugin(Plugin):
             MARKER.PAUSES: LABEL.PAUSE,
         }
 
-        root = cm.getTree(False)
-        newUttMap = dict()
-        myFunction = cm.outer_buildUttMapWithChange(0)
-        myFunction(root, newUttMap, varDict)
+        newUttMap = cm.getUttMapWithChange(varDict)
 
         path = os.path.join(methods.output_path, OUTPUT_FILE.CON_TXT)
         utterances = newUttMap
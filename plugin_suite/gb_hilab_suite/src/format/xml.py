@@ -62,12 +62,7 @@ class XMLPlugin(Plugin):
             MARKER.OVERLAP_SECOND_END:   LABEL.OVERLAPMARKER
         }
         
-        root = cm.getTree(False)
-        newUttMap = dict()
-        
-        
-        myFunction = cm.outer_buildUttMapWithChange(0)
-        myFunction(root, newUttMap, varDict)
+        newUttMap = cm.getUttMapWithChange(varDict)
 
         count = 100
         utterances = newUttMap
@@ -149,10 +144,7 @@ class XMLPlugin(Plugin):
             MARKER.SLOWSPEECH_START:     MARKER.SLOWSPEECH_START,
             MARKER.SLOWSPEECH_END:       MARKER.SLOWSPEECH_END
         }
-        root = cm.getTree(False)
-        newUttMap = dict()
-        myFunction = cm.outer_buildUttMapWithChange(0)
-        myFunction(root, newUttMap, varDict)
+        newUttMap = cm.getUttMapWithChange(varDict)
 
 
         #Root element is the CHAT tag
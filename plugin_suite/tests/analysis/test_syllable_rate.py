@@ -1,4 +1,7 @@
-from gb_hilab_suite.src.analysis.syllable_rate import SyllableRatePlugin
+import numpy
+import syllables
+
+from gb_hilab_suite.src.analysis.syllable_rate import SyllableRatePlugin, SyllableCache
 from .test_fun import analysis_test
 SYLLABLE_RATE_OUT_PATH = "/Users/yike/Desktop/plugin_output/syllable_rate"
 
@@ -21,3 +24,25 @@ def test_zero_gap():
     analysis_test(syllable_rate_data, plugin, SYLLABLE_RATE_OUT_PATH + "zero_gap")
 
 
+def test_syllable_cache():
+    cache = SyllableCache(maxsize=3)
+    tokens = ["yeah", "um", "yeah", "The", "the", "yeah"]
+    counts = cache.estimateMany(tokens)
+    assert counts == {token: syllables.estimate(token) for token in tokens}
+    # every distinct token is estimated once
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert len(cache.info()) and cache.info()["size"] == 3
+
+    assert cache.estimate("the") == syllables.estimate("the")
+    assert cache.hits == 3 and cache.hitRate() == 3 / 7
+    # the least recently used token was dropped
+    cache.estimate("yeah")
+    assert cache.misses == 5
+
+
+def test_rates_from_array():
+    plugin = SyllableRatePlugin()
+    rates = [{"syllRate": rate} for rate in [1.0, 2.0, 2.5, 3.0, 9.0]]
+    stats = plugin.stats(rates)
+    assert stats == plugin.stats(numpy.array([1.0, 2.0, 2.5, 3.0, 9.0]))
+    assert stats["median"] == 2.5
@@ -0,0 +1,96 @@
+import random
+
+from gb_hilab_suite.src.configs import INTERNAL_MARKER, load_threshold, PLUGIN_NAME
+from gb_hilab_suite.src.core.nodes import Node
+from gb_hilab_suite.src.analysis.turn_analysis import analyzeTurns, overlapPositions, INVALID_OVERLAP
+from tests.core.test_utterance_map import build_model, datasets
+
+MARKER = INTERNAL_MARKER
+THRESHOLD = load_threshold()
+
+
+def reference_analysis(utterances):
+    """ the pair by pair analysis of the overlap, pause and gap plugins,
+        markers are (startTime, endTime, sLabel, text)
+    """
+    utts = [[node.val for node in nodes] for nodes in utterances.values()]
+    overlaps, pauses, gaps = [], [], []
+    unique_id = 0
+    for curr, nxt in zip(utts, utts[1:]):
+        if nxt[0].startTime < curr[-1].endTime:
+            positions = overlapPositions(curr, nxt)
+            if positions != INVALID_OVERLAP:
+                cx, cy, nx, ny = [p if p < len(u) else -1 for p, u in
+                                  zip(positions, [curr, curr, nxt, nxt])]
+                for time, kind, speaker in [
+                        (curr[cx].startTime, MARKER.OVERLAP_FIRST_START, curr[0].sLabel),
+                        (curr[cy].endTime, MARKER.OVERLAP_FIRST_END, curr[0].sLabel),
+                        (nxt[nx].startTime, MARKER.OVERLAP_SECOND_START, nxt[0].sLabel),
+                        (nxt[ny].endTime, MARKER.OVERLAP_SECOND_END, nxt[0].sLabel)]:
+                    overlaps.append((time, time, MARKER.OVERLAPS,
+                                     MARKER.TYPE_INFO_SP.format(kind, str(unique_id), speaker)))
+                unique_id += 1
+
+        fto = round(nxt[0].startTime - curr[-1].endTime, 2)
+        pause = (curr[-1].endTime, nxt[0].startTime, MARKER.PAUSES)
+        if curr[0].sLabel == nxt[0].sLabel:
+            info = None
+            if THRESHOLD.LB_LATCH <= fto <= THRESHOLD.UB_LATCH:
+                info = round(fto, 2)
+            elif THRESHOLD.LB_PAUSE <= fto <= THRESHOLD.UB_PAUSE:
+                info = round(fto, 2)
+            elif THRESHOLD.LB_MICROPAUSE <= fto <= THRESHOLD.UB_MICROPAUSE:
+                info = round(fto, 1)
+            elif fto >= THRESHOLD.LB_LARGE_PAUSE:
+                info = round(fto, 1)
+            if info is not None:
+                pauses.append(pause + (MARKER.TYPE_INFO_SP.format(
+                    MARKER.PAUSES, str(info), str(curr[-1].sLabel)),))
+        if fto >= THRESHOLD.GAPS_LB and curr[0].sLabel != nxt[0].sLabel:
+            gaps.append((curr[-1].endTime, nxt[0].startTime, MARKER.GAPS,
+                         MARKER.TYPE_INFO_SP.format(
+                             MARKER.GAPS, str(round(fto, 1)), str(curr[-1].sLabel))))
+    return overlaps, pauses, gaps
+
+
+def as_tuples(markers):
+    return [(m.startTime, m.endTime, m.sLabel, m.text) for m in markers]
+
+
+def random_utterances(num, seed):
+    rng = random.Random(seed)
+    utterances, t = dict(), 0.0
+    for i in range(1, num + 1):
+        t += rng.choice([-0.5, -0.05, 0.0, 0.01, 0.05, 0.1, 0.15, 0.2, 0.5, 1.0, 1.005, 2.675])
+        speaker = rng.choice(["01", "02", "03"])
+        words, start = [], t
+        for _ in range(rng.randrange(1, 4)):
+            end = start + rng.choice([0.1, 0.3, 0.7])
+            words.append(Node(start, end, speaker, "w"))
+            start = end
+        utterances[i] = words
+        t = start
+    return utterances
+
+
+def test_turn_analysis_matches_pairwise(tmp_path):
+    maps = [build_model(data, tmp_path)[1].getUttMap(False) for data in datasets()]
+    maps += [random_utterances(3000, seed) for seed in range(3)]
+    for utterances in maps:
+        result = analyzeTurns(utterances)
+        overlaps, pauses, gaps = reference_analysis(utterances)
+        assert as_tuples(result.overlaps) == overlaps
+        assert as_tuples(result.pauses) == pauses
+        assert as_tuples(result.gaps) == gaps
+    assert result.overlaps and result.pauses and result.gaps
+
+
+def test_turn_analysis_is_shared(tmp_path):
+    _, cm, _ = build_model(datasets()[0], tmp_path)
+    turns = cm.getTurnAnalysis()
+    cm.insertMarkersToTree(turns.pauses)
+    cm.buildUttMap()
+    assert cm.getTurnAnalysis() is turns
+    cm.insertToTree(1000.0, 1001.0, "01", "later")
+    cm.buildUttMap()
+    assert cm.getTurnAnalysis() is not turns
@@ -0,0 +1,82 @@
+from gb_hilab_suite.src.configs import INTERNAL_MARKER, load_label, PLUGIN_NAME
+from gb_hilab_suite.src.analysis.gaps import GapPlugin
+from gb_hilab_suite.src.analysis.pauses import PausePlugin
+from gb_hilab_suite.src.analysis.overlaps import OverlapPlugin
+from gb_hilab_suite.src.analysis.syllable_rate import SyllableRatePlugin
+from tests.core.test_utterance_map import as_tuples, build_model, datasets
+
+MARKER = INTERNAL_MARKER
+LABEL = load_label()
+
+
+def var_dicts():
+    """ the label mappings used by the format plugins """
+    return [
+        {MARKER.GAPS: LABEL.CSV.GAPMARKER, MARKER.OVERLAPS: LABEL.CSV.OVERLAPMARKER,
+         MARKER.OVERLAP_FIRST_START: LABEL.CSV.OVERLAPMARKER_CURR_START,
+         MARKER.OVERLAP_FIRST_END: LABEL.CSV.OVERLAPMARKER_CURR_END,
+         MARKER.OVERLAP_SECOND_START: LABEL.CSV.OVERLAPMARKER_NEXT_START,
+         MARKER.OVERLAP_SECOND_END: LABEL.CSV.OVERLAPMARKER_NEXT_END,
+         MARKER.PAUSES: LABEL.CSV.PAUSE},
+        {MARKER.GAPS: LABEL.CHAT.GAPMARKER,
+         MARKER.OVERLAP_FIRST_START: LABEL.CHAT.OVERLAPMARKER_CURR_START,
+         MARKER.OVERLAP_FIRST_END: LABEL.CHAT.OVERLAPMARKER_CURR_END,
+         MARKER.OVERLAP_SECOND_START: LABEL.CHAT.OVERLAPMARKER_NEXT_START,
+         MARKER.OVERLAP_SECOND_END: LABEL.CHAT.OVERLAPMARKER_NEXT_END,
+         MARKER.PAUSES: LABEL.CHAT.PAUSE,
+         MARKER.FASTSPEECH_START: MARKER.FASTSPEECH_DELIM,
+         MARKER.FASTSPEECH_END: MARKER.FASTSPEECH_DELIM,
+         MARKER.SLOWSPEECH_START: MARKER.SLOWSPEECH_DELIM,
+         MARKER.SLOWSPEECH_END: MARKER.SLOWSPEECH_DELIM},
+        {MARKER.GAPS: LABEL.XML.GAPMARKER, MARKER.OVERLAPS: LABEL.XML.OVERLAPMARKER,
+         MARKER.OVERLAP_FIRST_START: LABEL.XML.OVERLAPMARKER,
+         MARKER.OVERLAP_FIRST_END: LABEL.XML.OVERLAPMARKER,
+         MARKER.OVERLAP_SECOND_START: LABEL.XML.OVERLAPMARKER,
+         MARKER.OVERLAP_SECOND_END: LABEL.XML.OVERLAPMARKER},
+        {MARKER.PAUSES: MARKER.PAUSES, MARKER.GAPS: LABEL.XML.GAPMARKER,
+         MARKER.OVERLAPS: LABEL.XML.OVERLAPMARKER,
+         MARKER.OVERLAP_FIRST_START: LABEL.XML.OVERLAPMARKER_CURR_START,
+         MARKER.OVERLAP_FIRST_END: LABEL.XML.OVERLAPMARKER_CURR_END,
+         MARKER.OVERLAP_SECOND_START: LABEL.XML.OVERLAPMARKER_NEXT_START,
+         MARKER.OVERLAP_SECOND_END: LABEL.XML.OVERLAPMARKER_NEXT_END,
+         MARKER.FASTSPEECH_START: MARKER.FASTSPEECH_START,
+         MARKER.FASTSPEECH_END: MARKER.FASTSPEECH_END,
+         MARKER.SLOWSPEECH_START: MARKER.SLOWSPEECH_START,
+         MARKER.SLOWSPEECH_END: MARKER.SLOWSPEECH_END},
+    ]
+
+
+def analyzed_model(data, tmp_path):
+    _, cm, methods = build_model(data, tmp_path)
+    for plugin in [OverlapPlugin, PausePlugin, GapPlugin, SyllableRatePlugin]:
+        plugin().apply({PLUGIN_NAME.ConvModel: cm}, methods)
+    return cm
+
+
+def test_view_matches_traversal(tmp_path):
+    for data in datasets()[:4]:
+        cm = analyzed_model(data, tmp_path)
+        for varDict in var_dicts():
+            expected = dict()
+            cm.outer_buildUttMapWithChange(0)(cm.getTree(False), expected, varDict)
+            assert as_tuples(cm.getUttMapWithChange(varDict)) == as_tuples(expected)
+
+
+def test_view_is_shared(tmp_path):
+    cm = analyzed_model(datasets()[0], tmp_path)
+    view = cm.getConversationView()
+    varDict = var_dicts()[0]
+    first, second = cm.getUttMapWithChange(varDict), cm.getUttMapWithChange(varDict)
+    assert cm.getConversationView() is view
+    # marker nodes are new for every formatter, which may change their text
+    words = {id(n) for n in cm.getTree(False).iterNodes(cm.getTree(False))}
+    for nodes, others in zip(first.values(), second.values()):
+        for node, other in zip(nodes, others):
+            assert (node is other) == (id(node) in words)
+
+    # modifying the tree rebuilds the view
+    last = max(n.val.endTime for n in cm.getTree(False).iterNodes(cm.getTree(False)))
+    cm.insertToTree(last + 10, last + 11, "01", "later")
+    assert cm.getConversationView() is not view
+    texts = [n.val.text for nodes in cm.getUttMapWithChange(varDict).values() for n in nodes]
+    assert texts[-1] == "later"
@@ -1,7 +1,132 @@
-from gb_hilab_suite.src.core.nodes import Node
+import random
+
+from gb_hilab_suite.src.configs import INTERNAL_MARKER
+from gb_hilab_suite.src.core.nodes import Node, Word, Marker
+
+MARKER = INTERNAL_MARKER
 
 def test_node():
     node = Node(1, 2, "speaker1", "hello")
     assert node 
-    
-    
\ No newline at end of file
+
+
+class ReferenceNode:
+    """ the unbalanced tree the balanced tree replaces """
+    def __init__(self, startTime, text):
+        self.startTime = startTime
+        self.text = text
+        self.left = None
+        self.right = None
+
+    @staticmethod
+    def insert(root, startTime, text):
+        if root is None:
+            return ReferenceNode(startTime, text)
+        if root.startTime == startTime:
+            newNode = ReferenceNode(startTime, text)
+            newNode.left = root.left
+            root.left = newNode
+        elif root.startTime < startTime:
+            root.right = ReferenceNode.insert(root.right, startTime, text)
+        else:
+            root.left = ReferenceNode.insert(root.left, startTime, text)
+        return root
+
+    def inorder(self, vals):
+        if self.left:
+            self.left.inorder(vals)
+        vals.append((self.startTime, self.text))
+        if self.right:
+            self.right.inorder(vals)
+        return vals
+
+
+def check_balanced(root):
+    for node in Node.iterNodes(root):
+        left = node.left.height if node.left else 0
+        right = node.right.height if node.right else 0
+        assert node.height == 1 + max(left, right)
+        assert abs(left - right) <= 1
+
+
+def test_same_order_as_unbalanced_tree():
+    rng = random.Random(0)
+    words = sorted(rng.sample(range(10000), 2000))
+    root = Node.fromSorted([Node(t, t + 1, "01", f"w{t}") for t in words])
+    reference = None
+    for t in rng.sample(words, len(words)):
+        reference = ReferenceNode.insert(reference, t, f"w{t}")
+
+    # markers, many of them at the start time of a word
+    for i in range(3000):
+        t = rng.choice(words) if rng.random() < 0.5 else rng.randrange(10000)
+        root = root.insert(root, t, t, "gap", f"m{i}")
+        reference = ReferenceNode.insert(reference, t, f"m{i}")
+
+    assert [(w.startTime, w.text) for w in root.inorder([])] == reference.inorder([])
+    check_balanced(root)
+    assert root.search(root, words[10]).text == f"w{words[10]}"
+
+
+def test_sorted_inserts_do_not_recurse():
+    root = Node(0, 1, "01", "w0")
+    for t in range(1, 100000):
+        root = root.insert(root, t, t + 1, "01", f"w{t}")
+    check_balanced(root)
+    assert root.height <= 20
+    assert len(root.inorder([])) == 100000
+    assert [w.startTime for w in root.searchRange(root, 500, 505)] == list(range(500, 505))
+    assert root.searchRange(root, 200000, 300000) == []
+
+
+def test_delete():
+    root = Node.fromSorted([Node(t, t + 1, "01", f"w{t}") for t in range(100)])
+    root = root.insert(root, 50, 50, "gap", "marker")
+    root = root.deleteNode(root, 50)
+    check_balanced(root)
+    assert root.search(root, 50).text == "marker"
+    for t in range(0, 100, 3):
+        root = root.deleteNode(root, t)
+        check_balanced(root)
+    assert [w.startTime for w in root.inorder([])] == \
+        [t for t in range(100) if t % 3 != 0 or t == 50]
+
+
+def test_marker():
+    marker = Marker(1.0, 1.5, MARKER.PAUSES, MARKER.PAUSES, 0.5, 2)
+    text = MARKER.TYPE_INFO_SP.format(MARKER.PAUSES, "0.5", "2")
+    assert marker.text == text
+    assert (marker.markerInfo, marker.markerSpeaker) == ("0.5", "2")
+    assert Marker.fromWord(Word(1.0, 1.5, MARKER.PAUSES, text)) == marker
+    assert Marker.fromWord(marker) is marker
+
+    marker.text = "(.)"
+    assert marker.text == "(.)" and marker.markerType == MARKER.PAUSES
+
+
+def test_insert_marker():
+    root = Node.fromSorted([Node(i, i + 0.5, "01", f"w{i}") for i in range(10)])
+    marker = Marker(3.5, 4, MARKER.GAPS, MARKER.GAPS, "0.5", "01")
+    root = root.insertNode(root, Node.fromWord(marker))
+    check_balanced(root)
+    vals = root.inorder([])
+    assert vals[4] is marker
+    assert [val.startTime for val in vals] == sorted(val.startTime for val in vals)
+
+
+def test_insert_all_same_as_insert():
+    rng = random.Random(4)
+    words = [(i * 0.5, f"w{i}") for i in range(200)]
+    markers = [(rng.choice(words)[0] if rng.random() < 0.5 else rng.random() * 100, f"m{i}")
+               for i in range(300)]
+    one_by_one = Node.fromSorted([Node(s, s, "01", t) for s, t in words])
+    for s, t in markers:
+        one_by_one = one_by_one.insert(one_by_one, s, s, MARKER.GAPS, t)
+    at_once = Node.fromSorted([Node(s, s, "01", t) for s, t in words])
+    at_once = Node.insertAll(at_once, [Node(s, s, MARKER.GAPS, t) for s, t in markers])
+    check_balanced(at_once)
+    assert [w.text for w in at_once.inorder([])] == [w.text for w in one_by_one.inorder([])]
+    # the tree keeps the order of equal start times for later inserts
+    at_once = at_once.insert(at_once, words[3][0], 0, "01", "later")
+    one_by_one = one_by_one.insert(one_by_one, words[3][0], 0, "01", "later")
+    assert [w.text for w in at_once.inorder([])] == [w.text for w in one_by_one.inorder([])]
@@ -0,0 +1,168 @@
+import os
+import random
+
+import toml
+
+from gailbot.plugins import GBPluginMethods
+from gb_hilab_suite.src.configs import INTERNAL_MARKER, load_threshold, PLUGIN_NAME
+from gb_hilab_suite.src.core.nodes import Node
+from gb_hilab_suite.src.core.word_tree import WordTreePlugin
+from gb_hilab_suite.src.core.utterance_map import UtteranceMapPlugin, UtteranceGrouper
+from gb_hilab_suite.src.core.speaker_map import SpeakerMapPlugin
+from gb_hilab_suite.src.core.conversation_map import ConversationMapPlugin
+from gb_hilab_suite.src.core.conversation_model import ConversationModelPlugin
+from gb_hilab_suite.src.analysis.gaps import GapPlugin
+from gb_hilab_suite.src.analysis.pauses import PausePlugin
+from gb_hilab_suite.src.analysis.overlaps import OverlapPlugin
+from gb_hilab_suite.src.analysis.syllable_rate import SyllableRatePlugin
+
+MARKER = INTERNAL_MARKER
+THRESHOLD = load_threshold()
+UTT_TOML = os.path.join(os.path.dirname(__file__), "..", "..", "gailbot", "utt.toml")
+
+
+def reference_group(items):
+    """ the grouping that scans back over the previous utterances for every
+        word, items are (startTime, speaker, node) in order of start time
+    """
+    uttDict = dict()
+    id = 0
+    threshold = THRESHOLD.TURN_END_THRESHOLD_SECS
+    for startTime, currSL, node in items:
+        if id == 0:
+            id += 1
+            uttDict[id] = [node]
+        elif id < 2:
+            fto = startTime - uttDict[id][-1].val.endTime
+            if currSL == uttDict[id][-1].val.sLabel and fto < threshold:
+                uttDict[id].append(node)
+            else:
+                id += 1
+                uttDict[id] = [node]
+        else:
+            fto = startTime - uttDict[id][-1].val.endTime
+            index2 = id
+            while index2 > 1 and uttDict[index2][-1].val.sLabel in MARKER.INTERNAL_MARKER_SET:
+                index2 -= 1
+            fto2 = startTime - uttDict[index2][-1].val.endTime
+            index3 = id
+            while index3 > 1 and (uttDict[index3][-1].val.sLabel != currSL):
+                index3 -= 1
+            fto3 = startTime - uttDict[index3][-1].val.endTime
+            if currSL == uttDict[id][-1].val.sLabel and fto < threshold:
+                uttDict[id].append(node)
+            elif currSL == uttDict[index2][-1].val.sLabel and fto2 < threshold:
+                uttDict[index2].append(node)
+            elif fto3 < threshold and currSL == uttDict[index3][-1].val.sLabel:
+                uttDict[index3].append(node)
+            else:
+                id += 1
+                uttDict[id] = [node]
+    return uttDict
+
+
+def as_tuples(uttDict):
+    return {key: [(n.val.startTime, n.val.endTime, n.val.sLabel, n.val.text) for n in nodes]
+            for key, nodes in uttDict.items()}
+
+
+def marker_speaker(node):
+    if node.val.sLabel in MARKER.INTERNAL_MARKER_SET:
+        arr = node.val.text[1:-1].split(MARKER.MARKER_SEP)
+        return arr[-1].split(MARKER.KEYVALUE_SEP)[-1]
+    return node.val.sLabel
+
+
+def synthetic(num_words, num_files = 2, num_speakers = 3, seed = 0):
+    rng = random.Random(seed)
+    used = set()
+    data = dict()
+    for f in range(num_files):
+        t, utts = 0.0, []
+        speaker = 0
+        while len(utts) < num_words:
+            t = round(t + rng.choice([0.0, 0.05, 0.1, 0.3, 0.8, 1.5, 3.0]), 2)
+            duration = rng.choice([0.1, 0.2, 0.4, 0.9])
+            if rng.random() < 0.3:
+                speaker = rng.randrange(num_speakers)
+            if t not in used:
+                used.add(t)
+                utts.append({"start": t, "end": round(t + duration, 2),
+                             "speaker": str(speaker), "text": rng.choice(["okay", "yeah", "international"])})
+            t += duration * rng.choice([0.5, 1.0])
+        data[f"file{f}"] = utts
+    return data
+
+
+def datasets():
+    analysis = {"test": [{"start": i, "end": i + 0.2, "speaker": i % 3, "text": f"word{i}"}
+                         for i in range(0, 20, 1)]}
+    return [GBPluginMethods().data, toml.load(UTT_TOML), analysis,
+            synthetic(300), synthetic(2000, num_files=3, num_speakers=4, seed=1)]
+
+
+def build_model(data, tmp_path):
+    methods = GBPluginMethods(data, str(tmp_path))
+    deps = dict()
+    deps[PLUGIN_NAME.WordTree] = WordTreePlugin().apply(deps, methods)
+    deps[PLUGIN_NAME.UttMap] = UtteranceMapPlugin().apply(deps, methods)
+    deps[PLUGIN_NAME.SpeakerMap] = SpeakerMapPlugin().apply(deps, methods)
+    deps[PLUGIN_NAME.ConvMap] = ConversationMapPlugin().apply(deps, methods)
+    cm = ConversationModelPlugin().apply(deps, methods)
+    return deps, cm, methods
+
+
+def test_utterance_map_matches_reference(tmp_path):
+    for data in datasets():
+        deps, _, _ = build_model(data, tmp_path)
+        root = deps[PLUGIN_NAME.WordTree]
+        items = [(n.val.startTime, n.val.sLabel, n) for n in Node.iterNodes(root)
+                 if n.val.startTime is not None and n.val.sLabel not in MARKER.INTERNAL_MARKER_SET]
+        assert as_tuples(deps[PLUGIN_NAME.UttMap]) == as_tuples(reference_group(items))
+
+
+def test_marker_map_matches_reference(tmp_path):
+    varDict = {MARKER.GAPS: "(0.1)", MARKER.PAUSES: "(.)",
+               MARKER.OVERLAP_FIRST_START: "<", MARKER.OVERLAP_FIRST_END: ">",
+               MARKER.OVERLAP_SECOND_START: "[<", MARKER.OVERLAP_SECOND_END: "]",
+               MARKER.FASTSPEECH_START: "+", MARKER.FASTSPEECH_END: "+",
+               MARKER.SLOWSPEECH_START: "-", MARKER.SLOWSPEECH_END: "-"}
+    for data in datasets():
+        _, cm, methods = build_model(data, tmp_path)
+        for plugin in [OverlapPlugin, PausePlugin, GapPlugin, SyllableRatePlugin]:
+            plugin().apply({PLUGIN_NAME.ConvModel: cm}, methods)
+        root = cm.getTree(False)
+
+        result = dict()
+        cm.outer_buildUttMapWithChange(0)(root, result, varDict)
+        items = [(n.val.startTime, marker_speaker(n), cm.toReplace(n, varDict))
+                 for n in Node.iterNodes(root) if n.val.startTime is not None]
+        assert as_tuples(result) == as_tuples(reference_group(items))
+
+
+def test_many_speaker_switches():
+    rng = random.Random(2)
+    nodes = []
+    for i in range(20000):
+        nodes.append(Node(i * 0.3, i * 0.3 + rng.choice([0.1, 0.25, 0.6]),
+                          "0" + str(rng.randrange(6)), "w"))
+    root = Node.fromSorted(nodes)
+    uttDict = dict()
+    UtteranceMapPlugin().outer_create_dict(0)(root, uttDict)
+    items = [(n.val.startTime, n.val.sLabel, n) for n in nodes]
+    assert as_tuples(uttDict) == as_tuples(reference_group(items))
+    assert len(uttDict) > 5000
+
+
+def test_grouper_with_marker_speakers():
+    rng = random.Random(3)
+    labels = ["01", "02", "03", MARKER.GAPS, MARKER.PAUSES]
+    items = []
+    for i in range(5000):
+        label = rng.choice(labels)
+        items.append((i * 0.2, label, Node(i * 0.2, i * 0.2 + rng.choice([0.05, 0.3]), label, "w")))
+    uttDict = dict()
+    grouper = UtteranceGrouper(uttDict, THRESHOLD.TURN_END_THRESHOLD_SECS)
+    for startTime, label, node in items:
+        grouper.add(startTime, label, node)
+    assert as_tuples(uttDict) == as_tuples(reference_group(items))
@@ -1,5 +1,6 @@
 from gb_hilab_suite.src.core.word_tree import WordTreePlugin
 from gailbot.plugins import GBPluginMethods
+from gailbot import UttObj
 
 GBPlugin = GBPluginMethods()
 
@@ -9,3 +10,25 @@ def test_word_tree():
     print(res)
     assert plg._getIntLabel("1") == 1
     assert plg._getIntLabel("SPEAKER_01") == 1
+
+
+class UtteranceMethods:
+    """ the plugin methods of one file of words """
+    def __init__(self, words):
+        self.words = words
+
+    def get_utterance_objects(self):
+        return {"file": [UttObj(start=start, end=start + 0.5, speaker="0", text=text)
+                         for start, text in self.words]}
+
+
+def test_duplicate_start_times():
+    """ the old tree dropped the node of a repeated start time together with
+        every word below it, now only the later words of that start time are
+        dropped and every other word is kept
+    """
+    words = [(float(t), f"w{t}") for t in range(50)]
+    words += [(10.0, "again10"), (30.0, "again30"), (30.0, "third30")]
+    root = WordTreePlugin().apply({}, UtteranceMethods(words))
+    kept = [(w.startTime, w.text) for w in root.inorder([])]
+    assert kept == [(float(t), f"w{t}") for t in range(50)]